@@ -4,17 +4,30 @@ extends Node3D
 ## Animated character with idle, walk, run animations
 ## Compatible interface with Sophia skin
 
+## Manifest written by tools/combine_judai_animations.py --split-libraries.
+## Empty when the model embeds its animations.
+@export_file("*.json") var animation_manifest: String = ""
+## Libraries loaded with the character; the others load when one of their
+## clips is first played (or earlier with request_animation_library).
+@export var startup_libraries: PackedStringArray = PackedStringArray(["locomotion"])
+
 @onready var animation_player: AnimationPlayer = null
 @onready var animation_tree: AnimationTree = null
 
 var current_state: String = "idle"
 
+# category -> {file, clips} from the animation manifest
+var _libraries: Dictionary = {}
+
 
 func _ready() -> void:
 	# Find animation player - could be direct child or nested in model
 	animation_player = _find_node_of_type(self, "AnimationPlayer")
 	animation_tree = _find_node_of_type(self, "AnimationTree")
 
+	if animation_manifest != "":
+		_load_animation_manifest()
+
 	if animation_player:
 		print("[JudaiSkin] Found AnimationPlayer with animations: ", animation_player.get_animation_list())
 	else:
@@ -82,6 +95,97 @@ func _find_node_of_type(node: Node, type_name: String):
 	return null
 
 
+func _load_animation_manifest() -> void:
+	var file := FileAccess.open(animation_manifest, FileAccess.READ)
+	if file == null:
+		push_error("[JudaiSkin] Cannot open animation manifest %s" % animation_manifest)
+		return
+	var manifest = JSON.parse_string(file.get_as_text())
+	if not manifest is Dictionary or not manifest.has("libraries"):
+		push_error("[JudaiSkin] Invalid animation manifest %s" % animation_manifest)
+		return
+	_libraries = manifest.libraries
+
+	# A model split from its animations has no AnimationPlayer of its own
+	if not animation_player:
+		var skeleton = _find_node_of_type(self, "Skeleton3D")
+		var model_root: Node = skeleton.owner if skeleton and skeleton.owner else self
+		animation_player = AnimationPlayer.new()
+		animation_player.name = "AnimationPlayer"
+		model_root.add_child(animation_player)
+
+	for category in startup_libraries:
+		load_animation_library(category)
+
+
+func _library_path(category: String) -> String:
+	return animation_manifest.get_base_dir().path_join(_libraries[category].file)
+
+
+## Starts loading a library in the background, e.g. when entering a scene that will use it.
+func request_animation_library(category: String) -> void:
+	if _libraries.has(category) and not has_animation_library(category):
+		ResourceLoader.load_threaded_request(_library_path(category))
+
+
+## Adds a library of the manifest to the AnimationPlayer (waiting for it if needed).
+func load_animation_library(category: String) -> bool:
+	if not animation_player or not _libraries.has(category):
+		return false
+	if animation_player.has_animation_library(category):
+		return true
+
+	var path := _library_path(category)
+	var resource: Resource
+	if ResourceLoader.load_threaded_get_status(path) != ResourceLoader.THREAD_LOAD_INVALID_RESOURCE:
+		resource = ResourceLoader.load_threaded_get(path)
+	else:
+		resource = load(path)
+	var library := _as_animation_library(resource)
+	if not library:
+		push_error("[JudaiSkin] Cannot load animation library %s" % path)
+		return false
+	animation_player.add_animation_library(category, library)
+	print("[JudaiSkin] Loaded animation library '%s': %s" % [category, library.get_animation_list()])
+	return true
+
+
+## Drops a library nothing plays anymore so its memory can be freed.
+func unload_animation_library(category: String) -> void:
+	if has_animation_library(category):
+		if animation_player.current_animation.begins_with(category + "/"):
+			animation_player.stop()
+		animation_player.remove_animation_library(category)
+
+
+func has_animation_library(category: String) -> bool:
+	return animation_player != null and animation_player.has_animation_library(category)
+
+
+func _as_animation_library(resource: Resource) -> AnimationLibrary:
+	# Imported as an AnimationLibrary, or as a scene when its .import was not set up
+	if resource is AnimationLibrary:
+		return resource
+	if resource is PackedScene:
+		var scene: Node = resource.instantiate()
+		var player = _find_node_of_type(scene, "AnimationPlayer")
+		var library: AnimationLibrary = player.get_animation_library("") if player else null
+		scene.free()
+		return library
+	return null
+
+
+## Name of a not yet loaded clip containing keyword, loading its library ("" when none).
+func _load_clip_containing(keyword: String) -> String:
+	for category in _libraries:
+		if has_animation_library(category):
+			continue
+		for clip in _libraries[category].clips:
+			if keyword in clip and load_animation_library(category):
+				return "%s/%s" % [category, clip]
+	return ""
+
+
 func idle() -> void:
 	if current_state != "idle":
 		current_state = "idle"
@@ -118,6 +222,10 @@ func _play_animation_containing(keywords: Array) -> void:
 			if keyword in anim:
 				_play_looped(anim)
 				return
+		var clip := _load_clip_containing(keyword)
+		if clip != "":
+			_play_looped(clip)
+			return
 
 	# If no matching animation found, try first non-RESET animation
 	for anim in anims:
@@ -0,0 +1,85 @@
+class_name ChunkedModel
+extends Node3D
+
+## Streams a model exported in spatial chunks (tools/blender generators run
+## with --chunks) from its manifest.json. Chunks load in the background once
+## the camera comes within stream_distance of their bounds and are freed again
+## beyond unload_distance. Every chunk is its own scene, so Godot frustum-culls
+## each one separately instead of the whole model.
+
+@export_file("*.json") var manifest_path: String
+@export var stream_distance: float = 150.0
+@export var unload_distance: float = 200.0
+@export var update_interval: float = 0.25
+
+# Each entry: {path, aabb, node, loading, failed}
+var _chunks: Array[Dictionary] = []
+var _time_since_update: float = 0.0
+
+func _ready() -> void:
+	_load_manifest()
+	_update_streaming()
+
+func _process(delta: float) -> void:
+	_time_since_update += delta
+	if _time_since_update >= update_interval:
+		_time_since_update = 0.0
+		_update_streaming()
+
+func _load_manifest() -> void:
+	var file := FileAccess.open(manifest_path, FileAccess.READ)
+	if file == null:
+		push_error("ChunkedModel: cannot open manifest %s" % manifest_path)
+		return
+	var manifest = JSON.parse_string(file.get_as_text())
+	if not manifest is Dictionary or not manifest.has("chunks"):
+		push_error("ChunkedModel: invalid manifest %s" % manifest_path)
+		return
+
+	var base_dir := manifest_path.get_base_dir()
+	for chunk in manifest.chunks:
+		var low: Array = chunk.bounds.min
+		var high: Array = chunk.bounds.max
+		var origin := Vector3(low[0], low[1], low[2])
+		_chunks.append({
+			"path": base_dir.path_join(chunk.file),
+			"aabb": AABB(origin, Vector3(high[0], high[1], high[2]) - origin),
+			"node": null,
+			"loading": false,
+			"failed": false,
+		})
+
+func _update_streaming() -> void:
+	var camera := get_viewport().get_camera_3d()
+	for chunk in _chunks:
+		# Without a camera (e.g. in tests) everything is kept loaded
+		var distance := 0.0
+		if camera:
+			var bounds: AABB = global_transform * chunk.aabb
+			distance = camera.global_position.distance_to(_closest_point(bounds, camera.global_position))
+
+		if chunk.node == null and not chunk.failed and distance <= stream_distance:
+			_stream_in(chunk)
+		elif chunk.node != null and distance > unload_distance:
+			chunk.node.queue_free()
+			chunk.node = null
+
+func _stream_in(chunk: Dictionary) -> void:
+	if not chunk.loading:
+		ResourceLoader.load_threaded_request(chunk.path)
+		chunk.loading = true
+		return
+
+	match ResourceLoader.load_threaded_get_status(chunk.path):
+		ResourceLoader.THREAD_LOAD_LOADED:
+			var scene: PackedScene = ResourceLoader.load_threaded_get(chunk.path)
+			chunk.node = scene.instantiate()
+			add_child(chunk.node)
+			chunk.loading = false
+		ResourceLoader.THREAD_LOAD_FAILED, ResourceLoader.THREAD_LOAD_INVALID_RESOURCE:
+			push_error("ChunkedModel: failed to load %s" % chunk.path)
+			chunk.loading = false
+			chunk.failed = true
+
+func _closest_point(bounds: AABB, point: Vector3) -> Vector3:
+	return point.clamp(bounds.position, bounds.end)
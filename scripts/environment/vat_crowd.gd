@@ -0,0 +1,119 @@
+class_name VatCrowd
+extends MultiMeshInstance3D
+
+## Draws a crowd of background characters baked by tools/bake_crowd_vat.py
+## as one MultiMesh. Each instance plays one of the baked clips at its own
+## time offset and speed in vat_crowd.gdshader, so the crowd has no
+## Skeleton3D or AnimationPlayer and costs the CPU nothing per frame.
+
+const VAT_SHADER := preload("res://shaders/environment/vat_crowd.gdshader")
+
+@export_file("*.json") var manifest_path: String
+
+@export_category("Crowd")
+@export var instance_count: int = 24
+@export var area_size: Vector2 = Vector2(20, 20)
+@export var model_scale: float = 1.0
+## Clips instances pick from; empty uses every baked clip
+@export var clips: PackedStringArray = PackedStringArray()
+@export var speed_variation: float = 0.1
+@export var random_seed: int = 12345
+
+func _ready() -> void:
+	var manifest := _load_manifest()
+	if manifest.is_empty():
+		return
+	var mesh := _crowd_mesh(manifest)
+	var playable := _playable_clips(manifest)
+	if mesh == null or playable.is_empty():
+		return
+
+	var mm := MultiMesh.new()
+	mm.transform_format = MultiMesh.TRANSFORM_3D
+	mm.use_custom_data = true
+	mm.mesh = mesh
+	mm.instance_count = instance_count
+
+	var rng := RandomNumberGenerator.new()
+	rng.seed = random_seed
+	var half_size := area_size / 2.0
+	var fps: float = manifest.fps
+	for i in range(instance_count):
+		var xform := Transform3D().rotated(Vector3.UP, rng.randf() * TAU).scaled(Vector3.ONE * model_scale)
+		xform.origin = Vector3(rng.randf_range(-half_size.x, half_size.x), 0, rng.randf_range(-half_size.y, half_size.y))
+		mm.set_instance_transform(i, xform)
+
+		# r, g: the clip's frames; b: a random start within the clip; a: speed
+		var clip: Dictionary = playable[rng.randi() % playable.size()]
+		var duration: float = clip.frame_count / fps
+		var speed := 1.0 + rng.randf_range(-speed_variation, speed_variation)
+		mm.set_instance_custom_data(i, Color(clip.first_frame, clip.frame_count, rng.randf() * duration, speed))
+
+	multimesh = mm
+
+func _load_manifest() -> Dictionary:
+	var file := FileAccess.open(manifest_path, FileAccess.READ)
+	if file == null:
+		push_error("VatCrowd: cannot open manifest %s" % manifest_path)
+		return {}
+	var manifest = JSON.parse_string(file.get_as_text())
+	if not manifest is Dictionary or not manifest.has("clips"):
+		push_error("VatCrowd: invalid manifest %s" % manifest_path)
+		return {}
+	return manifest
+
+func _playable_clips(manifest: Dictionary) -> Array:
+	var playable := []
+	for clip in manifest.clips:
+		if clips.is_empty() or clips.has(clip.name):
+			playable.append(clip)
+	if playable.is_empty():
+		push_error("VatCrowd: none of the clips %s in %s" % [clips, manifest_path])
+	return playable
+
+## The baked static mesh with a VAT material per surface, keeping each
+## surface's albedo, and bounds covering every baked frame.
+func _crowd_mesh(manifest: Dictionary) -> ArrayMesh:
+	var base_dir := manifest_path.get_base_dir()
+	var scene: PackedScene = load(base_dir.path_join(manifest.mesh))
+	if scene == null:
+		push_error("VatCrowd: cannot load %s" % manifest.mesh)
+		return null
+	var model := scene.instantiate()
+	var source := _find_mesh_instance(model)
+	if source == null:
+		model.free()
+		push_error("VatCrowd: no mesh in %s" % manifest.mesh)
+		return null
+	var mesh: ArrayMesh = source.mesh.duplicate()
+	model.free()
+
+	var positions: Texture2D = load(base_dir.path_join(manifest.positions))
+	var normals: Texture2D = load(base_dir.path_join(manifest.normals))
+	for surface in range(mesh.get_surface_count()):
+		var material := ShaderMaterial.new()
+		material.shader = VAT_SHADER
+		material.set_shader_parameter("vat_positions", positions)
+		material.set_shader_parameter("vat_normals", normals)
+		material.set_shader_parameter("rows_per_frame", int(manifest.rows_per_frame))
+		material.set_shader_parameter("fps", float(manifest.fps))
+		var original := mesh.surface_get_material(surface) as BaseMaterial3D
+		if original:
+			material.set_shader_parameter("albedo_texture", original.albedo_texture)
+			material.set_shader_parameter("albedo_color", original.albedo_color)
+		mesh.surface_set_material(surface, material)
+
+	var low: Array = manifest.bounds.min
+	var high: Array = manifest.bounds.max
+	var origin := Vector3(low[0], low[1], low[2])
+	mesh.custom_aabb = AABB(origin, Vector3(high[0], high[1], high[2]) - origin)
+	return mesh
+
+func _find_mesh_instance(node: Node) -> MeshInstance3D:
+	if node is MeshInstance3D:
+		return node
+	for child in node.get_children():
+		var found := _find_mesh_instance(child)
+		if found:
+			return found
+	return null
@@ -54,12 +54,22 @@ func _apply_material_recursive(node: Node, mat: Material) -> void:
 		_apply_material_recursive(child, mat)
 
 func _add_collision_recursive(node: Node) -> void:
+	# Models from tools/blender ship simplified -convcolonly shapes that import
+	# as StaticBody3D nodes; only models without them fall back to trimeshes
+	if _has_imported_collision(node):
+		return
+	_add_trimesh_collision_recursive(node)
+
+func _has_imported_collision(node: Node) -> bool:
+	return not node.find_children("*", "CollisionShape3D", true, false).is_empty()
+
+func _add_trimesh_collision_recursive(node: Node) -> void:
 	if node is MeshInstance3D:
 		var mesh_instance := node as MeshInstance3D
 		mesh_instance.create_trimesh_collision()
 
 	for child in node.get_children():
-		_add_collision_recursive(child)
+		_add_trimesh_collision_recursive(child)
 
 
 ## Static helper to batch-place models
@@ -0,0 +1,54 @@
+@tool
+extends EditorScenePostImport
+
+## Post-import script for models processed by the tools/blender pipeline.
+## Applies the metadata each node carries in its glTF extras:
+## - visibility ranges from generate_lods.py and build_hlod.py, so "_LODn"
+##   child meshes fade in as their parent mesh fades out and "HLOD_n" proxies
+##   take over from the detailed pieces
+## - lightmap_size_hint from lightmap_uv.py, the atlas size of the UV2
+##   channel exported with the mesh, so LightmapGI bakes it at that size
+## - outline_normals from outline_normals.py: the mesh carries smoothed
+##   normals in CUSTOM0, so its materials get the inverted-hull outline pass
+
+const OUTLINE_MATERIAL := preload("res://materials/cel_outline.tres")
+
+func _post_import(scene: Node) -> Object:
+	_apply_extras(scene)
+	return scene
+
+func _apply_extras(node: Node) -> void:
+	if node is GeometryInstance3D and node.has_meta("extras"):
+		var extras = node.get_meta("extras")
+		if extras is Dictionary:
+			_apply_lod_ranges(node as GeometryInstance3D, extras)
+			if node is MeshInstance3D and extras.has("lightmap_size_hint"):
+				_apply_lightmap_size(node as MeshInstance3D, extras.lightmap_size_hint)
+			if node is MeshInstance3D and extras.get("outline_normals", false):
+				_apply_outline(node as MeshInstance3D)
+
+	for child in node.get_children():
+		_apply_extras(child)
+
+func _apply_lod_ranges(geometry: GeometryInstance3D, extras: Dictionary) -> void:
+	if not (extras.has("visibility_range_begin") or extras.has("visibility_range_end")):
+		return
+	geometry.visibility_range_begin = extras.get("visibility_range_begin", 0.0)
+	geometry.visibility_range_begin_margin = extras.get("visibility_range_begin_margin", 0.0)
+	geometry.visibility_range_end = extras.get("visibility_range_end", 0.0)
+	geometry.visibility_range_end_margin = extras.get("visibility_range_end_margin", 0.0)
+	geometry.visibility_range_fade_mode = GeometryInstance3D.VISIBILITY_RANGE_FADE_SELF
+
+func _apply_lightmap_size(mesh_instance: MeshInstance3D, size: Array) -> void:
+	var mesh := mesh_instance.mesh as ArrayMesh
+	if mesh and size.size() == 2:
+		mesh.lightmap_size_hint = Vector2i(int(size[0]), int(size[1]))
+
+func _apply_outline(mesh_instance: MeshInstance3D) -> void:
+	var mesh := mesh_instance.mesh
+	if mesh == null:
+		return
+	for surface in mesh.get_surface_count():
+		var material := mesh.surface_get_material(surface)
+		if material and material.next_pass == null:
+			material.next_pass = OUTLINE_MATERIAL
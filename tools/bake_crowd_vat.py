@@ -0,0 +1,268 @@
+"""
+Blender Script: Bake Judai animations into vertex animation textures (VAT)
+
+HOW TO USE:
+    blender --background --python tools/bake_crowd_vat.py -- \\
+        --source-dir ~/Downloads --clips Idle "Slow Run" --fps 15
+
+Loads the character like combine_judai_animations.py (same options for the
+base model, animation files and FBX cache), then writes for crowds of
+background students:
+- <name>.glb: the character as one rigid static mesh; UV2 addresses each
+  vertex's texel in the animation textures
+- <name>_positions.exr, <name>_normals.exr: one block of rows per baked
+  frame, RGB = Godot-space vertex position / normal (half float)
+- <name>.json: the manifest, with the texture layout and every clip's
+  first frame and frame count
+
+scripts/environment/vat_crowd.gd draws any number of them as one MultiMesh
+with shaders/environment/vat_crowd.gdshader: every instance plays its own
+clip at its own offset in the vertex shader, without a Skeleton3D or
+AnimationPlayer, so the CPU cost of the crowd barely grows with its size.
+"""
+
+import json
+import math
+import os
+import sys
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "blender"))
+import combine_judai_animations as combine
+from godot_import import ensure_params
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OUTPUT_PATH = os.path.join(PROJECT_DIR, "assets", "models", "characters", "judai_crowd.glb")
+DEFAULT_FPS = 15.0
+# Godot's (and most GPUs') largest texture side
+MAX_TEXTURE_SIZE = 16384
+VAT_UV_NAME = "VAT"
+# Exact texels: no compression, mipmaps or VRAM compression for 3D use
+VAT_IMPORT_PARAMS = {
+    "compress/mode": 0,
+    "mipmaps/generate": False,
+    "process/fix_alpha_border": False,
+    "process/hdr_clamp_exposure": False,
+    "process/size_limit": 0,
+    "detect_3d/compress_to": 0,
+}
+
+def configure(parser):
+    parser.set_defaults(output=OUTPUT_PATH)
+    parser.add_argument("--clips", nargs="+", metavar="NAME",
+                        help="animations to bake, by file name without .fbx (default: all)")
+    parser.add_argument("--fps", type=float, default=DEFAULT_FPS,
+                        help="baked frames per second; the shader blends between them (default: %(default)s)")
+    parser.add_argument("--max-texture-width", type=int, default=4096,
+                        help="wrap the vertices of a frame onto more rows beyond this (default: %(default)s)")
+
+def to_godot(vectors):
+    """Blender (Z up) vectors to Godot/glTF axes (Y up)"""
+    return np.column_stack([vectors[:, 0], vectors[:, 2], -vectors[:, 1]])
+
+def sample_meshes(meshes):
+    """(positions, normals) of the evaluated meshes at the current frame, concatenated, in Godot axes"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    positions, normals = [], []
+    for obj in meshes:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = evaluated.to_mesh()
+        count = len(mesh.vertices)
+        co = np.empty(count * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", co)
+        no = np.empty(count * 3, dtype=np.float32)
+        mesh.vertex_normals.foreach_get("vector", no)
+        evaluated.to_mesh_clear()
+
+        matrix = np.array(evaluated.matrix_world, dtype=np.float64)
+        co = co.reshape(-1, 3) @ matrix[:3, :3].T + matrix[:3, 3]
+        no = no.reshape(-1, 3) @ np.linalg.inv(matrix[:3, :3])
+        no /= np.maximum(np.linalg.norm(no, axis=1, keepdims=True), 1e-12)
+        positions.append(to_godot(co))
+        normals.append(to_godot(no))
+    return np.vstack(positions), np.vstack(normals)
+
+def bake_clip(armature, meshes, action, fps):
+    """[(positions, normals)] for every baked frame of a clip; the last frame loops back to the first"""
+    scene = bpy.context.scene
+    if not armature.animation_data:
+        armature.animation_data_create()
+    armature.animation_data.action = action
+    start, end = action.frame_range
+    step = scene.render.fps / scene.render.fps_base / fps
+    # Looping clips end on their first pose, which the shader reaches by wrapping around
+    frames = np.arange(start, end, step) if end - start >= step else np.array([start])
+    samples = []
+    for frame in frames:
+        scene.frame_set(int(frame), subframe=float(frame - int(frame)))
+        samples.append(sample_meshes(meshes))
+    return samples
+
+def texture_layout(vertex_count, frame_count, max_width):
+    """(width, rows per frame, height) of the animation textures"""
+    width = min(vertex_count, max_width)
+    rows_per_frame = math.ceil(vertex_count / width)
+    height = rows_per_frame * frame_count
+    if height > MAX_TEXTURE_SIZE:
+        raise ValueError(f"{frame_count} frames need {height} texture rows, more than {MAX_TEXTURE_SIZE}; "
+                         f"bake fewer clips or a lower --fps")
+    return width, rows_per_frame, height
+
+def write_exr(path, frames, width, rows_per_frame):
+    """Write per-frame vertex vectors as a half float EXR, frame after frame from the top"""
+    height = rows_per_frame * len(frames)
+    pixels = np.zeros((height, width, 4), dtype=np.float32)
+    pixels[:, :, 3] = 1.0
+    for i, vectors in enumerate(frames):
+        block = np.zeros((rows_per_frame * width, 3), dtype=np.float32)
+        block[:len(vectors)] = vectors
+        pixels[i * rows_per_frame:(i + 1) * rows_per_frame, :, :3] = block.reshape(rows_per_frame, width, 3)
+
+    image = bpy.data.images.new(os.path.basename(path), width, height, alpha=True, float_buffer=True)
+    image.colorspace_settings.name = 'Non-Color'
+    # Blender stores the bottom row first
+    image.pixels.foreach_set(pixels[::-1].ravel())
+    image.filepath_raw = path
+    image.file_format = 'OPEN_EXR'
+    image.use_half_precision = True
+    image.save()
+    bpy.data.images.remove(image)
+    ensure_params(path, "texture", "CompressedTexture2D", VAT_IMPORT_PARAMS)
+
+def add_vat_uvs(mesh, first_vertex, width, rows_per_frame):
+    """UV map addressing each vertex's texel: baked vertex i is (i % width, i // width) of a frame's rows"""
+    vertex_index = np.empty(len(mesh.loops), dtype=np.int64)
+    mesh.loops.foreach_get("vertex_index", vertex_index)
+    vertex_index += first_vertex
+    # The glTF exporter writes V as 1 - v, so UV2.y in Godot counts rows from the top
+    uv = np.column_stack([(vertex_index % width + 0.5) / width,
+                          1.0 - (vertex_index // width + 0.5) / rows_per_frame])
+    layer = mesh.uv_layers.new(name=VAT_UV_NAME)
+    layer.data.foreach_set("uv", uv.astype(np.float32).ravel())
+
+def build_static_mesh(meshes, width, rows_per_frame):
+    """Join the character's meshes, as currently posed, into one unskinned object with a VAT UV map"""
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    parts = []
+    first_vertex = 0
+    for obj in meshes:
+        evaluated = obj.evaluated_get(depsgraph)
+        mesh = bpy.data.meshes.new_from_object(evaluated, preserve_all_data_layers=True, depsgraph=depsgraph)
+        mesh.transform(evaluated.matrix_world)
+        # Keep the UV map the materials render with, under one name so joining merges them
+        for layer in [layer for layer in mesh.uv_layers if not layer.active_render]:
+            mesh.uv_layers.remove(layer)
+        if mesh.uv_layers:
+            mesh.uv_layers[0].name = "UVMap"
+        # Addressed before joining, so the join order does not matter
+        add_vat_uvs(mesh, first_vertex, width, rows_per_frame)
+        first_vertex += len(mesh.vertices)
+        part = bpy.data.objects.new(obj.name + "_VAT", mesh)
+        bpy.context.scene.collection.objects.link(part)
+        parts.append(part)
+
+    bpy.ops.object.select_all(action='DESELECT')
+    for part in parts:
+        part.select_set(True)
+    bpy.context.view_layer.objects.active = parts[0]
+    if len(parts) > 1:
+        bpy.ops.object.join()
+    return bpy.context.view_layer.objects.active
+
+def export_static_mesh(crowd, output_path):
+    bpy.ops.object.select_all(action='SELECT')
+    for obj in bpy.context.selected_objects:
+        obj.select_set(obj == crowd)
+    bpy.ops.export_scene.gltf(
+        filepath=output_path,
+        export_format='GLB',
+        use_selection=True,
+        export_animations=False,
+        export_skins=False,
+        export_morph=False,
+        export_image_format='AUTO',
+        export_materials='EXPORT',
+    )
+
+def main(argv=None):
+    args = combine.parse_args(argv, "Bake Judai animations into vertex animation textures for crowds", configure)
+    if args.convert:
+        fbx_path, library_path = args.convert
+        sys.exit(0 if combine.convert_animation(fbx_path, library_path) else 1)
+
+    print("\n" + "="*50)
+    print("JUDAI CROWD VAT BAKER")
+    print("="*50 + "\n")
+
+    armature = combine.load_character(args)
+    if not armature:
+        return
+    actions = [action for action in bpy.data.actions if action.name != "RESET"
+               and (not args.clips or action.name in args.clips)]
+    missing = set(args.clips or []) - {action.name for action in actions}
+    if missing:
+        print(f"WARNING: clips not found: {', '.join(sorted(missing))}")
+    if not actions:
+        print("\nERROR: No animations to bake!")
+        return
+    meshes = combine.skinned_meshes(armature)
+
+    print("\nBaking clips...")
+    clips, frames = [], []
+    for action in actions:
+        samples = bake_clip(armature, meshes, action, args.fps)
+        clips.append({"name": action.name, "first_frame": len(frames), "frame_count": len(samples)})
+        frames += samples
+        print(f"  {action.name}: {len(samples)} frames")
+
+    vertex_count = len(frames[0][0])
+    width, rows_per_frame, height = texture_layout(vertex_count, len(frames), args.max_texture_width)
+    stem = os.path.splitext(args.output)[0]
+    name = os.path.basename(stem)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    write_exr(stem + "_positions.exr", [positions for positions, _normals in frames], width, rows_per_frame)
+    write_exr(stem + "_normals.exr", [normals for _positions, normals in frames], width, rows_per_frame)
+
+    # The static mesh is the rest pose; bounds cover every baked frame for culling
+    armature.animation_data.action = None
+    for bone in armature.pose.bones:
+        bone.location = (0.0, 0.0, 0.0)
+        bone.rotation_quaternion = (1.0, 0.0, 0.0, 0.0)
+        bone.rotation_euler = (0.0, 0.0, 0.0)
+        bone.scale = (1.0, 1.0, 1.0)
+    bpy.context.view_layer.update()
+    crowd = build_static_mesh(meshes, width, rows_per_frame)
+    if len(crowd.data.vertices) != vertex_count:
+        print(f"\nERROR: static mesh has {len(crowd.data.vertices)} vertices, the baked frames {vertex_count}")
+        return
+    export_static_mesh(crowd, args.output)
+
+    every_position = np.vstack([positions for positions, _normals in frames])
+    manifest = {
+        "mesh": name + ".glb",
+        "positions": name + "_positions.exr",
+        "normals": name + "_normals.exr",
+        "vertex_count": vertex_count,
+        "texture_width": width,
+        "texture_height": height,
+        "rows_per_frame": rows_per_frame,
+        "fps": args.fps,
+        "bounds": {"min": every_position.min(axis=0).round(4).tolist(),
+                   "max": every_position.max(axis=0).round(4).tolist()},
+        "clips": clips,
+    }
+    with open(stem + ".json", "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+
+    print(f"\n{vertex_count:,} vertices, {len(frames)} frames in {width}x{height} textures")
+    print("\n" + "="*50)
+    print("SUCCESS! Your crowd VAT files are next to:")
+    print(args.output)
+    print("="*50 + "\n")
+
+if __name__ == "__main__":
+    main()
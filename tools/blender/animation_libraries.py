@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Split an animated character GLB into its model and per-category animation
+libraries, no Blender needed.
+
+The model keeps its meshes, skins and materials and loses its animations.
+Every library keeps the node hierarchy and skins, so Godot builds the same
+Skeleton3D and the track paths match the model, but only its category's
+animations: no meshes, materials or images. <model>_animations.json lists
+{category: {file, clips}} for judai_skin.gd, which loads a library when one
+of its clips is first played. Inside a Godot project the libraries are set
+to import as AnimationLibrary resources.
+
+Clips go to the default category unless a --library option names them.
+
+Run with:
+    python3 animation_libraries.py ../../addons/judai_char/Judai.glb --library "duel=Duel Win,Duel Lose"
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import GlbError, read_glb
+from glb_writer import GlbDocument
+from godot_import import ensure_params
+
+DEFAULT_LIBRARY = "locomotion"
+# What the library files are imported as, with the model's animation settings
+LIBRARY_IMPORT_PARAMS = {
+    "animation/import": True,
+    "animation/fps": 30,
+    "animation/trimming": False,
+    "animation/remove_immutable_tracks": True,
+}
+
+def add_library_arguments(parser):
+    parser.add_argument("--library", action="append", default=[], metavar="CATEGORY=CLIP,...",
+                        help=f"put clips in an animation library of their own; repeatable "
+                             f"(others go to \"{DEFAULT_LIBRARY}\")")
+
+def parse_libraries(values):
+    """{clip name: category} from --library CATEGORY=CLIP,CLIP options."""
+    categories = {}
+    for value in values:
+        category, separator, clips = value.partition("=")
+        if not separator or not category.strip():
+            raise ValueError(f"--library {value!r}: expected CATEGORY=CLIP[,CLIP...]")
+        for clip in clips.split(","):
+            if clip.strip():
+                categories[clip.strip()] = category.strip()
+    return categories
+
+def library_path(model_path, category):
+    return f"{os.path.splitext(model_path)[0]}_{category}.glb"
+
+def manifest_path(model_path):
+    return os.path.splitext(model_path)[0] + "_animations.json"
+
+def godot_project(path):
+    """The Godot project directory containing path, or None."""
+    directory = os.path.dirname(os.path.abspath(path))
+    while True:
+        if os.path.exists(os.path.join(directory, "project.godot")):
+            return directory
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+
+def _without_model(gltf):
+    """The animation-only part of a glTF: nodes and skins without meshes, materials or images."""
+    for node in gltf.get("nodes", []):
+        node.pop("mesh", None)
+        node.pop("weights", None)
+        # A node may only reference a skin together with a mesh; the skins array
+        # itself stays, so Godot still builds the same Skeleton3D
+        node.pop("skin", None)
+    for key in ("meshes", "materials", "textures", "images", "samplers"):
+        gltf.pop(key, None)
+    # Material and texture extensions have nothing left to apply to
+    for key in ("extensionsUsed", "extensionsRequired"):
+        if key in gltf:
+            gltf[key] = [name for name in gltf[key] if not name.startswith(("KHR_materials_", "KHR_texture_"))]
+    return gltf
+
+def split_animation_libraries(model_path, categories, default=DEFAULT_LIBRARY):
+    """Rewrite model_path without animations next to one library GLB per category; returns the manifest."""
+    gltf, binary = read_glb(model_path)
+    animations = gltf.pop("animations", [])
+    if not animations:
+        raise GlbError(f"{model_path}: no animations to split")
+
+    grouped = {}
+    for i, animation in enumerate(animations):
+        name = animation.get("name", f"animation_{i}")
+        grouped.setdefault(categories.get(name, default), []).append(animation)
+
+    project = godot_project(model_path)
+    manifest = {"model": os.path.basename(model_path), "libraries": {}}
+    for category, members in sorted(grouped.items()):
+        library = GlbDocument.from_glb(_without_model(copy.deepcopy(gltf)), binary)
+        library.gltf["animations"] = members
+        library.compact()
+        path = library_path(model_path, category)
+        library.write(path)
+        if project:
+            ensure_params(path, "animation_library", "AnimationLibrary", LIBRARY_IMPORT_PARAMS)
+        manifest["libraries"][category] = {
+            "file": os.path.basename(path),
+            "clips": [animation.get("name", "") for animation in members],
+        }
+
+    model = GlbDocument.from_glb(gltf, binary)
+    model.compact()
+    model.write(model_path)
+    with open(manifest_path(model_path), "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    return manifest
+
+def print_split(model_path, manifest):
+    print(f"  {os.path.basename(model_path)}: {os.path.getsize(model_path):,} bytes without animations")
+    directory = os.path.dirname(model_path)
+    for category, library in manifest["libraries"].items():
+        size = os.path.getsize(os.path.join(directory, library["file"]))
+        print(f"  {library['file']}: {size:,} bytes, {category}: {', '.join(library['clips'])}")
+    print(f"  manifest: {os.path.basename(manifest_path(model_path))}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Split an animated GLB into its model and animation libraries")
+    parser.add_argument("model", help="animated GLB, rewritten without its animations")
+    add_library_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        categories = parse_libraries(args.library)
+        manifest = split_animation_libraries(args.model, categories)
+    except (GlbError, ValueError) as e:
+        print(f"error: {e}")
+        return 1
+    print_split(args.model, manifest)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Ambient occlusion baked into vertex colors, no Blender needed.
+
+Every vertex casts cosine-weighted rays over the hemisphere around its
+normal against all triangles of the model joined together (plus a ground
+plane under it), so domes shade the towers below them, pillars darken each
+other and steps darken where they meet. A ray counts as blocked when it hits
+anything within --ao-distance; the unblocked fraction is the vertex's
+ambient light. Rays that first hit the back of a face start inside another
+part (corners buried where primitives overlap) and are ignored, so buried
+corners do not darken the visible faces they belong to. The rays are fixed
+per vertex, so the same mesh always bakes to the same colors.
+
+The result goes into COLOR_0 (gray, alpha 1), which Godot imports as the
+vertex COLOR that shaders/toon.gdshader and shaders/cel/cel-shader-base.gdshader
+multiply into the albedo. Meshes without vertex colors read COLOR as white,
+so unbaked models are unaffected. Only the generated models are baked so far;
+the Kenney and nature assets still rely on SSAO, so locations keep it on (at
+a lower intensity where baked models stand, to avoid darkening them twice).
+
+The bake runs in worker processes (--jobs, one per core by default), each
+taking chunks of vertices against a shared copy of the triangles. At 48 rays
+per vertex it still adds 5-15 s per generated model on one core, so the
+generators only bake with --ao; build_assets.py passes it through their
+BUILD_OPTIONS.
+
+Run with:
+    python3 ao_bake.py ../../assets/models/buildings/academy_assembled.glb
+"""
+import argparse
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import (GlbError, accessor_array, add_file_arguments, mesh_instances,
+                        normalized_attributes, read_glb, run_on_files)
+from glb_writer import GlbDocument, gray_colors
+from occlusion import world_triangles
+
+DEFAULT_SAMPLES = 48
+# Contact shadows only: geometry farther away than this does not darken (meters)
+DEFAULT_DISTANCE = 3.0
+# Rays start this far above the surface so they never hit their own face
+SURFACE_OFFSET = 1e-3
+# Vertices per task handed to a worker
+CHUNK_SIZE = 512
+GOLDEN_ANGLE = math.pi * (3.0 - math.sqrt(5.0))
+
+def add_ao_arguments(parser):
+    """Ambient occlusion options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--ao", action=argparse.BooleanOptionalAction, default=False,
+                        help="bake ambient occlusion into COLOR_0 vertex colors; slow, "
+                             "on in build_assets.py builds (default: off)")
+    parser.add_argument("--ao-samples", type=int, default=DEFAULT_SAMPLES,
+                        help="rays per vertex (default: %(default)s)")
+    parser.add_argument("--ao-distance", type=float, default=DEFAULT_DISTANCE,
+                        help="farthest occluder that darkens a vertex, in meters (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="worker processes for the bake, 0 for one per core (default: %(default)s)")
+
+def hemisphere_directions(samples):
+    """Cosine-weighted directions around +Z on a Fibonacci spiral."""
+    u = (np.arange(samples) + 0.5) / samples
+    radius = np.sqrt(u)
+    phi = np.arange(samples) * GOLDEN_ANGLE
+    return np.stack([radius * np.cos(phi), radius * np.sin(phi), np.sqrt(1.0 - u)], axis=1)
+
+def ground_quad(corners, up_axis, margin):
+    """Two triangles facing up under (faces, 3, 3) corners, margin wider on every side."""
+    points = np.asarray(corners).reshape(-1, 3)
+    low, high = points.min(axis=0) - margin, points.max(axis=0) + margin
+    a, b = [axis for axis in range(3) if axis != up_axis]
+    quad = np.zeros((4, 3))
+    quad[:, up_axis] = points[:, up_axis].min()
+    quad[:, a] = (low[a], high[a], high[a], low[a])
+    quad[:, b] = (low[b], low[b], high[b], high[b])
+    if np.cross(quad[1] - quad[0], quad[2] - quad[0])[up_axis] < 0:
+        quad = quad[::-1]
+    return np.stack([quad[[0, 1, 2]], quad[[0, 2, 3]]])
+
+def export_color_options():
+    """Blender glTF exporter options that write the baked "AO" color attribute as COLOR_0."""
+    import bpy
+
+    if bpy.app.version >= (4, 2, 0):
+        return {"export_vertex_color": "ACTIVE"}
+    return {"export_colors": True}
+
+# Triangles, their bounds, ray directions and distance of the running bake
+_scene = None
+
+def _init_worker(scene):
+    global _scene
+    _scene = scene
+
+def _occlusion(task):
+    """Unblocked fraction of the rays of one chunk of (start, points, normals)."""
+    start, points, normals = task
+    v0, e1, e2, low, high, directions, distance = _scene
+    result = np.ones(len(points))
+    for k, (point, normal) in enumerate(zip(points, normals)):
+        near = np.all(low <= point + distance, axis=1) & np.all(high >= point - distance, axis=1)
+        if not near.any():
+            continue
+        # Tangent frame, turned a little further for every vertex to break up banding
+        helper = (1.0, 0.0, 0.0) if abs(normal[0]) < 0.9 else (0.0, 1.0, 0.0)
+        tangent = np.cross(normal, helper)
+        tangent /= np.linalg.norm(tangent)
+        bitangent = np.cross(normal, tangent)
+        angle = (start + k) * GOLDEN_ANGLE
+        tangent, bitangent = (math.cos(angle) * tangent + math.sin(angle) * bitangent,
+                              math.cos(angle) * bitangent - math.sin(angle) * tangent)
+        rays = np.outer(directions[:, 0], tangent) + np.outer(directions[:, 1], bitangent) \
+            + np.outer(directions[:, 2], normal)
+        origin = point + normal * SURFACE_OFFSET
+
+        # Moller-Trumbore, every ray against every nearby triangle
+        a0, a1, a2 = v0[near], e1[near], e2[near]
+        pvec = np.cross(rays[:, None, :], a2[None, :, :])
+        det = np.einsum("rtc,tc->rt", pvec, a1)
+        valid = np.abs(det) > 1e-12
+        inverse = np.where(valid, 1.0 / np.where(valid, det, 1.0), 0.0)
+        tvec = origin - a0
+        u = np.einsum("rtc,tc->rt", pvec, tvec) * inverse
+        qvec = np.cross(tvec, a1)
+        v = (rays @ qvec.T) * inverse
+        t = np.einsum("tc,tc->t", a2, qvec)[None, :] * inverse
+        hits = valid & (u >= 0) & (v >= 0) & (u + v <= 1) & (t > 0) & (t < distance)
+        # det > 0 is the outside of a face. A ray that first hits the inside of
+        # one starts within another part (a corner buried in a wall) and is left out.
+        blocked = hits.any(axis=1)
+        nearest = np.where(hits, t, np.inf).argmin(axis=1)
+        inside = blocked & (det[np.arange(len(rays)), nearest] < 0)
+        counted = len(rays) - inside.sum()
+        if counted:
+            result[k] = 1.0 - (blocked & ~inside).sum() / counted
+    return result
+
+def bake_ao(points, normals, corners, samples=DEFAULT_SAMPLES, distance=DEFAULT_DISTANCE, jobs=0):
+    """Ambient light (0 blocked .. 1 open) at points with unit normals, against (faces, 3, 3) corners."""
+    points = np.asarray(points, dtype=np.float64)
+    normals = np.asarray(normals, dtype=np.float64)
+    corners = np.asarray(corners, dtype=np.float64)
+    scene = (corners[:, 0], corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0],
+             corners.min(axis=1), corners.max(axis=1), hemisphere_directions(samples), distance)
+    tasks = [(start, points[start:start + CHUNK_SIZE], normals[start:start + CHUNK_SIZE])
+             for start in range(0, len(points), CHUNK_SIZE)]
+    jobs = min(jobs or os.cpu_count() or 1, len(tasks))
+    if jobs <= 1:
+        _init_worker(scene)
+        chunks = [_occlusion(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(jobs, initializer=_init_worker, initargs=(scene,)) as pool:
+            chunks = list(pool.map(_occlusion, tasks))
+    return np.concatenate(chunks) if chunks else np.zeros(0)
+
+def bake_glb(filepath, output, samples=DEFAULT_SAMPLES, distance=DEFAULT_DISTANCE, jobs=0,
+             ground=True, force=False):
+    """Write filepath with COLOR_0 ambient occlusion to output; returns the number of meshes baked.
+
+    A mesh drawn by several nodes gets the average over its instances.
+    """
+    gltf, binary = read_glb(filepath)
+    corners = world_triangles(gltf, binary)
+    if not len(corners):
+        raise GlbError(f"{filepath}: no triangles to bake")
+    if ground:
+        corners = np.concatenate([corners, ground_quad(corners, 1, distance)])
+
+    # Every vertex of every instance is baked in one pass, so one pool serves the file
+    points, normals, slots = [], [], []
+    for _node, mesh_index, world in mesh_instances(gltf, binary):
+        primitives = gltf["meshes"][mesh_index]["primitives"]
+        if any(p.get("mode", 4) != 4 or "NORMAL" not in p["attributes"] for p in primitives):
+            continue
+        if not force and any("COLOR_0" in p["attributes"] for p in primitives):
+            continue
+        normal_matrix = np.linalg.inv(world[:3, :3]).T
+        for p, primitive in enumerate(primitives):
+            local = accessor_array(gltf, binary, primitive["attributes"]["POSITION"]).astype(np.float64)
+            local_normals = accessor_array(gltf, binary, primitive["attributes"]["NORMAL"]).astype(np.float64)
+            world_normals = local_normals @ normal_matrix.T
+            lengths = np.linalg.norm(world_normals, axis=1, keepdims=True)
+            points.append(local @ world[:3, :3].T + world[:3, 3])
+            normals.append(world_normals / np.maximum(lengths, 1e-12))
+            slots.append((mesh_index, p))
+    if not points:
+        return 0
+    ao = bake_ao(np.vstack(points), np.vstack(normals), corners, samples, distance, jobs)
+
+    sums = {}
+    start = 0
+    for slot, block in zip(slots, points):
+        values = ao[start:start + len(block)]
+        start += len(block)
+        total, count = sums.get(slot, (0.0, 0))
+        sums[slot] = (total + values, count + 1)
+
+    document = GlbDocument.from_glb(gltf, binary)
+    baked = sorted({mesh_index for mesh_index, _p in sums})
+    for mesh_index in baked:
+        mesh = gltf["meshes"][mesh_index]
+        new_primitives = []
+        for p, primitive in enumerate(mesh["primitives"]):
+            attributes = {semantic: accessor_array(gltf, binary, index)
+                          for semantic, index in primitive["attributes"].items()}
+            total, count = sums[mesh_index, p]
+            attributes["COLOR_0"] = gray_colors(total / count)
+            if "indices" in primitive:
+                indices = accessor_array(gltf, binary, primitive["indices"])
+            else:
+                indices = np.arange(len(attributes["POSITION"]))
+            new_primitives.append({"attributes": attributes, "indices": indices,
+                                   "material": primitive.get("material"),
+                                   "normalized": normalized_attributes(gltf, primitive) | {"COLOR_0"}})
+        document.add_mesh(mesh.get("name", "Mesh"), new_primitives, blender_axes=False, index=mesh_index)
+        for key in ("extras", "weights"):
+            if key in mesh:
+                document.gltf["meshes"][mesh_index][key] = mesh[key]
+    document.compact()
+    document.write(output)
+    return len(baked)
+
+def bake_exported(filepath, samples=DEFAULT_SAMPLES, distance=DEFAULT_DISTANCE, jobs=0):
+    """Bake a freshly exported GLB in place."""
+    count = bake_glb(filepath, filepath, samples, distance, jobs, force=True)
+    print(f"  vertex AO: {count} mesh(es) baked ({samples} rays, {distance} m)")
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bake ambient occlusion into GLB vertex colors")
+    add_file_arguments(parser)
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES,
+                        help="rays per vertex (default: %(default)s)")
+    parser.add_argument("--distance", type=float, default=DEFAULT_DISTANCE,
+                        help="farthest occluder that darkens a vertex, in meters (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="worker processes, 0 for one per core (default: %(default)s)")
+    parser.add_argument("--no-ground", action="store_true", help="do not add a ground plane under the model")
+    parser.add_argument("--force", action="store_true", help="replace existing COLOR_0 channels")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        count = bake_glb(filepath, output, args.samples, args.distance, args.jobs,
+                         not args.no_ground, args.force)
+        print(f"{os.path.basename(filepath)}: {count} mesh(es) baked")
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,25 @@ Run with: blender --background --python assemble_academy.py
 import bpy
 import math
 import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ao_bake import add_ao_arguments, bake_exported
+from build_hlod import add_hlod_arguments, build_hlod
+from compression import compress_exported
+from generate_lods import use_lod_import
+from lightmap_uv import unwrap_exported
+from materials import DEFAULT_TOLERANCE, MaterialRegistry, merge_duplicate_blender_materials, print_surface_report
+from mesh_builder import MeshBuilder
+from occlusion import add_occluder_arguments, write_occluder
+from outline_normals import outline_exported
+from palette import palettize, write_palette_png
+from pipeline import PROJECT_DIR, parse_args
+
+OUTPUT = "assets/models/buildings/academy_assembled.glb"
+INPUTS = ["assets/models/buildings/kenney/*.glb"]
+SIDECARS = ["_occluder.tres", "_palette.png"]
+BUILD_OPTIONS = ["--ao"]
 
 def clear_scene():
     """Remove all objects from scene"""
@@ -16,57 +35,72 @@ def import_glb(filepath, name_prefix=""):
     before = set(bpy.data.objects)
     bpy.ops.import_scene.gltf(filepath=filepath)
     after = set(bpy.data.objects)
-    imported = list(after - before)
-    for i, obj in enumerate(imported):
+    # Sort so object order (and the exported GLB) is deterministic
+    imported = sorted(after - before, key=lambda obj: obj.name)
+    for obj in imported:
         obj.name = f"{name_prefix}_{obj.name}" if name_prefix else obj.name
     return imported
 
-def create_material(name, color, metallic=0.0, roughness=0.5):
-    """Create a simple material"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    bsdf = mat.node_tree.nodes["Principled BSDF"]
-    bsdf.inputs["Base Color"].default_value = (*color, 1.0)
-    bsdf.inputs["Metallic"].default_value = metallic
-    bsdf.inputs["Roughness"].default_value = roughness
-    return mat
-
-def create_dome(radius, location, color):
+class PieceLibrary:
+    """Imports each Kenney GLB once and places further copies as linked duplicates.
+
+    Copies share the mesh datablock of the first import, so the exported file
+    stores every unique piece once. All placements of a piece are parented to
+    one Empty, which lets the glTF exporter write them as EXT_mesh_gpu_instancing
+    instances of a single mesh.
+    """
+
+    def __init__(self):
+        # filepath -> (instance parent Empty, objects of the first import, their prefix)
+        self.sources = {}
+
+    def place(self, filepath, name_prefix, location, scale):
+        """Place a piece and return its objects; the transform goes on its root objects."""
+        if filepath not in self.sources:
+            piece = os.path.splitext(os.path.basename(filepath))[0]
+            parent = bpy.data.objects.new(f"{piece}_instances", None)
+            bpy.context.collection.objects.link(parent)
+            objects = import_glb(filepath, name_prefix)
+            for obj in objects:
+                if obj.parent is None:
+                    obj.parent = parent
+            self.sources[filepath] = (parent, objects, name_prefix)
+        else:
+            parent, originals, first_prefix = self.sources[filepath]
+            copies = {}
+            for original in originals:
+                copy = original.copy()  # Linked duplicate: shares original.data
+                copy.name = f"{name_prefix}_{original.name[len(first_prefix) + 1:]}"
+                bpy.context.collection.objects.link(copy)
+                copies[original] = copy
+            for original, copy in copies.items():
+                copy.parent = copies.get(original.parent, parent)
+            objects = list(copies.values())
+
+        for obj in objects:
+            if obj.parent is parent:
+                obj.location = location
+                obj.scale = scale
+        return objects
+
+    def report(self):
+        for filepath, (parent, _objects, _prefix) in self.sources.items():
+            print(f"  {os.path.basename(filepath)}: {len(parent.children)} placement(s) of one mesh")
+
+def create_dome(builder, materials, radius, location, color, name="Dome"):
     """Create a colored dome - location is (X, Y_forward, Z_up) in Blender coords"""
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        radius=radius,
-        segments=24,
-        ring_count=12,
-        location=location
-    )
-    dome = bpy.context.active_object
-    dome.scale.z = 0.6
-    bpy.ops.object.transform_apply(scale=True)
-
-    # Cut bottom half
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    import bmesh
-    bm = bmesh.from_edit_mesh(dome.data)
-    for v in bm.verts:
-        if v.co.z < 0:
-            v.select = True
-    bmesh.update_edit_mesh(dome.data)
-    bpy.ops.mesh.delete(type='VERT')
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    mat = create_material(f"Dome_{color[0]}", color, metallic=0.2, roughness=0.4)
-    dome.data.materials.append(mat)
-    return dome
-
-def assemble_academy():
+    mat = materials.get(f"Dome_{color[0]}", color, metallic=0.2, roughness=0.4)
+    # Upper half of a UV sphere squashed to 0.6 height
+    return builder.add_dome(name, location, radius, mat, height=radius * 0.6, segments=24, rings=6)
+
+def assemble_academy(material_tolerance=DEFAULT_TOLERANCE, palette_png=None):
     """Assemble a grand academy building from modular pieces"""
     clear_scene()
 
-    project_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    kenney_dir = os.path.join(project_dir, "assets", "models", "buildings", "kenney")
+    kenney_dir = os.path.join(PROJECT_DIR, "assets", "models", "buildings", "kenney")
 
     all_objects = []
+    pieces = PieceLibrary()
 
     # Main scale factor - make buildings bigger
     SCALE = 4.0
@@ -79,86 +113,66 @@ def assemble_academy():
 
     if os.path.exists(tower_a_path):
         # Center main tower - tallest
-        center_tower = import_glb(tower_a_path, "center")
-        for obj in center_tower:
-            obj.location = (0, 0, 0)
-            obj.scale = (SCALE * 1.2, SCALE * 1.2, SCALE * 1.5)
-        all_objects.extend(center_tower)
+        all_objects.extend(pieces.place(tower_a_path, "center",
+                                        (0, 0, 0), (SCALE * 1.2, SCALE * 1.2, SCALE * 1.5)))
 
         # Side towers - slightly shorter
-        left_tower = import_glb(tower_a_path, "left")
-        for obj in left_tower:
-            obj.location = (-12 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE, SCALE, SCALE * 1.2)
-        all_objects.extend(left_tower)
-
-        right_tower = import_glb(tower_a_path, "right")
-        for obj in right_tower:
-            obj.location = (12 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE, SCALE, SCALE * 1.2)
-        all_objects.extend(right_tower)
+        all_objects.extend(pieces.place(tower_a_path, "left",
+                                        (-12 * SCALE / 3, 0, 0), (SCALE, SCALE, SCALE * 1.2)))
+
+        all_objects.extend(pieces.place(tower_a_path, "right",
+                                        (12 * SCALE / 3, 0, 0), (SCALE, SCALE, SCALE * 1.2)))
 
     if os.path.exists(tower_b_path):
         # Outer towers
-        far_left = import_glb(tower_b_path, "far_left")
-        for obj in far_left:
-            obj.location = (-20 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE * 0.9, SCALE * 0.9, SCALE)
-        all_objects.extend(far_left)
-
-        far_right = import_glb(tower_b_path, "far_right")
-        for obj in far_right:
-            obj.location = (20 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE * 0.9, SCALE * 0.9, SCALE)
-        all_objects.extend(far_right)
+        all_objects.extend(pieces.place(tower_b_path, "far_left",
+                                        (-20 * SCALE / 3, 0, 0), (SCALE * 0.9, SCALE * 0.9, SCALE)))
+
+        all_objects.extend(pieces.place(tower_b_path, "far_right",
+                                        (20 * SCALE / 3, 0, 0), (SCALE * 0.9, SCALE * 0.9, SCALE)))
 
     if os.path.exists(house_path):
         # Wing buildings - connect the towers
-        left_wing = import_glb(house_path, "wing_left")
-        for obj in left_wing:
-            obj.location = (-6 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE * 0.8, SCALE * 0.8, SCALE * 0.7)
-        all_objects.extend(left_wing)
-
-        right_wing = import_glb(house_path, "wing_right")
-        for obj in right_wing:
-            obj.location = (6 * SCALE / 3, 0, 0)
-            obj.scale = (SCALE * 0.8, SCALE * 0.8, SCALE * 0.7)
-        all_objects.extend(right_wing)
+        all_objects.extend(pieces.place(house_path, "wing_left",
+                                        (-6 * SCALE / 3, 0, 0), (SCALE * 0.8, SCALE * 0.8, SCALE * 0.7)))
+
+        all_objects.extend(pieces.place(house_path, "wing_right",
+                                        (6 * SCALE / 3, 0, 0), (SCALE * 0.8, SCALE * 0.8, SCALE * 0.7)))
+
+    pieces.report()
 
     # Add colored domes on TOP of the towers (Z is up in Blender)
     # Kenney towers are about 4 units tall, scaled by SCALE*1.2 = ~19 units
     tower_top_z = 4 * SCALE * 1.2  # About 19 units
 
+    # Procedural details (domes and steps) are built as one mesh
+    details = MeshBuilder()
+    materials = MaterialRegistry(material_tolerance)
+
     # Ra Yellow dome - on left tower
-    dome_yellow = create_dome(2.5 * SCALE / 3, (-12 * SCALE / 3, 0, tower_top_z * 0.9), (0.95, 0.8, 0.2))
-    dome_yellow.name = "Dome_RaYellow"
-    all_objects.append(dome_yellow)
+    create_dome(details, materials, 2.5 * SCALE / 3, (-12 * SCALE / 3, 0, tower_top_z * 0.9), (0.95, 0.8, 0.2), "Dome_RaYellow")
 
     # Slifer Red dome - on center tower (tallest)
-    dome_red = create_dome(3 * SCALE / 3, (0, 0, tower_top_z * 1.1), (0.85, 0.15, 0.1))
-    dome_red.name = "Dome_SliferRed"
-    all_objects.append(dome_red)
+    create_dome(details, materials, 3 * SCALE / 3, (0, 0, tower_top_z * 1.1), (0.85, 0.15, 0.1), "Dome_SliferRed")
 
     # Obelisk Blue dome - on right tower
-    dome_blue = create_dome(2.5 * SCALE / 3, (12 * SCALE / 3, 0, tower_top_z * 0.9), (0.15, 0.35, 0.75))
-    dome_blue.name = "Dome_ObeliskBlue"
-    all_objects.append(dome_blue)
+    create_dome(details, materials, 2.5 * SCALE / 3, (12 * SCALE / 3, 0, tower_top_z * 0.9), (0.15, 0.35, 0.75), "Dome_ObeliskBlue")
 
     # Create entrance steps (in front, Y is forward in Blender)
-    mat_stone = create_material("Stone", (0.75, 0.73, 0.7), metallic=0.05, roughness=0.85)
+    mat_stone = materials.get("Stone", (0.75, 0.73, 0.7), metallic=0.05, roughness=0.85)
 
     for i in range(4):
-        bpy.ops.mesh.primitive_cube_add(
-            size=1,
-            location=(0, 4 + i * 1.5, 0.3 + i * 0.4)
-        )
-        step = bpy.context.active_object
-        step.name = f"Step_{i}"
-        step.scale = (15 - i * 1.5, 2, 0.5)
-        bpy.ops.object.transform_apply(scale=True)
-        step.data.materials.append(mat_stone)
-        all_objects.append(step)
+        details.add_box(f"Step_{i}", (0, 4 + i * 1.5, 0.3 + i * 0.4), ((15 - i * 1.5) / 2, 1, 0.25), mat_stone)
+
+    materials.report(details)
+    if palette_png:
+        # Kenney pieces keep their own colormap texture; only the details are baked
+        write_palette_png(palettize(details, "Academy_Palette"), palette_png)
+    all_objects.append(details.to_blender("Academy_Details"))
+
+    # Every imported Kenney piece brings its own copy of the shared colormap material
+    merged = merge_duplicate_blender_materials(all_objects)
+    print(f"  merged {merged} duplicate imported material slot(s)")
 
     return all_objects
 
@@ -168,15 +182,41 @@ def export_gltf(filepath):
         filepath=filepath,
         export_format='GLB',
         export_materials='EXPORT',
+        # Placements of one piece share a mesh under one Empty (see PieceLibrary)
+        export_gpu_instances=True,
         use_selection=False
     )
 
+def configure(parser):
+    add_hlod_arguments(parser)
+    add_occluder_arguments(parser)
+    add_ao_arguments(parser)
+
 if __name__ == "__main__":
-    objects = assemble_academy()
+    args = parse_args(OUTPUT, description="Assemble the academy from Kenney pieces",
+                      configure=configure)
+    output_path = args.output
 
-    output_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    output_path = os.path.join(output_dir, "assets", "models", "buildings", "academy_assembled.glb")
+    assemble_academy(args.material_tolerance, args.palette)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
     export_gltf(output_path)
     print(f"Exported to: {output_path}")
+    print_surface_report(output_path)
+    if args.lightmap_texel_size:
+        # The imported Kenney pieces bring no UV2; unwrap the exported file
+        unwrap_exported(output_path, args.lightmap_texel_size)
+    if args.ao:
+        # Joined Kenney pieces and details; before HLOD, whose proxies would darken them
+        bake_exported(output_path, args.ao_samples, args.ao_distance, args.jobs)
+    if args.outline_normals:
+        outline_exported(output_path)
+    if args.occluder:
+        # Before HLOD, so the proxies do not count as solid
+        write_occluder(output_path)
+
+    if args.hlod:
+        summary = build_hlod(output_path, output_path, args.hlod_distance, args.hlod_cluster_size,
+                             material_tolerance=args.material_tolerance)
+        use_lod_import(output_path)
+        print(f"  HLOD: {summary['pieces']} piece(s) -> {summary['clusters']} proxy draw call(s)")
+    compress_exported(output_path, args.compression)
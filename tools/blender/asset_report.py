@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+Per-file cost breakdown of the project's glTF assets, no Blender needed.
+
+Only the JSON of every file is parsed. GLB binary chunks and external .bin
+and image files are memory-mapped, and only the few header bytes that hold
+an image's resolution are read from them; all other sizes come from the
+accessor and buffer view declarations. Files are analyzed in a process pool,
+so the whole assets/ tree takes seconds.
+
+For every file the report lists triangles, vertices, draw calls, meshes and
+primitives, materials, vertex attribute and index bytes, textures (encoded
+bytes, largest resolution and an estimate of their uncompressed GPU size with
+mipmaps), bones, and animation bytes; the JSON also lists every image with
+its resolution. Scanned by default are assets/ and addons/ (the character
+models). Triangles and draw calls count what one instance of the default
+scene draws, EXT_mesh_gpu_instancing copies included. A file's texture
+columns count every image it uses; the totals count an external image once,
+however many files share it (the nature atlas is used by most of the
+nature/glTF models).
+
+Run with:
+    python3 asset_report.py                      # everything under assets/ and addons/
+    python3 asset_report.py ../../assets/models/characters --sort triangles --top 20
+    python3 asset_report.py --json report.json
+"""
+import argparse
+import base64
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from glb_reader import (ACCESSOR_COMPONENTS, CHUNK_BIN, CHUNK_JSON, COMPONENT_DTYPES, GLB_MAGIC, GlbError,
+                        is_collision_only)
+from pipeline import PROJECT_DIR, project_path
+
+EXTENSIONS = (".glb", ".gltf")
+# Triangles per index for the primitive modes that draw any
+TRIANGLE_MODES = {4: "list", 5: "strip", 6: "fan"}
+# Uncompressed RGBA8 plus a full mip chain
+GPU_BYTES_PER_TEXEL = 4 * 4 / 3
+# Columns of the table: (key, heading, format)
+COLUMNS = [
+    ("triangles", "tris", "count"),
+    ("vertices", "verts", "count"),
+    ("draw_calls", "draws", "count"),
+    ("materials", "mats", "count"),
+    ("vertex_bytes", "vertex", "bytes"),
+    ("index_bytes", "index", "bytes"),
+    ("textures", "tex", "count"),
+    ("max_texture", "max res", "text"),
+    ("texture_gpu_bytes", "tex gpu", "bytes"),
+    ("bones", "bones", "count"),
+    ("animation_bytes", "anim", "bytes"),
+    ("file_bytes", "file", "bytes"),
+]
+SORT_KEYS = [key for key, _heading, kind in COLUMNS if kind != "text"]
+
+class _Source:
+    """Random access to the bytes of a buffer or image: a memory-mapped file range or decoded bytes."""
+
+    def __init__(self, data=b"", mapped=None, offset=0, length=None):
+        self.data = data
+        self.mapped = mapped
+        self.offset = offset
+        self.length = len(data) if mapped is None else length
+
+    def read(self, start, size):
+        start = max(start, 0)
+        size = max(min(size, self.length - start), 0)
+        if self.mapped is None:
+            return bytes(self.data[start:start + size])
+        return self.mapped[self.offset + start:self.offset + start + size]
+
+    def slice(self, start, length):
+        """A source over part of this one (a buffer view)."""
+        if self.mapped is None:
+            return _Source(self.data[start:start + length])
+        return _Source(mapped=self.mapped, offset=self.offset + start, length=length)
+
+def _map_file(path, mappings):
+    """A _Source over a whole file, memory-mapped (mappings keeps them open until the file is done)."""
+    size = os.path.getsize(path)
+    if not size:
+        return _Source()
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    mappings.append(mapped)
+    return _Source(mapped=mapped, length=size)
+
+def _uri_source(uri, directory, mappings):
+    """(source, encoded size) of a data: URI or a file next to a .gltf."""
+    if uri.startswith("data:"):
+        data = base64.b64decode(uri.split(",", 1)[1])
+        return _Source(data), len(data)
+    from urllib.parse import unquote
+    path = os.path.join(directory, unquote(uri))
+    if not os.path.isfile(path):
+        return None, 0
+    return _map_file(path, mappings), os.path.getsize(path)
+
+def image_size(source):
+    """(width, height) from a PNG, JPEG, WebP or KTX2 header, or None for other formats."""
+    head = source.read(0, 32)
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    if head[:12] == b"\xabKTX 20\xbb\r\n\x1a\n":
+        return struct.unpack("<II", head[20:28])
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        kind = head[12:16]
+        if kind == b"VP8X":
+            low = head[24:30]
+            return (int.from_bytes(low[:3], "little") + 1, int.from_bytes(low[3:], "little") + 1)
+        if kind == b"VP8L":
+            bits = int.from_bytes(source.read(21, 4), "little")
+            return ((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if kind == b"VP8 ":
+            width, height = struct.unpack("<HH", source.read(26, 4))
+            return width & 0x3FFF, height & 0x3FFF
+        return None
+    if head[:2] == b"\xff\xd8":
+        # Walk the JPEG segments up to the first start-of-frame
+        position = 2
+        while position + 9 <= source.length:
+            marker, length = struct.unpack(">HH", source.read(position, 4))
+            if marker >> 8 != 0xFF:
+                return None
+            if 0xFFC0 <= marker <= 0xFFCF and marker not in (0xFFC4, 0xFFC8, 0xFFCC):
+                height, width = struct.unpack(">HH", source.read(position + 5, 4))
+                return width, height
+            position += 2 + length
+    return None
+
+def image_file_size(path):
+    """(width, height) of an image file, or None when it is missing or of an unknown format."""
+    if not os.path.isfile(path):
+        return None
+    mappings = []
+    try:
+        return image_size(_map_file(path, mappings))
+    finally:
+        for mapped in mappings:
+            mapped.close()
+
+def _accessor_bytes(accessor):
+    components = ACCESSOR_COMPONENTS[accessor["type"]]
+    return accessor["count"] * components * COMPONENT_DTYPES[accessor["componentType"]]().itemsize
+
+def drawn_nodes(gltf):
+    """(node, copies) for every mesh node the default scene draws."""
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes", [])
+    if scenes:
+        roots = scenes[gltf.get("scene", 0)].get("nodes", [])
+    else:
+        children = {child for node in nodes for child in node.get("children", [])}
+        roots = [i for i in range(len(nodes)) if i not in children]
+    drawn = []
+    stack = list(reversed(roots))
+    while stack:
+        node = nodes[stack.pop()]
+        if "mesh" in node and not is_collision_only(node):
+            gpu = node.get("extensions", {}).get("EXT_mesh_gpu_instancing", {}).get("attributes", {})
+            copies = gltf["accessors"][next(iter(gpu.values()))]["count"] if gpu else 1
+            drawn.append((node, copies))
+        stack.extend(reversed(node.get("children", [])))
+    return drawn
+
+def mesh_triangles(gltf, mesh):
+    """Triangles one instance of a glTF mesh draws."""
+    accessors = gltf.get("accessors", [])
+    triangles = 0
+    for primitive in mesh["primitives"]:
+        mode = primitive.get("mode", 4)
+        if mode not in TRIANGLE_MODES:
+            continue
+        if "indices" in primitive:
+            count = accessors[primitive["indices"]]["count"]
+        else:
+            count = accessors[primitive["attributes"]["POSITION"]]["count"]
+        triangles += count // 3 if mode == 4 else max(count - 2, 0)
+    return triangles
+
+def read_asset(path, mappings):
+    """(glTF JSON, buffer sources, directory) of a .glb or .gltf file."""
+    directory = os.path.dirname(path)
+    if path.lower().endswith(".gltf"):
+        with open(path, "rb") as f:
+            gltf = json.load(f)
+        buffers = [_uri_source(buffer["uri"], directory, mappings)[0] if "uri" in buffer else None
+                   for buffer in gltf.get("buffers", [])]
+        return gltf, buffers, directory
+
+    source = _map_file(path, mappings)
+    if source.length < 20:
+        raise GlbError(f"{path}: truncated GLB header")
+    magic, version, _length = struct.unpack("<III", source.read(0, 12))
+    if magic != GLB_MAGIC or version != 2:
+        raise GlbError(f"{path}: not a glTF 2.0 binary file")
+    gltf, binary = None, None
+    offset = 12
+    while offset + 8 <= source.length:
+        chunk_length, chunk_type = struct.unpack("<II", source.read(offset, 8))
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(source.read(offset + 8, chunk_length))
+        elif chunk_type == CHUNK_BIN:
+            binary = _Source(mapped=source.mapped, offset=offset + 8, length=chunk_length)
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise GlbError(f"{path}: missing JSON chunk")
+    buffers = []
+    for i, buffer in enumerate(gltf.get("buffers", [])):
+        if "uri" in buffer:
+            buffers.append(_uri_source(buffer["uri"], directory, mappings)[0])
+        else:
+            buffers.append(binary if i == 0 else None)
+    return gltf, buffers, directory
+
+def analyze(path):
+    """Cost breakdown of one glTF file as a dict (with "error" set when it cannot be read)."""
+    row = {"file": path, "file_bytes": os.path.getsize(path)}
+    mappings = []
+    try:
+        gltf, buffers, directory = read_asset(path, mappings)
+        accessors = gltf.get("accessors", [])
+        meshes = gltf.get("meshes", [])
+
+        # Accessors shared by several primitives are stored (and uploaded) once
+        vertex_accessors, index_accessors, vertices = set(), set(), 0
+        for mesh in meshes:
+            for primitive in mesh["primitives"]:
+                attributes = list(primitive["attributes"].values())
+                attributes += [index for target in primitive.get("targets", []) for index in target.values()]
+                if primitive["attributes"].get("POSITION") not in vertex_accessors:
+                    vertices += accessors[primitive["attributes"]["POSITION"]]["count"]
+                vertex_accessors.update(attributes)
+                if "indices" in primitive:
+                    index_accessors.add(primitive["indices"])
+
+        drawn = drawn_nodes(gltf)
+        triangles = {i: mesh_triangles(gltf, mesh) for i, mesh in enumerate(meshes)}
+        row.update({
+            "meshes": len(meshes),
+            "primitives": sum(len(mesh["primitives"]) for mesh in meshes),
+            "triangles": sum(triangles[node["mesh"]] * copies for node, copies in drawn),
+            "vertices": vertices,
+            "draw_calls": sum(len(meshes[node["mesh"]]["primitives"]) for node, _copies in drawn),
+            "materials": len(gltf.get("materials", [])),
+            "vertex_bytes": sum(_accessor_bytes(accessors[i]) for i in vertex_accessors),
+            "index_bytes": sum(_accessor_bytes(accessors[i]) for i in index_accessors),
+        })
+
+        sizes, texture_bytes, gpu_bytes, images = [], 0, 0, []
+        for image in gltf.get("images", []):
+            uri = image.get("uri", "")
+            if "bufferView" in image:
+                view = gltf["bufferViews"][image["bufferView"]]
+                encoded = view["byteLength"]
+                buffer = buffers[view["buffer"]]
+                source = buffer.slice(view.get("byteOffset", 0), encoded) if buffer is not None else None
+            else:
+                source, encoded = _uri_source(uri, directory, mappings)
+            texture_bytes += encoded
+            size = image_size(source) if source is not None else None
+            if size:
+                sizes.append(size)
+                gpu_bytes += int(size[0] * size[1] * GPU_BYTES_PER_TEXEL)
+            # External images are named by their URI, embedded ones by None
+            images.append({"name": image.get("name", ""),
+                           "uri": None if "bufferView" in image or uri.startswith("data:") else uri,
+                           "found": source is not None, "bytes": encoded,
+                           "width": size[0] if size else 0, "height": size[1] if size else 0})
+        largest = max(sizes, key=lambda size: size[0] * size[1], default=None)
+
+        skins = gltf.get("skins", [])
+        animation_accessors = {index for animation in gltf.get("animations", [])
+                               for sampler in animation["samplers"]
+                               for index in (sampler["input"], sampler["output"])}
+        row.update({
+            "textures": len(gltf.get("images", [])),
+            "texture_bytes": texture_bytes,
+            "max_texture": f"{largest[0]}x{largest[1]}" if largest else "",
+            "texture_gpu_bytes": gpu_bytes,
+            "images": images,
+            "skins": len(skins),
+            "bones": len({joint for skin in skins for joint in skin["joints"]}),
+            "animations": len(gltf.get("animations", [])),
+            "animation_bytes": sum(_accessor_bytes(accessors[i]) for i in animation_accessors),
+        })
+    except (GlbError, OSError, ValueError, KeyError, IndexError, struct.error) as e:
+        row["error"] = str(e) or type(e).__name__
+    finally:
+        for mapped in mappings:
+            mapped.close()
+    return row
+
+def find_assets(paths):
+    """Every .glb/.gltf file under the given files and directories, sorted."""
+    found = set()
+    for path in paths:
+        if os.path.isfile(path):
+            found.add(os.path.abspath(path))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            found.update(os.path.abspath(os.path.join(root, name)) for name in files
+                         if name.lower().endswith(EXTENSIONS))
+    return sorted(found)
+
+def analyze_all(paths, jobs=0):
+    """Rows of analyze() for every file, in order; jobs 0 means one worker per core."""
+    jobs = min(jobs or os.cpu_count() or 1, len(paths))
+    if jobs <= 1:
+        return [analyze(path) for path in paths]
+    with ProcessPoolExecutor(jobs) as pool:
+        return list(pool.map(analyze, paths, chunksize=max(len(paths) // (jobs * 4), 1)))
+
+def image_key(row, image, index):
+    """What identifies an image across files: its resolved path, or its place in one file when embedded."""
+    if image["uri"] is None:
+        return (row["file"], index)
+    from urllib.parse import unquote
+    return os.path.normpath(os.path.join(os.path.dirname(row["file"]), unquote(image["uri"])))
+
+def totals(rows):
+    """Sums of the numeric columns over the rows without errors, each shared image counted once."""
+    rows = [row for row in rows if "error" not in row]
+    keys = sorted({key for row in rows for key, value in row.items() if isinstance(value, int)})
+    total = {key: sum(row.get(key, 0) for row in rows) for key in keys}
+
+    unique = {}
+    for row in rows:
+        for i, image in enumerate(row.get("images", [])):
+            unique.setdefault(image_key(row, image, i), image)
+    total["texture_bytes"] = sum(image["bytes"] for image in unique.values())
+    total["texture_gpu_bytes"] = sum(int(image["width"] * image["height"] * GPU_BYTES_PER_TEXEL)
+                                     for image in unique.values())
+    total["unique_images"] = len(unique)
+    return total
+
+def _format(value, kind):
+    if kind == "text":
+        return str(value)
+    if kind == "count":
+        return f"{value:,}"
+    for unit in ("B", "KB", "MB"):
+        if value < 1024 or unit == "MB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+
+def print_table(rows, total):
+    """Print rows as an aligned table with a totals line (totals() of every analyzed file)."""
+    names = [row["file"] for row in rows]
+    width = max([len(name) for name in names] + [5])
+    cells = [[_format(row.get(key, ""), kind) if "error" not in row else "" for key, _h, kind in COLUMNS]
+             for row in rows]
+    total_cells = [_format(total.get(key, 0), kind) if kind != "text" else "" for key, _h, kind in COLUMNS]
+    widths = [max(len(heading), *(len(c[i]) for c in cells + [total_cells]))
+              for i, (_key, heading, _kind) in enumerate(COLUMNS)]
+
+    print(f"{'asset':<{width}}  " + "  ".join(f"{h:>{w}}" for (_k, h, _f), w in zip(COLUMNS, widths)))
+    for name, row, line in zip(names, rows, cells):
+        if "error" in row:
+            print(f"{name:<{width}}  error: {row['error']}")
+        else:
+            print(f"{name:<{width}}  " + "  ".join(f"{c:>{w}}" for c, w in zip(line, widths)))
+    print(f"{'total':<{width}}  " + "  ".join(f"{c:>{w}}" for c, w in zip(total_cells, widths)))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report what every glTF asset costs")
+    parser.add_argument("paths", nargs="*", default=[project_path("assets"), project_path("addons")],
+                        help="files or directories to scan (default: the project's assets/ and addons/)")
+    parser.add_argument("--sort", choices=SORT_KEYS, default="file_bytes",
+                        help="column to sort by, largest first (default: %(default)s)")
+    parser.add_argument("--top", type=int, default=0, help="only show the N most expensive assets")
+    parser.add_argument("--json", metavar="FILE", help="also write the full report as JSON ('-' for stdout only)")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="worker processes (default: 0, one per CPU core)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    paths = find_assets(args.paths)
+    rows = analyze_all(paths, args.jobs)
+    elapsed = time.perf_counter() - start
+    for row in rows:
+        row["file"] = os.path.relpath(row["file"], PROJECT_DIR).replace(os.sep, "/")
+    rows.sort(key=lambda row: ("error" not in row, row.get(args.sort, 0)), reverse=True)
+    shown = rows[:args.top] if args.top else rows
+
+    # --top only shortens the table; the totals always cover every file
+    total = totals(rows)
+    report = {"files": len(rows), "seconds": round(elapsed, 3), "totals": total, "assets": rows}
+    if args.json == "-":
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print_table(shown, total)
+        print(f"{len(rows)} file(s) analyzed in {elapsed:.2f} s, {total['unique_images']} unique image(s)")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+    return 1 if any("error" in row for row in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
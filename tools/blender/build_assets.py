@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+Build every generated asset in tools/blender in one go.
+
+Generator scripts declare a module-level OUTPUT (project-relative GLB path)
+and optionally INPUTS (glob patterns of files they read) and SIDECARS (glob
+patterns appended to OUTPUT without its extension, for the files written next
+to it, e.g. "_occluder.tres" or "_chunks/*"). BUILD_OPTIONS lists generator
+options for bakes too slow to run by default (e.g. "--ao"), which full builds
+pass and --fast leaves out. Independent targets
+run concurrently, one headless Blender process per worker with the pool sized
+to the CPU count, so a full rebuild takes as long as the slowest target.
+Scripts declaring BLENDER_REQUIRED = False run with this Python instead, so
+they build on machines without Blender.
+.blend files passed with --blend are converted through export_school.export_to_glb.
+Outputs and their sidecars are cached by content hash (see build_cache.py),
+so targets whose inputs did not change are not rebuilt and their files are
+left untouched.
+
+Run with: python3 tools/blender/build_assets.py [target ...] [--blend FILE_OR_DIR ...]
+"""
+import argparse
+import ast
+import glob
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from build_cache import BuildCache, expand_sidecars, file_stamps
+from compression import DEFAULT_PROFILE, PROFILES
+from pipeline import PROJECT_DIR, project_path
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BLEND_EXPORTER = os.path.join(SCRIPT_DIR, "export_school.py")
+DECLARATIONS = ("OUTPUT", "INPUTS", "SIDECARS", "BUILD_OPTIONS", "BLENDER_REQUIRED")
+LOG_TAIL_LINES = 40
+
+class Target:
+    """One generator run (or .blend conversion) producing a GLB and its sidecar files."""
+
+    def __init__(self, name, script, output, inputs=(), blend_file=None, blender_required=True,
+                 sidecars=(), build_options=()):
+        self.name = name
+        self.script = script
+        self.output = output
+        self.inputs = list(inputs)
+        self.sidecars = list(sidecars)
+        # Declared slow-bake options, added to options unless --fast
+        self.build_options = list(build_options)
+        self.blend_file = blend_file
+        self.blender_required = blender_required
+        # Generator options passed after --output (e.g. --compression)
+        self.options = []
+        # Content fingerprint, set when the build cache is enabled
+        self.key = None
+
+    def command(self, blender, output):
+        if not self.blender_required:
+            return [sys.executable, self.script, "--output", output] + self.options
+        cmd = [blender]
+        if self.blend_file:
+            cmd.append(self.blend_file)
+        cmd += ["--background", "--factory-startup", "--python-exit-code", "1",
+                "--python", self.script, "--", "--output", output] + self.options
+        return cmd
+
+def read_declarations(script_path):
+    """Read the literal OUTPUT/INPUTS/SIDECARS/BUILD_OPTIONS assignments of a script without importing it."""
+    with open(script_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=script_path)
+
+    found = {}
+    for node in tree.body:
+        if not isinstance(node, ast.Assign):
+            continue
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id in DECLARATIONS:
+                found[target.id] = ast.literal_eval(node.value)
+    return found
+
+def discover_targets(script_dir=SCRIPT_DIR):
+    """Every script in `script_dir` that declares an OUTPUT is a build target."""
+    targets = []
+    for script in sorted(glob.glob(os.path.join(script_dir, "*.py"))):
+        declared = read_declarations(script)
+        if "OUTPUT" not in declared:
+            continue
+        name = os.path.splitext(os.path.basename(script))[0]
+        targets.append(Target(name, script, project_path(declared["OUTPUT"]),
+                              declared.get("INPUTS", ()),
+                              blender_required=declared.get("BLENDER_REQUIRED", True),
+                              sidecars=declared.get("SIDECARS", ()),
+                              build_options=declared.get("BUILD_OPTIONS", ())))
+    return targets
+
+def blend_targets(paths, output_dir):
+    """Conversion targets for .blend files (directories are searched recursively)."""
+    blend_files = []
+    for path in paths:
+        if os.path.isdir(path):
+            blend_files += sorted(glob.glob(os.path.join(path, "**", "*.blend"), recursive=True))
+        else:
+            blend_files.append(path)
+
+    targets = []
+    for blend_file in blend_files:
+        stem = os.path.splitext(os.path.basename(blend_file))[0]
+        output = os.path.join(output_dir, stem + ".glb")
+        targets.append(Target(f"blend:{stem}", BLEND_EXPORTER, output,
+                              blend_file=os.path.abspath(blend_file)))
+    return targets
+
+def group_by_output(targets):
+    """Chain targets that write the same file so they never race each other."""
+    chains = {}
+    for target in targets:
+        chains.setdefault(os.path.normcase(target.output), []).append(target)
+
+    for chain in chains.values():
+        if len(chain) > 1:
+            names = ", ".join(t.name for t in chain)
+            print(f"WARNING: {names} all write {os.path.relpath(chain[0].output, PROJECT_DIR)}; "
+                  f"running them in order, the last one wins")
+    return list(chains.values())
+
+def find_blender(explicit=None):
+    """Locate the Blender executable (--blender, $BLENDER or PATH)."""
+    blender = explicit or os.environ.get("BLENDER") or shutil.which("blender")
+    if not blender:
+        sys.exit("ERROR: Blender not found; pass --blender or set $BLENDER")
+    return blender
+
+class BuildRunner:
+    """Runs target chains on a worker pool and stops everything on the first failure."""
+
+    def __init__(self, blender, jobs, cache=None, force=False):
+        self.blender = blender
+        self.jobs = jobs
+        self.cache = cache
+        self.force = force
+        self.failed = threading.Event()
+        self._lock = threading.Lock()
+        self._running = set()
+
+    def run(self, chains):
+        results = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            for chain_results in pool.map(self._run_chain, chains):
+                results.extend(chain_results)
+        return results
+
+    def _run_chain(self, chain):
+        results = []
+        cached = None
+        for target in chain:
+            if self.failed.is_set():
+                results.append((target, "cancelled", 0.0, ""))
+                continue
+            result, hit = self._build(target)
+            # A target that ran has written its files in place, replacing any earlier hit
+            cached = hit
+            results.append(result)
+            self._report(*result)
+
+        # Only the last target of a chain decides the final files
+        if cached and not self.failed.is_set():
+            with self._lock:
+                self.cache.install(cached, chain[-1].output)
+        return results
+
+    def _build(self, target):
+        """Build one target; returns (result, cache key to install on a hit, else None)."""
+        if not self.cache:
+            return self._run_target(target), None
+
+        if not self.force:
+            with self._lock:
+                hit = self.cache.lookup(target.key)
+            if hit:
+                return (target, "cached", 0.0, ""), target.key
+
+        # Generators write their real output (and the .import and sidecars next to it);
+        # the files this run rewrote are then stored
+        before = file_stamps(expand_sidecars(target.output, target.sidecars))
+        result = self._run_target(target)
+        if result[1] != "ok":
+            return result, None
+        after = file_stamps(expand_sidecars(target.output, target.sidecars))
+        sidecars = [path for path, stamp in after.items() if before.get(path) != stamp]
+        with self._lock:
+            self.cache.store(target.key, target.name, target.output, sidecars)
+        return result, None
+
+    def _run_target(self, target):
+        start = time.perf_counter()
+        output = target.output
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        process = subprocess.Popen(target.command(self.blender, output), cwd=PROJECT_DIR,
+                                   stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                   text=True, errors="replace")
+        with self._lock:
+            self._running.add(process)
+        try:
+            log, _ = process.communicate()
+        finally:
+            with self._lock:
+                self._running.discard(process)
+        elapsed = time.perf_counter() - start
+
+        if process.returncode == 0 and os.path.exists(output):
+            return target, "ok", elapsed, log
+        if self.failed.is_set():
+            return target, "cancelled", elapsed, log
+        self._fail()
+        return target, "failed", elapsed, log
+
+    def _fail(self):
+        """Fail fast: kill every other running worker."""
+        self.failed.set()
+        with self._lock:
+            for process in self._running:
+                process.terminate()
+
+    def _report(self, target, status, elapsed, log):
+        print(f"  [{status:^9}] {target.name:<28} {elapsed:7.2f}s")
+        if status == "failed":
+            tail = log.rstrip().splitlines()[-LOG_TAIL_LINES:]
+            print("\n".join("      | " + line for line in tail))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build all generated GLB assets")
+    parser.add_argument("targets", nargs="*", help="generator names to build (default: all)")
+    parser.add_argument("--blend", nargs="+", default=[], metavar="PATH",
+                        help=".blend files or directories to convert to GLB")
+    parser.add_argument("--blend-output", default=project_path("assets/models/buildings"),
+                        help="directory for converted .blend files (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="concurrent Blender workers (default: %(default)s)")
+    parser.add_argument("--blender", help="Blender executable")
+    parser.add_argument("--no-cache", action="store_true", help="always run the generators, without reading or storing the cache")
+    parser.add_argument("--force", action="store_true", help="rebuild even on cache hits")
+    parser.add_argument("--cache-max-size", type=float, default=512,
+                        help="evict cached outputs beyond this many MB (default: %(default)s)")
+    parser.add_argument("--cache-max-age", type=float, default=30,
+                        help="evict cached outputs unused for this many days (default: %(default)s)")
+    parser.add_argument("--compression", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="vertex attribute compression of every output (default: %(default)s)")
+    parser.add_argument("--fast", action="store_true",
+                        help="leave out the slow bakes targets declare in BUILD_OPTIONS "
+                             "(AO, hidden face removal)")
+    parser.add_argument("--list", action="store_true", help="list targets and exit")
+    args = parser.parse_args(argv)
+
+    targets = discover_targets()
+    if args.targets:
+        unknown = set(args.targets) - {t.name for t in targets}
+        if unknown:
+            parser.error(f"unknown target(s): {', '.join(sorted(unknown))}")
+        targets = [t for t in targets if t.name in args.targets]
+    elif args.blend:
+        targets = []
+    targets += blend_targets(args.blend, os.path.abspath(args.blend_output))
+    for target in targets:
+        if not args.fast:
+            target.options += target.build_options
+        if args.compression != DEFAULT_PROFILE:
+            target.options += ["--compression", args.compression]
+
+    if args.list:
+        for target in targets:
+            print(f"{target.name:<28} -> {os.path.relpath(target.output, PROJECT_DIR)}")
+        return 0
+    if not targets:
+        print("Nothing to build.")
+        return 0
+
+    start = time.perf_counter()
+    blender = None
+    if args.blender or any(t.blender_required for t in targets):
+        blender = find_blender(args.blender)
+    cache = None
+    if not args.no_cache:
+        cache = BuildCache()
+        for target in targets:
+            runner = cache.blender_version(blender) if target.blender_required else cache.python_version()
+            params = {"target": target.name}
+            if target.options:
+                params["options"] = target.options
+            target.key = cache.fingerprint(target, runner, params)
+
+    chains = group_by_output(targets)
+    jobs = max(1, min(args.jobs, len(chains)))
+    runner = BuildRunner(blender, jobs, cache, force=args.force)
+
+    print(f"Building {len(targets)} target(s) with {jobs} worker(s)...")
+    try:
+        results = runner.run(chains)
+    finally:
+        if cache:
+            cache.evict(args.cache_max_size * 1024 * 1024, args.cache_max_age)
+            cache.save()
+    wall = time.perf_counter() - start
+
+    serial = sum(elapsed for _, _, elapsed, _ in results)
+    print(f"\nWall time {wall:.2f}s (sum of targets {serial:.2f}s)")
+    if runner.failed.is_set():
+        failed = [t.name for t, status, _, _ in results if status == "failed"]
+        print(f"FAILED: {', '.join(failed)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,244 @@
+"""
+Content-hash build cache used by build_assets.py.
+
+A target's fingerprint covers the generator source and every sibling module
+it imports, its declared INPUTS, the .blend file it converts, the build
+parameters and the Blender (or Python and numpy) version. Generators write
+their real outputs; the GLB and the sidecar files the run wrote next to it
+(declared SIDECARS: occluders, palettes, chunks) are then stored under
+<project>/.build_cache by fingerprint. On a hit the generator is not run at
+all, and each installed file is only rewritten when its bytes differ, so
+Godot never sees a changed file (or mtime) for an unchanged asset.
+"""
+import ast
+import glob
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from importlib import metadata
+
+from pipeline import PROJECT_DIR, project_path
+
+CACHE_DIR = project_path(".build_cache")
+# Bump when the fingerprint or object layout changes to invalidate old entries
+CACHE_VERSION = 2
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+def local_imports(script_path):
+    """The script plus every module it (transitively) imports from its own folder."""
+    script_dir = os.path.dirname(script_path)
+    pending = [os.path.abspath(script_path)]
+    seen = []
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        with open(path, encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                candidate = os.path.join(script_dir, name.split(".")[0] + ".py")
+                if os.path.exists(candidate):
+                    pending.append(os.path.abspath(candidate))
+    return sorted(seen)
+
+def expand_inputs(patterns):
+    """Project-relative glob patterns to a sorted list of existing files."""
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(project_path(pattern), recursive=True))
+    return sorted(f for f in files if os.path.isfile(f))
+
+def expand_sidecars(output, patterns):
+    """Existing files matching SIDECARS patterns, which are appended to the output path without
+    its extension ("_occluder.tres", "_chunks/*")."""
+    stem = glob.escape(os.path.splitext(output)[0])
+    files = set()
+    for pattern in patterns:
+        files.update(glob.glob(stem + pattern))
+    return sorted(f for f in files if os.path.isfile(f))
+
+def file_stamps(paths):
+    """{path: (size, mtime)} to tell which files a run rewrote."""
+    stamps = {}
+    for path in paths:
+        st = os.stat(path)
+        stamps[path] = (st.st_size, st.st_mtime_ns)
+    return stamps
+
+class BuildCache:
+    """Fingerprint -> output files (GLB and sidecars) store with size/age eviction."""
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        # Keep Godot from importing the cached GLBs
+        gdignore = os.path.join(cache_dir, ".gdignore")
+        if not os.path.exists(gdignore):
+            open(gdignore, "w").close()
+        self.index = self._load("index.json")
+        self._digests = self._load("digests.json")
+        self._dirty = False
+
+    def _load(self, name):
+        try:
+            with open(os.path.join(self.cache_dir, name), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, name, data):
+        path = os.path.join(self.cache_dir, name)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+
+    def save(self):
+        if self._dirty:
+            self._save("index.json", self.index)
+            self._save("digests.json", self._digests)
+            self._dirty = False
+
+    def digest(self, path):
+        """File digest memoized on (size, mtime) so unchanged inputs are not re-read."""
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self._digests.get(path)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        value = file_digest(path)
+        self._digests[path] = [stamp, value]
+        self._dirty = True
+        return value
+
+    def blender_version(self, blender):
+        """First line of `blender --version`, cached per executable."""
+        path = shutil.which(blender) or blender
+        st = os.stat(path)
+        key = f"blender:{os.path.realpath(path)}"
+        stamp = [st.st_size, st.st_mtime_ns]
+        entry = self._digests.get(key)
+        if entry and entry[0] == stamp:
+            return entry[1]
+        result = subprocess.run([path, "--version"], capture_output=True, text=True,
+                                errors="replace", check=True)
+        version = result.stdout.strip().splitlines()[0]
+        self._digests[key] = [stamp, version]
+        self._dirty = True
+        return version
+
+    def python_version(self):
+        """Interpreter and numpy versions for targets that run without Blender."""
+        try:
+            numpy_version = metadata.version("numpy")
+        except metadata.PackageNotFoundError:
+            numpy_version = "none"
+        return f"Python {sys.version.split()[0]} numpy {numpy_version}"
+
+    def fingerprint(self, target, runner_version, params=None):
+        """Hash everything that can change the bytes of a target's output."""
+        h = hashlib.sha256()
+
+        def feed(label, value):
+            h.update(f"{label}\0{value}\0".encode("utf-8"))
+
+        feed("cache", CACHE_VERSION)
+        feed("runner", runner_version)
+        feed("params", json.dumps(params or {}, sort_keys=True))
+        for path in local_imports(target.script):
+            feed("source:" + os.path.basename(path), self.digest(path))
+        for path in expand_inputs(target.inputs):
+            feed("input:" + os.path.relpath(path, PROJECT_DIR).replace(os.sep, "/"), self.digest(path))
+        if target.blend_file:
+            feed("blend", self.digest(target.blend_file))
+        return h.hexdigest()
+
+    def object_dir(self, key):
+        return os.path.join(self.objects_dir, key)
+
+    def lookup(self, key):
+        """Directory of the cached outputs for `key`, or None on a miss."""
+        entry = self.index.get(key)
+        directory = self.object_dir(key)
+        if not entry or not all(os.path.exists(os.path.join(directory, name)) for name in entry["files"]):
+            return None
+        entry["last_used"] = time.time()
+        self._dirty = True
+        return directory
+
+    def store(self, key, target_name, output, sidecars=()):
+        """Copy a built output and its sidecar files (paths relative to the output's folder)."""
+        directory = self.object_dir(key)
+        shutil.rmtree(directory, ignore_errors=True)
+        base = os.path.dirname(output)
+        files = [os.path.relpath(path, base) for path in [output, *sidecars]]
+        for name, path in zip(files, [output, *sidecars]):
+            os.makedirs(os.path.dirname(os.path.join(directory, name)), exist_ok=True)
+            shutil.copyfile(path, os.path.join(directory, name))
+        now = time.time()
+        self.index[key] = {
+            "target": target_name,
+            "files": [name.replace(os.sep, "/") for name in files],
+            "size": sum(os.path.getsize(path) for path in [output, *sidecars]),
+            "created": now,
+            "last_used": now,
+        }
+        self._dirty = True
+        return directory
+
+    def install(self, key, output):
+        """Copy the cached files of `key` next to `output` unless they are already identical."""
+        directory = self.object_dir(key)
+        base = os.path.dirname(output)
+        installed = 0
+        for name in self.index[key]["files"]:
+            cached = os.path.join(directory, *name.split("/"))
+            destination = os.path.join(base, *name.split("/"))
+            if os.path.exists(destination) and self.digest(destination) == self.digest(cached):
+                continue
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(cached, destination + ".tmp")
+            os.replace(destination + ".tmp", destination)
+            installed += 1
+        return installed
+
+    def evict(self, max_bytes, max_age_days):
+        """Drop entries unused for `max_age_days`, then least recently used ones over `max_bytes`."""
+        now = time.time()
+        entries = sorted(self.index.items(), key=lambda item: item[1]["last_used"])
+        total = sum(entry["size"] for _, entry in entries)
+        removed = 0
+        for key, entry in entries:
+            expired = now - entry["last_used"] > max_age_days * 86400
+            if not expired and total <= max_bytes:
+                continue
+            shutil.rmtree(self.object_dir(key), ignore_errors=True)
+            del self.index[key]
+            total -= entry["size"]
+            removed += 1
+        # Forget digests of files that no longer exist
+        for path in [p for p in self._digests if not p.startswith("blender:") and not os.path.exists(p)]:
+            del self._digests[path]
+            self._dirty = True
+        if removed:
+            self._dirty = True
+        return removed
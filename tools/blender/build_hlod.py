@@ -0,0 +1,242 @@
+"""
+Hierarchical LOD (HLOD) proxies for assembled scenes, no Blender needed.
+
+The mesh instances of a GLB (e.g. academy_assembled.glb) are grouped into
+clusters on a ground-plane grid. Each cluster is merged in world space,
+simplified for its switch distance (decimate.py) and recolored: every face
+takes its material color (base color factor times the base color texture
+sampled at the face's UV center) and all colors go into one palette texture
+(palette.py). Every proxy shares that single palette material, so the far
+skyline costs one draw call per cluster however many pieces it contains.
+
+Proxies are added under an "HLOD" root node. Node extras carry the
+visibility ranges applied by scripts/tools/model_post_import.gd: detailed
+meshes (and their LOD levels from generate_lods.py) end at --distance and
+proxies begin there, cross-fading over a margin. Run generate_lods.py first
+when both are used.
+
+Run with:
+    python3 build_hlod.py ../../assets/models/buildings/academy_assembled.glb
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from decimate import component_sizes, simplify, weld
+from generate_lods import FADE_MARGIN, meters_per_pixel, use_lod_import
+from glb_reader import (GlbError, accessor_array, add_file_arguments, is_collision_only,
+                        mesh_instances, read_glb, run_on_files)
+from glb_writer import GlbDocument, add_builder_mesh, add_spec_material, from_gltf_axes
+from materials import DEFAULT_TOLERANCE, MaterialRegistry
+from mesh_builder import MeshBuilder
+from palette import Palette, read_png, srgb_to_linear
+
+DEFAULT_DISTANCE = 150.0
+DEFAULT_CLUSTER_SIZE = 40.0
+DEFAULT_PIXEL_ERROR = 3.0
+DEFAULT_MIN_PIXELS = 4.0
+
+def add_hlod_arguments(parser):
+    """HLOD options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--hlod", action="store_true",
+                        help="add merged HLOD proxies for distant views to the output")
+    parser.add_argument("--hlod-distance", type=float, default=DEFAULT_DISTANCE,
+                        help="distance where proxies replace the pieces (default: %(default)s)")
+    parser.add_argument("--hlod-cluster-size", type=float, default=DEFAULT_CLUSTER_SIZE,
+                        help="edge of the clustering grid in meters (default: %(default)s)")
+
+class MaterialSampler:
+    """Looks up the (linear) color, metallic and roughness of glTF materials per face."""
+
+    def __init__(self, gltf, binary, directory):
+        self.gltf = gltf
+        self.binary = binary
+        self.directory = directory
+        self._images = {}
+
+    def _image(self, index):
+        if index not in self._images:
+            image = self.gltf["images"][index]
+            pixels = None
+            try:
+                if "bufferView" in image:
+                    view = self.gltf["bufferViews"][image["bufferView"]]
+                    start = view.get("byteOffset", 0)
+                    pixels = read_png(bytes(self.binary[start:start + view["byteLength"]]))
+                elif "uri" in image and not image["uri"].startswith("data:"):
+                    with open(os.path.join(self.directory, image["uri"]), "rb") as f:
+                        pixels = read_png(f.read())
+            except (OSError, ValueError) as e:
+                print(f"  warning: image {image.get('name', index)} not sampled ({e}); using factors")
+            self._images[index] = pixels
+        return self._images[index]
+
+    def face_colors(self, material_index, uvs):
+        """(faces, 3) linear colors for faces with (faces, 3, 2) corner UVs."""
+        material = self.gltf["materials"][material_index] if material_index is not None else {}
+        pbr = material.get("pbrMetallicRoughness", {})
+        factor = np.array(pbr.get("baseColorFactor", (1.0, 1.0, 1.0, 1.0))[:3])
+        colors = np.tile(factor, (len(uvs), 1))
+        texture = pbr.get("baseColorTexture")
+        if texture is not None and uvs is not None:
+            source = self.gltf["textures"][texture["index"]].get("source")
+            pixels = self._image(source) if source is not None else None
+            if pixels is not None:
+                height, width = pixels.shape[:2]
+                center = uvs.mean(axis=1)
+                x = np.floor(center[:, 0] * width).astype(np.int64) % width
+                y = np.floor(center[:, 1] * height).astype(np.int64) % height
+                colors = colors * srgb_to_linear(pixels[y, x, :3] / 255.0)
+        return colors
+
+    def factors(self, material_index):
+        material = self.gltf["materials"][material_index] if material_index is not None else {}
+        pbr = material.get("pbrMetallicRoughness", {})
+        return pbr.get("metallicFactor", 1.0), pbr.get("roughnessFactor", 1.0)
+
+def cluster_instances(gltf, binary, cluster_size):
+    """Group mesh instances by the ground-plane grid cell of their bounds center."""
+    clusters = {}
+    for node, mesh, world in mesh_instances(gltf, binary):
+        extras = gltf["nodes"][node].get("extras", {})
+        if extras.get("lod", 0) != 0:
+            continue  # LOD levels are replaced together with their LOD0 parent
+        low, high = _mesh_bounds(gltf, mesh)
+        center = world @ np.append((low + high) / 2, 1.0)
+        # glTF is Y up: the ground plane is X/Z
+        cell = (int(math.floor(center[0] / cluster_size)), int(math.floor(center[2] / cluster_size)))
+        clusters.setdefault(cell, []).append((node, mesh, world))
+    return [clusters[cell] for cell in sorted(clusters)]
+
+def _mesh_bounds(gltf, mesh):
+    accessors = [gltf["accessors"][p["attributes"]["POSITION"]] for p in gltf["meshes"][mesh]["primitives"]]
+    return (np.min([a["min"] for a in accessors], axis=0).astype(np.float64),
+            np.max([a["max"] for a in accessors], axis=0).astype(np.float64))
+
+def merge_cluster(gltf, binary, sampler, instances):
+    """World-space positions, triangles and per-face (color, metallic, roughness) of a cluster."""
+    positions, triangles, colors, factors = [], [], [], []
+    offset = 0
+    for _node, mesh, world in instances:
+        for primitive in gltf["meshes"][mesh]["primitives"]:
+            if primitive.get("mode", 4) != 4:
+                continue
+            points = accessor_array(gltf, binary, primitive["attributes"]["POSITION"]).astype(np.float64)
+            if "indices" in primitive:
+                faces = accessor_array(gltf, binary, primitive["indices"]).astype(np.int64).reshape(-1, 3)
+            else:
+                faces = np.arange(len(points)).reshape(-1, 3)
+            uvs = None
+            if "TEXCOORD_0" in primitive["attributes"]:
+                uvs = accessor_array(gltf, binary, primitive["attributes"]["TEXCOORD_0"])[faces]
+            world_points = points @ world[:3, :3].T + world[:3, 3]
+            if np.linalg.det(world[:3, :3]) < 0:
+                faces = faces[:, ::-1]  # Mirrored instances flip the winding
+            positions.append(world_points)
+            triangles.append(faces + offset)
+            colors.append(sampler.face_colors(primitive.get("material"), uvs))
+            factors.append(np.tile(sampler.factors(primitive.get("material")), (len(faces), 1)))
+            offset += len(points)
+    if not positions:
+        return None
+    return np.vstack(positions), np.vstack(triangles), np.vstack(colors), np.vstack(factors)
+
+def build_hlod(filepath, output, distance=DEFAULT_DISTANCE, cluster_size=DEFAULT_CLUSTER_SIZE,
+               pixel_error=DEFAULT_PIXEL_ERROR, min_pixels=DEFAULT_MIN_PIXELS,
+               material_tolerance=DEFAULT_TOLERANCE):
+    """Add HLOD proxies to filepath and write the result to output; returns a summary dict."""
+    gltf, binary = read_glb(filepath)
+    if any("hlod" in node.get("extras", {}) for node in gltf.get("nodes", [])):
+        raise GlbError(f"{filepath}: already has HLOD proxies; regenerate the source model first")
+    sampler = MaterialSampler(gltf, binary, os.path.dirname(os.path.abspath(filepath)))
+    max_error = meters_per_pixel(distance) * pixel_error
+    min_size = meters_per_pixel(distance) * min_pixels
+
+    # Simplify every cluster first; the shared palette needs all of their colors
+    registry = MaterialRegistry(material_tolerance)
+    proxies = []
+    clusters = cluster_instances(gltf, binary, cluster_size)
+    for instances in clusters:
+        merged = merge_cluster(gltf, binary, sampler, instances)
+        if merged is None:
+            continue
+        positions, triangles, colors, factors = merged
+        keep = component_sizes(*weld(positions, triangles)) >= min_size
+        positions, triangles, source = simplify(positions, triangles[keep], max_error=max_error)
+        colors, factors = colors[keep][source], factors[keep][source]
+
+        builder = MeshBuilder()
+        faces_by_material = {}
+        for face, (color, (metallic, roughness)) in enumerate(zip(colors, factors)):
+            material = registry.get(f"HLOD_{len(registry.materials)}", tuple(color), metallic, roughness)
+            faces_by_material.setdefault(material, []).append(face)
+        for material, faces in faces_by_material.items():
+            builder.add(material.name, from_gltf_axes(positions), triangles[faces],
+                        np.zeros((len(positions), 2)), material)
+        proxies.append((len(proxies), builder))
+
+    document = GlbDocument.from_glb(gltf, binary)
+    palette = Palette(registry.materials, "HLOD_Palette")
+    palette_index = add_spec_material(document, palette.material)
+    children = []
+    for index, builder in proxies:
+        palette.apply(builder)
+        name = f"HLOD_{index}"
+        mesh = add_builder_mesh(document, builder, name, {palette.material: palette_index})
+        children.append(document.add_node(name, mesh, root=False, extras={
+            "hlod": index,
+            "visibility_range_begin": distance,
+            "visibility_range_begin_margin": distance * FADE_MARGIN,
+        }))
+    document.add_node("HLOD", children=children)
+
+    # Detailed meshes (and LOD levels that would outlast the switch) hand over at the distance
+    for node in document.gltf["nodes"]:
+        if "mesh" not in node or is_collision_only(node) or "hlod" in node.get("extras", {}):
+            continue
+        extras = node.setdefault("extras", {})
+        end = extras.get("visibility_range_end", 0.0)
+        if end == 0.0 or end > distance:
+            extras["visibility_range_end"] = distance
+            extras["visibility_range_end_margin"] = distance * FADE_MARGIN
+
+    document.write(output)
+    return {
+        "clusters": len(proxies),
+        "pieces": sum(len(instances) for instances in clusters),
+        "triangles": sum(builder.triangle_count for _index, builder in proxies),
+        "colors": len(palette.materials),
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add merged HLOD proxies to GLB files")
+    add_file_arguments(parser)
+    parser.add_argument("--distance", type=float, default=DEFAULT_DISTANCE,
+                        help="distance where proxies replace the pieces (default: %(default)s)")
+    parser.add_argument("--cluster-size", type=float, default=DEFAULT_CLUSTER_SIZE,
+                        help="edge of the clustering grid in meters (default: %(default)s)")
+    parser.add_argument("--pixel-error", type=float, default=DEFAULT_PIXEL_ERROR,
+                        help="allowed screen-space error at the distance (default: %(default)s)")
+    parser.add_argument("--min-pixels", type=float, default=DEFAULT_MIN_PIXELS,
+                        help="drop pieces smaller than this many pixels (default: %(default)s)")
+    parser.add_argument("--material-tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="merge palette colors closer than this (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        summary = build_hlod(filepath, output, args.distance, args.cluster_size,
+                             args.pixel_error, args.min_pixels, args.material_tolerance)
+        print(f"{os.path.basename(filepath)}: {summary['pieces']} piece(s) -> "
+              f"{summary['clusters']} proxy draw call(s), {summary['triangles']} tris, "
+              f"{summary['colors']} palette color(s)")
+        if output == filepath:
+            use_lod_import(filepath)
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Spatial chunking of a MeshBuilder for streaming and culling.
+
+Triangles are partitioned by centroid, either into a regular grid on the
+ground plane or into BVH leaves (median splits along the longest axis until
+a leaf holds few enough triangles). Each chunk is written as its own GLB in
+a "<model>_chunks" directory next to the normal output, together with a
+manifest.json listing every chunk's file and bounds in Godot (Y-up) axes:
+
+    {"version": 1, "model": "DuelAcademy", "mode": "grid", "chunks": [
+        {"name": "chunk_0_1", "file": "DuelAcademy_chunk_0_1.glb",
+         "bounds": {"min": [x, y, z], "max": [x, y, z]}, "triangles": 812}, ...]}
+
+Chunk vertices stay in model space, so loading every chunk at the model's
+origin reproduces the whole model. scripts/environment/chunked_model.gd
+streams chunks in and out by distance to these bounds.
+"""
+import json
+import os
+
+import numpy as np
+
+from compression import DEFAULT_PROFILE, PROFILES, compress_glb
+from glb_writer import to_gltf_axes, write_builder_glb
+from mesh_builder import MeshBuilder, MeshPart
+
+MANIFEST_VERSION = 1
+MANIFEST_NAME = "manifest.json"
+
+# Grid cell edge (meters) and BVH leaf size defaults
+DEFAULT_CELL_SIZE = 20.0
+DEFAULT_LEAF_TRIANGLES = 2000
+
+def add_chunk_arguments(parser):
+    """Chunked export options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--chunks", choices=("grid", "bvh"),
+                        help="also write one GLB per spatial chunk plus a manifest")
+    parser.add_argument("--chunk-size", type=float, default=DEFAULT_CELL_SIZE,
+                        help="grid cell size in meters (default: %(default)s)")
+    parser.add_argument("--chunk-triangles", type=int, default=DEFAULT_LEAF_TRIANGLES,
+                        help="most triangles per BVH chunk (default: %(default)s)")
+
+def chunk_directory(output):
+    """Directory holding the chunks of a model (model.glb -> model_chunks/)."""
+    return os.path.splitext(output)[0] + "_chunks"
+
+def _triangle_table(builder):
+    """(part index, triangle index, centroid) for every triangle of a builder."""
+    part_ids, triangle_ids, centroids = [], [], []
+    for i, part in enumerate(builder.parts):
+        part_ids.append(np.full(len(part.triangles), i))
+        triangle_ids.append(np.arange(len(part.triangles)))
+        centroids.append(part.positions[part.triangles].mean(axis=1))
+    if not part_ids:
+        return np.zeros(0, dtype=int), np.zeros(0, dtype=int), np.zeros((0, 3))
+    return np.concatenate(part_ids), np.concatenate(triangle_ids), np.vstack(centroids)
+
+def _extract(builder, part_ids, triangle_ids):
+    """A new MeshBuilder holding only the given triangles, with unused vertices dropped."""
+    chunk = MeshBuilder()
+    for i in np.unique(part_ids):
+        part = builder.parts[i]
+        selected = triangle_ids[part_ids == i]
+        triangles = part.triangles[selected]
+        used, remapped = np.unique(triangles, return_inverse=True)
+        piece = MeshPart(part.name, part.positions[used], remapped.reshape(-1, 3), part.uvs[used],
+                         part.material, part.smooth)
+        # Baked on the whole model, so chunk borders match
+        if part.ao is not None:
+            piece.ao = part.ao[selected]
+        if part.outline_normals is not None:
+            piece.outline_normals = part.outline_normals[selected]
+        chunk.parts.append(piece)
+    return chunk
+
+def grid_chunks(builder, cell_size=DEFAULT_CELL_SIZE):
+    """Split by ground-plane (Blender X/Y) grid cell; returns [(name, MeshBuilder)]."""
+    part_ids, triangle_ids, centroids = _triangle_table(builder)
+    cells = np.floor(centroids[:, :2] / cell_size).astype(np.int64)
+    chunks = []
+    for cell in np.unique(cells, axis=0):
+        mask = np.all(cells == cell, axis=1)
+        chunks.append((f"chunk_{cell[0]}_{cell[1]}",
+                       _extract(builder, part_ids[mask], triangle_ids[mask])))
+    return chunks
+
+def bvh_chunks(builder, leaf_triangles=DEFAULT_LEAF_TRIANGLES):
+    """Split into BVH leaves of at most leaf_triangles; returns [(name, MeshBuilder)]."""
+    part_ids, triangle_ids, centroids = _triangle_table(builder)
+    leaves = []
+    stack = [np.arange(len(centroids))]
+    while stack:
+        members = stack.pop()
+        if len(members) <= max(leaf_triangles, 1):
+            leaves.append(members)
+            continue
+        points = centroids[members]
+        axis = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+        order = members[np.argsort(points[:, axis], kind="stable")]
+        half = len(order) // 2
+        # Right half pushed first so leaves come out left to right
+        stack.extend([order[half:], order[:half]])
+    return [(f"chunk_{i}", _extract(builder, part_ids[leaf], triangle_ids[leaf]))
+            for i, leaf in enumerate(leaves) if len(leaf)]
+
+def write_chunks(builder, output, name, mode="grid", cell_size=DEFAULT_CELL_SIZE,
+                 leaf_triangles=DEFAULT_LEAF_TRIANGLES, compression=DEFAULT_PROFILE):
+    """Write every chunk GLB (with a compression.py profile) and the manifest; returns the manifest path."""
+    # A chunk is one mesh, so placed components are copied in
+    builder = builder.flattened()
+    if mode == "grid":
+        chunks = grid_chunks(builder, cell_size)
+    else:
+        chunks = bvh_chunks(builder, leaf_triangles)
+
+    directory = chunk_directory(output)
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    # Chunks of a previous run that no longer exist would otherwise linger
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            stale = [chunk["file"] for chunk in json.load(f).get("chunks", [])]
+    else:
+        stale = []
+
+    entries = []
+    for chunk_name, chunk in chunks:
+        filename = f"{name}_{chunk_name}.glb"
+        path = os.path.join(directory, filename)
+        if builder.lightmap_texel_size:
+            # Every chunk is its own mesh instance with its own lightmap
+            chunk.unwrap_lightmap(builder.lightmap_texel_size)
+        write_builder_glb(chunk, path, f"{name}_{chunk_name}")
+        if PROFILES[compression]:
+            compress_glb(path, path, compression)
+        low, high = chunk.bounds()
+        corners = to_gltf_axes(np.array([low, high]))
+        entries.append({
+            "name": chunk_name,
+            "file": filename,
+            "bounds": {"min": corners.min(axis=0).round(4).tolist(),
+                       "max": corners.max(axis=0).round(4).tolist()},
+            "triangles": chunk.triangle_count,
+        })
+    for filename in set(stale) - {entry["file"] for entry in entries}:
+        path = os.path.join(directory, filename)
+        if os.path.exists(path):
+            os.remove(path)
+
+    manifest = {"version": MANIFEST_VERSION, "model": name, "mode": mode, "chunks": entries}
+    if mode == "grid":
+        manifest["cell_size"] = cell_size
+    else:
+        manifest["leaf_triangles"] = leaf_triangles
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+        f.write("\n")
+    print(f"  {len(entries)} {mode} chunk(s) written to {directory}")
+    return manifest_path
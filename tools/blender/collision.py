@@ -0,0 +1,182 @@
+"""
+Simplified collision geometry for the generators.
+
+Godot imports glTF mesh nodes named "<name>-convcolonly" as a StaticBody3D
+with a ConvexPolygonShape3D and no render mesh, so physics never has to
+touch the visual triangles. The shapes come from each MeshPart's collision
+point clouds (see MeshBuilder.add): box corners for boxes, circumscribed
+prisms for cylinders, cones and spheres, and one wedge per segment for rings
+and tori. Parts added without them fall back to the hull of their vertices.
+
+Two modes:
+- "primitives" keeps one shape per fitted primitive (buildings made of
+  boxes and towers).
+- "convex" greedily merges neighbouring hulls while the merged hull adds
+  little empty volume, a cheap convex decomposition for props.
+
+glTF cannot carry Blender empties with box/cylinder display types, so fitted
+primitives are exported as small convex meshes (8 points for a box) rather
+than as -colonly empties.
+"""
+import numpy as np
+
+COLLISION_MODES = ("primitives", "convex", "none")
+COLLISION_SUFFIX = "-convcolonly"
+# Merged hulls may be this much larger than the pieces they replace
+DEFAULT_MERGE_TOLERANCE = 0.1
+
+def add_collision_arguments(parser, default="primitives"):
+    """Collision options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--collision", choices=COLLISION_MODES, default=default,
+                        help="collision shapes exported with the model (default: %(default)s)")
+    parser.add_argument("--collision-tolerance", type=float, default=DEFAULT_MERGE_TOLERANCE,
+                        help="extra hull volume allowed when merging convex pieces "
+                             "(default: %(default)s)")
+
+def convex_hull(points):
+    """Incremental 3D convex hull; returns (vertices, triangles) or None when flat."""
+    points = np.unique(np.round(np.asarray(points, dtype=np.float64), 6), axis=0)
+    if len(points) < 4:
+        return None
+    eps = 1e-9 * max(float(np.abs(points).max()), 1.0)
+
+    # Initial tetrahedron from extreme points
+    a = int(points[:, 0].argmin())
+    b = int(np.linalg.norm(points - points[a], axis=1).argmax())
+    line = points[b] - points[a]
+    c = int(np.linalg.norm(np.cross(points - points[a], line), axis=1).argmax())
+    normal = np.cross(line, points[c] - points[a])
+    distances = (points - points[a]) @ normal
+    d = int(np.abs(distances).argmax())
+    if abs(distances[d]) <= eps * np.linalg.norm(normal) or np.linalg.norm(normal) <= eps:
+        return None
+    faces = [(a, b, c), (a, c, d), (a, d, b), (b, d, c)] if distances[d] < 0 else \
+            [(a, c, b), (a, b, d), (a, d, c), (b, c, d)]
+
+    center = points[[a, b, c, d]].mean(axis=0)
+    # Farthest points first, so most of the rest end up inside early
+    order = np.argsort(-np.linalg.norm(points - center, axis=1))
+    for p in order:
+        if p in (a, b, c, d):
+            continue
+        tris = np.array(faces)
+        v0, v1, v2 = points[tris[:, 0]], points[tris[:, 1]], points[tris[:, 2]]
+        normals = np.cross(v1 - v0, v2 - v0)
+        lengths = np.linalg.norm(normals, axis=1)
+        visible = np.einsum("ij,ij->i", normals, points[p] - v0) > eps * np.maximum(lengths, 1e-20)
+        if not visible.any():
+            continue
+        edges = set()
+        for i in np.flatnonzero(visible):
+            x, y, z = faces[i]
+            edges.update(((x, y), (y, z), (z, x)))
+        horizon = [(x, y) for x, y in edges if (y, x) not in edges]
+        faces = [f for f, seen in zip(faces, visible) if not seen] + [(x, y, p) for x, y in horizon]
+
+    triangles = np.array(faces, dtype=np.int64)
+    used, remapped = np.unique(triangles, return_inverse=True)
+    return points[used], remapped.reshape(-1, 3)
+
+def hull_volume(vertices, triangles):
+    """Volume enclosed by a closed, outward-wound triangle mesh."""
+    v0, v1, v2 = (vertices[triangles[:, i]] for i in range(3))
+    return float(np.einsum("ij,ij->i", v0, np.cross(v1, v2)).sum() / 6.0)
+
+class ConvexPiece:
+    """A convex hull with the bounds used to find merge candidates."""
+
+    def __init__(self, vertices, triangles):
+        self.vertices = vertices
+        self.triangles = triangles
+        self.volume = hull_volume(vertices, triangles)
+        self.low = vertices.min(axis=0)
+        self.high = vertices.max(axis=0)
+
+    @classmethod
+    def from_points(cls, points):
+        hull = convex_hull(points)
+        return cls(*hull) if hull is not None else None
+
+    def touches(self, other, margin=1e-4):
+        return bool(np.all(self.low <= other.high + margin) and np.all(other.low <= self.high + margin))
+
+def part_pieces(builder):
+    """Convex pieces of every part of a MeshBuilder, from its collision point clouds.
+
+    Placed components count once per placement.
+    """
+    pieces = []
+    skipped = 0
+    for part in builder.flattened().parts:
+        clouds = part.collision if part.collision is not None else [part.positions]
+        for points in clouds:
+            piece = ConvexPiece.from_points(points)
+            if piece is None:
+                skipped += 1
+            else:
+                pieces.append(piece)
+    if skipped:
+        print(f"  collision: {skipped} flat piece(s) skipped")
+    return pieces
+
+def merge_pieces(pieces, tolerance=DEFAULT_MERGE_TOLERANCE):
+    """Greedily merge touching pieces whose hull stays within (1 + tolerance) of their volumes."""
+    pieces = list(pieces)
+    costs = {}
+
+    def cost(i, j):
+        if (i, j) not in costs:
+            merged = None
+            if pieces[i].touches(pieces[j]):
+                merged = ConvexPiece.from_points(np.vstack([pieces[i].vertices, pieces[j].vertices]))
+            ratio = np.inf
+            if merged is not None:
+                ratio = merged.volume / max(pieces[i].volume + pieces[j].volume, 1e-12)
+            costs[i, j] = (ratio, merged)
+        return costs[i, j]
+
+    alive = set(range(len(pieces)))
+    while True:
+        best = None
+        for i in alive:
+            for j in alive:
+                if i < j:
+                    ratio, merged = cost(i, j)
+                    if ratio <= 1.0 + tolerance and (best is None or ratio < best[0]):
+                        best = (ratio, i, j, merged)
+        if best is None:
+            break
+        _ratio, i, j, merged = best
+        alive -= {i, j}
+        pieces.append(merged)
+        alive.add(len(pieces) - 1)
+    return [pieces[i] for i in sorted(alive)]
+
+def collision_shapes(builder, name, mode="primitives", tolerance=DEFAULT_MERGE_TOLERANCE):
+    """(node name, positions, triangles) of the collision meshes for a MeshBuilder."""
+    if mode == "none":
+        return []
+    pieces = part_pieces(builder)
+    count = len(pieces)
+    if mode == "convex":
+        pieces = merge_pieces(pieces, tolerance)
+    shapes = [(f"{name}_Collision_{i}{COLLISION_SUFFIX}", piece.vertices, piece.triangles)
+              for i, piece in enumerate(pieces)]
+    points = sum(len(piece.vertices) for piece in pieces)
+    print(f"  collision: {len(shapes)} convex shape(s), {points} points "
+          f"(from {count} piece(s), {builder.triangle_count} render triangles)")
+    return shapes
+
+def shapes_to_blender(shapes):
+    """Create one Blender object per collision shape; returns the objects."""
+    import bpy
+
+    objects = []
+    for name, positions, triangles in shapes:
+        mesh = bpy.data.meshes.new(name)
+        mesh.from_pydata(positions.tolist(), [], triangles.tolist())
+        mesh.update()
+        obj = bpy.data.objects.new(name, mesh)
+        bpy.context.collection.objects.link(obj)
+        objects.append(obj)
+    return objects
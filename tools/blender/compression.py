@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Mesh compression profiles for exported GLBs, no Blender needed.
+
+Godot's glTF importer reads KHR_mesh_quantization but neither
+KHR_draco_mesh_compression nor EXT_meshopt_compression, so every profile
+quantizes vertex attributes into smaller integer types and they differ only
+in precision:
+
+    none              float32 attributes, what the exporters write
+    quantize          16-bit positions, UVs and colors, 8-bit normals and tangents
+    quantize_precise  the same with 16-bit normals and tangents
+
+Positions become normalized int16 inside the mesh's bounding box (a cube, so
+the scale is uniform and normals stay correct), and every node using the
+mesh gets that box folded into its transform. Meshes whose nodes cannot take
+the extra transform (skinned, GPU-instanced, with children, or turned into
+physics shapes by a Godot name suffix) and meshes with morph targets keep
+float positions. TEXCOORD_2 and up carry packed custom data (outline
+normals) and stay float, as do UVs outside -1..1.
+
+Compression is the last export step: the other GLB tools read float data.
+compression_benchmark.py measures what each profile saves and costs.
+
+Run with:
+    python3 compression.py ../../assets/models/buildings/duel_academy.glb --profile quantize
+"""
+import argparse
+import os
+import re
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import (GlbError, accessor_floats, add_file_arguments, node_matrix, read_glb,
+                        run_on_files, trs_matrix)
+from glb_writer import ARRAY_BUFFER, GlbDocument
+
+# Bits per component by attribute kind; kinds missing from a profile stay float
+PROFILES = {
+    "none": {},
+    "quantize": {"POSITION": 16, "NORMAL": 8, "TANGENT": 8, "TEXCOORD": 16, "COLOR": 16},
+    "quantize_precise": {"POSITION": 16, "NORMAL": 16, "TANGENT": 16, "TEXCOORD": 16, "COLOR": 16},
+}
+DEFAULT_PROFILE = "none"
+EXTENSION = "KHR_mesh_quantization"
+# TEXCOORD_n from here on hold packed custom data, see glb_writer.custom_channel
+FIRST_CUSTOM_SET = 2
+FLOAT = 5126
+# Godot import suffixes that build physics shapes from the node (which must not be scaled)
+PHYSICS_SUFFIX = re.compile(r"-(col|convcol|colonly|convcolonly|rigid|navmesh|occ|occonly)$")
+
+SIGNED = {8: np.int8, 16: np.int16}
+UNSIGNED = {8: np.uint8, 16: np.uint16}
+
+def add_compression_arguments(parser):
+    parser.add_argument("--compression", choices=sorted(PROFILES), default=DEFAULT_PROFILE,
+                        help="vertex attribute compression profile of the exported GLB (default: %(default)s)")
+
+def normalized(values, dtype):
+    """Float values in -1..1 (signed types) or 0..1 (unsigned) as normalized integers."""
+    info = np.iinfo(dtype)
+    low = -1.0 if info.min < 0 else 0.0
+    return np.round(np.clip(values, low, 1.0) * info.max).astype(dtype)
+
+def _kind(semantic):
+    return semantic.split("_")[0] if semantic.startswith(("TEXCOORD_", "COLOR_")) else semantic
+
+def _quantized(semantic, values, bits, box):
+    """Normalized integer array for one float attribute, or None when it stays float."""
+    kind = _kind(semantic)
+    if kind == "POSITION":
+        center, half = box
+        return normalized((values - center) / half, SIGNED[bits])
+    if kind in ("NORMAL", "TANGENT"):
+        vectors = values[:, :3]
+        lengths = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = np.where(lengths > 1e-12, vectors / np.maximum(lengths, 1e-12), vectors)
+        return normalized(np.hstack([vectors, values[:, 3:]]), SIGNED[bits])
+    if kind == "TEXCOORD":
+        if int(semantic[9:]) >= FIRST_CUSTOM_SET or not len(values):
+            return None
+        if values.min() >= 0.0 and values.max() <= 1.0:
+            return normalized(values, UNSIGNED[bits])
+        if values.min() >= -1.0 and values.max() <= 1.0:
+            return normalized(values, SIGNED[bits])
+        return None
+    if kind == "COLOR":
+        return normalized(values, UNSIGNED[bits])
+    return None
+
+def _takes_transform(node):
+    """Whether a node's transform may be extended by a dequantization box."""
+    return not (node.get("children") or "skin" in node
+                or "EXT_mesh_gpu_instancing" in node.get("extensions", {})
+                or PHYSICS_SUFFIX.search(node.get("name", "")))
+
+def _dequantize_node(node, center, half):
+    """Fold the box of a mesh's quantized positions into the transform of a node using it."""
+    if "matrix" in node:
+        matrix = node_matrix(node) @ trs_matrix(center, scale=(half, half, half))
+        node["matrix"] = matrix.T.ravel().tolist()
+        return
+    rotation = trs_matrix(rotation=node.get("rotation", (0.0, 0.0, 0.0, 1.0)))[:3, :3]
+    scale = np.asarray(node.get("scale", (1.0, 1.0, 1.0)), dtype=np.float64)
+    translation = np.asarray(node.get("translation", (0.0, 0.0, 0.0)), dtype=np.float64)
+    node["translation"] = (translation + rotation @ (scale * center)).tolist()
+    node["scale"] = (scale * half).tolist()
+
+def quantize_document(document, profile):
+    """Quantize the float vertex attributes of a GlbDocument; returns the number of accessors replaced."""
+    bits_by_kind = PROFILES[profile]
+    if not bits_by_kind:
+        return 0
+    gltf = document.gltf
+    binary = bytes(document.binary)
+    accessors = gltf.get("accessors", [])
+    users = {}
+    for node in gltf.get("nodes", []):
+        if "mesh" in node:
+            users.setdefault(node["mesh"], []).append(node)
+
+    replaced = {}
+    for mesh_index, mesh in enumerate(gltf.get("meshes", [])):
+        primitives = mesh["primitives"]
+        if any(primitive.get("targets") for primitive in primitives):
+            continue
+        nodes = users.get(mesh_index, [])
+        box = None
+        if "POSITION" in bits_by_kind and nodes and all(_takes_transform(node) for node in nodes):
+            positions = [accessor_floats(gltf, binary, primitive["attributes"]["POSITION"])
+                         for primitive in primitives if "POSITION" in primitive["attributes"]
+                         and accessors[primitive["attributes"]["POSITION"]]["componentType"] == FLOAT]
+            if positions and len(positions) == len(primitives):
+                stacked = np.vstack(positions).astype(np.float64)
+                low, high = stacked.min(axis=0), stacked.max(axis=0)
+                box = ((low + high) / 2, max(float((high - low).max()) / 2, 1e-6))
+
+        for primitive in primitives:
+            attributes = primitive["attributes"]
+            for semantic, index in sorted(attributes.items()):
+                kind = _kind(semantic)
+                if kind not in bits_by_kind or accessors[index]["componentType"] != FLOAT:
+                    continue
+                if kind == "POSITION" and box is None:
+                    continue
+                # Positions depend on their mesh's box, everything else only on the data
+                key = (index, mesh_index if kind == "POSITION" else None)
+                if key not in replaced:
+                    values = _quantized(semantic, accessor_floats(gltf, binary, index),
+                                        bits_by_kind[kind], box)
+                    replaced[key] = None if values is None else document.add_accessor(
+                        values, ARRAY_BUFFER, normalized=True)
+                if replaced[key] is not None:
+                    attributes[semantic] = replaced[key]
+        if box is not None:
+            for node in nodes:
+                _dequantize_node(node, *box)
+
+    count = sum(1 for index in replaced.values() if index is not None)
+    if count:
+        document.use_extension(EXTENSION, required=True)
+        document.compact()
+    return count
+
+def compress_glb(filepath, output, profile):
+    """Write filepath compressed with a profile to output; returns (bytes before, bytes after)."""
+    before = os.path.getsize(filepath)
+    gltf, binary = read_glb(filepath)
+    document = GlbDocument.from_glb(gltf, binary)
+    if EXTENSION in gltf.get("extensionsUsed", []):
+        raise GlbError(f"{filepath}: already quantized")
+    quantize_document(document, profile)
+    return before, document.write(output)
+
+def compress_exported(filepath, profile):
+    """Compress a freshly exported GLB in place (nothing for the "none" profile).
+
+    Run it after every other step on the file: they read the float attributes it quantizes.
+    """
+    if not PROFILES[profile]:
+        return None
+    before, after = compress_glb(filepath, filepath, profile)
+    print(f"  compression ({profile}): {before:,} -> {after:,} bytes ({after / before:.0%})")
+    return after
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Quantize the vertex attributes of GLB files")
+    add_file_arguments(parser, "compress")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quantize",
+                        help="compression profile (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        before, after = compress_glb(filepath, output, args.profile)
+        print(f"{os.path.basename(filepath)}: {before:,} -> {after:,} bytes ({after / before:.0%})")
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compression profiles over the project's GLB files, no Blender needed.
+
+Every file is written with every profile of compression.py into a temporary
+directory, then for each profile the report lists
+
+- the total file size, also relative to the uncompressed files,
+- the load time: reading the file and decoding every vertex attribute and
+  index buffer to floats, the best of --repeat runs, summed over the files,
+- the visual error against the uncompressed file: the largest world-space
+  position error, the largest normal angle error and the largest UV error
+  (in texels of a 1024 texture) over every drawn vertex.
+
+Draco (gltf-transform) and meshopt (gltfpack) are listed for their file size
+when those encoders are installed; Godot cannot import either, so they are
+not export profiles. The last line names the smallest profile within the
+--max-position-error and --max-normal-error limits.
+
+Run with:
+    python3 compression_benchmark.py                        # every GLB under assets/ and addons/
+    python3 compression_benchmark.py ../../assets/models/buildings --per-file
+    python3 compression_benchmark.py --json benchmark.json
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from asset_report import find_assets
+from compression import PROFILES, quantize_document
+from glb_reader import GlbError, accessor_floats, mesh_instances, read_glb
+from glb_writer import GlbDocument
+from pipeline import PROJECT_DIR, project_path
+
+BASELINE = "none"
+UV_TEXELS = 1024
+# Encoders Godot cannot import, measured for size only: name -> (command, extension)
+EXTERNAL_ENCODERS = {
+    "meshopt": (["gltfpack", "-i", "{input}", "-o", "{output}", "-cc"], "EXT_meshopt_compression"),
+    "draco": (["gltf-transform", "draco", "{input}", "{output}"], "KHR_draco_mesh_compression"),
+}
+
+def decode(path):
+    """Read a GLB and decode every vertex attribute and index buffer (what loading it costs)."""
+    gltf, binary = read_glb(path)
+    decoded = {}
+    for mesh in gltf.get("meshes", []):
+        for primitive in mesh["primitives"]:
+            for index in list(primitive["attributes"].values()) + [primitive.get("indices")]:
+                if index is not None and index not in decoded:
+                    decoded[index] = accessor_floats(gltf, binary, index)
+    return gltf, binary, decoded
+
+def load_time(path, repeats):
+    """Best wall time of decode(path) over repeats runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        decode(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def drawn_vertices(path):
+    """[(positions in world space, unit normals or None, {uv set: uvs})] per drawn primitive, in scene order."""
+    gltf, binary, decoded = decode(path)
+    drawn = []
+    for _node, mesh_index, world in mesh_instances(gltf, binary):
+        for primitive in gltf["meshes"][mesh_index]["primitives"]:
+            attributes = primitive["attributes"]
+            positions = decoded[attributes["POSITION"]].astype(np.float64)
+            positions = positions @ world[:3, :3].T + world[:3, 3]
+            normals = None
+            if "NORMAL" in attributes:
+                normals = decoded[attributes["NORMAL"]].astype(np.float64) @ world[:3, :3].T
+                normals /= np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+            uvs = {semantic: decoded[index] for semantic, index in attributes.items()
+                   if semantic in ("TEXCOORD_0", "TEXCOORD_1")}
+            drawn.append((positions, normals, uvs))
+    return drawn
+
+def visual_error(original, compressed):
+    """(position error in meters, normal error in degrees, UV error in texels), the largest of each."""
+    position, normal, uv = 0.0, 0.0, 0.0
+    for (positions, normals, uvs), (positions_q, normals_q, uvs_q) in zip(original, compressed):
+        if len(positions):
+            position = max(position, float(np.linalg.norm(positions - positions_q, axis=1).max()))
+        if normals is not None and normals_q is not None and len(normals):
+            cosines = np.clip(np.einsum("ij,ij->i", normals, normals_q), -1.0, 1.0)
+            # Degenerate (zero) normals have no direction to lose
+            valid = np.linalg.norm(normals, axis=1) > 0.5
+            if valid.any():
+                normal = max(normal, float(np.degrees(np.arccos(cosines[valid].min()))))
+        for semantic, values in uvs.items():
+            if semantic in uvs_q and len(values):
+                uv = max(uv, float(np.abs(values - uvs_q[semantic]).max()) * UV_TEXELS)
+    return position, normal, uv
+
+def write_profile(path, profile, output):
+    """Write path compressed with one of the compression.py profiles."""
+    gltf, binary = read_glb(path)
+    document = GlbDocument.from_glb(gltf, binary)
+    quantize_document(document, profile)
+    return document.write(output)
+
+def run_encoder(name, path, output):
+    """Size of path encoded by an external encoder, None when it is not installed or fails."""
+    command, _extension = EXTERNAL_ENCODERS[name]
+    if not shutil.which(command[0]):
+        return None
+    command = [part.format(input=path, output=output) for part in command]
+    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode != 0 or not os.path.exists(output):
+        return None
+    return os.path.getsize(output)
+
+def benchmark_file(path, directory, repeats):
+    """{profile: {"bytes", "seconds", "position_error", "normal_error", "uv_error"}} for one GLB."""
+    results = {}
+    original = drawn_vertices(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for profile in PROFILES:
+        output = os.path.join(directory, f"{stem}.{profile}.glb")
+        if profile == BASELINE:
+            shutil.copyfile(path, output)
+        else:
+            write_profile(path, profile, output)
+        position, normal, uv = visual_error(original, drawn_vertices(output))
+        results[profile] = {"bytes": os.path.getsize(output), "seconds": load_time(output, repeats),
+                            "position_error": position, "normal_error": normal, "uv_error": uv}
+    for name in EXTERNAL_ENCODERS:
+        size = run_encoder(name, path, os.path.join(directory, f"{stem}.{name}.glb"))
+        if size is not None:
+            results[name] = {"bytes": size}
+    return results
+
+def summarize(rows):
+    """Per profile totals over the files: bytes and seconds summed, errors maximized."""
+    summary = {}
+    for row in rows:
+        for profile, result in row["profiles"].items():
+            total = summary.setdefault(profile, {"files": 0})
+            total["files"] += 1
+            for key, value in result.items():
+                combine = max if key.endswith("_error") else (lambda a, b: a + b)
+                total[key] = combine(total[key], value) if key in total else value
+    return summary
+
+def godot_imports(profile):
+    return profile in PROFILES
+
+def best_profile(summary, max_position_error, max_normal_error):
+    """The smallest profile Godot imports whose errors stay within the limits."""
+    candidates = [(total["bytes"], profile) for profile, total in summary.items()
+                  if godot_imports(profile)
+                  and total.get("position_error", 0.0) * 1000 <= max_position_error
+                  and total.get("normal_error", 0.0) <= max_normal_error]
+    return min(candidates)[1] if candidates else None
+
+def _cell(value, fmt):
+    return "n/a" if value is None else format(value, fmt)
+
+def print_summary(summary, baseline_bytes):
+    headings = ["profile", "godot", "files", "size", "vs none", "load ms", "pos err mm", "normal err °",
+                "uv err tx"]
+    lines = [headings]
+    for profile, total in summary.items():
+        if not godot_imports(profile) and total["files"] < summary[BASELINE]["files"]:
+            # An encoder that failed on some files has no comparable total
+            continue
+        seconds, position = total.get("seconds"), total.get("position_error")
+        lines.append([
+            profile, "yes" if godot_imports(profile) else "no", str(total["files"]),
+            f"{total['bytes'] / 1024:,.1f} KB", f"{total['bytes'] / baseline_bytes:.0%}",
+            _cell(None if seconds is None else seconds * 1000, ".1f"),
+            _cell(None if position is None else position * 1000, ".3f"),
+            _cell(total.get("normal_error"), ".2f"),
+            _cell(total.get("uv_error"), ".3f"),
+        ])
+    widths = [max(len(line[i]) for line in lines) for i in range(len(headings))]
+    for line in lines:
+        print(f"{line[0]:<{widths[0]}}  " + "  ".join(f"{cell:>{width}}"
+                                                     for cell, width in zip(line[1:], widths[1:])))
+
+def print_per_file(rows):
+    width = max([len(row["file"]) for row in rows] + [4])
+    for row in rows:
+        baseline = row["profiles"][BASELINE]["bytes"]
+        cells = "  ".join(f"{profile} {result['bytes'] / baseline:>4.0%}"
+                          for profile, result in row["profiles"].items())
+        print(f"{row['file']:<{width}}  {baseline / 1024:>9,.1f} KB  {cells}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the GLB compression profiles")
+    parser.add_argument("paths", nargs="*", default=[project_path("assets"), project_path("addons")],
+                        help="GLB files or directories (default: the project's assets/ and addons/)")
+    parser.add_argument("--repeat", type=int, default=5, help="load time runs per file, the best counts")
+    parser.add_argument("--max-position-error", type=float, default=1.0,
+                        help="largest acceptable position error in millimeters (default: %(default)s)")
+    parser.add_argument("--max-normal-error", type=float, default=1.0,
+                        help="largest acceptable normal error in degrees (default: %(default)s)")
+    parser.add_argument("--per-file", action="store_true", help="also list the size of every file per profile")
+    parser.add_argument("--json", metavar="FILE", help="also write the full results as JSON")
+    args = parser.parse_args(argv)
+
+    paths = [path for path in find_assets(args.paths) if path.lower().endswith(".glb")]
+    rows, failed = [], []
+    with tempfile.TemporaryDirectory() as directory:
+        for path in paths:
+            name = os.path.relpath(path, PROJECT_DIR).replace(os.sep, "/")
+            try:
+                rows.append({"file": name, "profiles": benchmark_file(path, directory, args.repeat)})
+            except (GlbError, KeyError, ValueError) as e:
+                failed.append(name)
+                print(f"skipped {name}: {e}")
+    if not rows:
+        print("No GLB files to benchmark.")
+        return 1
+
+    summary = summarize(rows)
+    if args.per_file:
+        print_per_file(rows)
+        print()
+    print_summary(summary, summary[BASELINE]["bytes"])
+    missing = [name for name, (command, _extension) in EXTERNAL_ENCODERS.items() if not shutil.which(command[0])]
+    if missing:
+        print(f"not measured (encoder not installed): {', '.join(missing)}")
+    best = best_profile(summary, args.max_position_error, args.max_normal_error)
+    print(f"{len(rows)} file(s); smallest profile within {args.max_position_error} mm and "
+          f"{args.max_normal_error}°: {best or 'none of them'}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": summary, "best": best, "files": rows, "skipped": failed}, f, indent=2)
+            f.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
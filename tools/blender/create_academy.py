@@ -1,308 +1,183 @@
 """
 Blender Python script to create a stylized Duel Academy building.
 Run with: blender --background --python create_academy.py
+Or without Blender: python3 create_academy.py (written through glb_writer)
 """
-import bpy
-import bmesh
 import math
 import os
+import sys
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ao_bake import add_ao_arguments, export_color_options
+from chunking import add_chunk_arguments
+from collision import add_collision_arguments, shapes_to_blender
+from hidden_faces import add_hidden_face_arguments
+from materials import DEFAULT_TOLERANCE, MaterialRegistry
+from mesh_builder import MeshBuilder
+from occlusion import add_occluder_arguments
+from palette import palettize, write_palette_png
+from pipeline import export_builder, parse_args
+
+OUTPUT = "assets/models/buildings/duel_academy.glb"
+SIDECARS = ["_occluder.tres", "_palette.png", "_chunks/*"]
+BUILD_OPTIONS = ["--ao", "--remove-hidden"]
+BLENDER_REQUIRED = False
 
 def clear_scene():
     """Remove all objects from scene"""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete()
 
-def create_material(name, color, metallic=0.0, roughness=0.8):
-    """Create a simple material with given color"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    bsdf = mat.node_tree.nodes["Principled BSDF"]
-    bsdf.inputs["Base Color"].default_value = (*color, 1.0)
-    bsdf.inputs["Metallic"].default_value = metallic
-    bsdf.inputs["Roughness"].default_value = roughness
-    return mat
-
-def create_building_base(width, height, depth, name="BuildingBase"):
-    """Create the main building body with window indents"""
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, height/2))
-    obj = bpy.context.active_object
-    obj.name = name
-    obj.scale = (width, depth, height)
-    bpy.ops.object.transform_apply(scale=True)
-
-    # Add bevel for softer edges
-    bevel = obj.modifiers.new(name="Bevel", type='BEVEL')
-    bevel.width = 0.1
-    bevel.segments = 2
-    bpy.ops.object.modifier_apply(modifier="Bevel")
-
-    return obj
-
-def create_windows_row(building_width, building_depth, y_pos, num_windows=8, window_height=2.5, window_width=1.8):
-    """Create a row of window indents using boolean operations"""
+def create_building_base(builder, width, height, depth, material, name="BuildingBase"):
+    """Create the main building body with beveled edges"""
+    return builder.add_beveled_box(name, (0, 0, height/2), (width/2, depth/2, height/2), material,
+                                   bevel=0.1, segments=2)
+
+def create_windows_row(builder, building_width, building_depth, y_pos, material, num_windows=8,
+                       window_height=2.5, window_width=1.8):
+    """Create a row of window blocks on the front and back faces"""
     windows = []
     spacing = (building_width - 4) / (num_windows + 1)
+    half = (window_width/2, 0.4, window_height/2)
+    # Every window of the row shares one mesh
+    window = builder.component("Window", build_window, half_extents=half, material=material)
 
     for i in range(num_windows):
         x = -building_width/2 + 2 + spacing * (i + 1)
 
         # Front window
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, building_depth/2 + 0.3, y_pos))
-        window = bpy.context.active_object
-        window.scale = (window_width, 0.8, window_height)
-        windows.append(window)
+        windows.append(builder.place(f"Window_{i}_Front", window, (x, building_depth/2 + 0.3, y_pos)))
 
         # Back window
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(x, -building_depth/2 - 0.3, y_pos))
-        window = bpy.context.active_object
-        window.scale = (window_width, 0.8, window_height)
-        windows.append(window)
+        windows.append(builder.place(f"Window_{i}_Back", window, (x, -building_depth/2 - 0.3, y_pos)))
 
     return windows
 
-def create_dome(radius, height, segments=32, location=(0, 0, 0)):
-    """Create a dome/hemisphere"""
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        radius=radius,
-        segments=segments,
-        ring_count=16,
-        location=location
-    )
-    dome = bpy.context.active_object
-    dome.name = "Dome"
-
-    # Cut bottom half
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bm = bmesh.from_edit_mesh(dome.data)
-
-    for v in bm.verts:
-        if v.co.z < 0:
-            v.select = True
+def build_window(builder, half_extents, material):
+    """Component: a window block around the origin"""
+    return builder.add_box("Window", (0, 0, 0), half_extents, material)
 
-    bmesh.update_edit_mesh(dome.data)
-    bpy.ops.mesh.delete(type='VERT')
-    bpy.ops.object.mode_set(mode='OBJECT')
+def build_dome(builder, radius, height, material, segments):
+    """Component: a dome/hemisphere on the origin"""
+    return builder.add_dome("Dome", (0, 0, 0), radius, material, height=height,
+                            segments=segments, rings=8)
 
-    # Scale to make it more dome-like
-    dome.scale.z = height / radius
-    bpy.ops.object.transform_apply(scale=True)
+def create_dome(builder, radius, height, material, segments=32, location=(0, 0, 0)):
+    """Create a dome/hemisphere"""
+    dome = builder.component("Dome", build_dome, radius=radius, height=height, material=material,
+                             segments=segments)
+    return builder.place("Dome", dome, location)
 
-    return dome
+def build_dome_ring(builder, inner_radius, outer_radius, height, material, segments):
+    """Component: a ring/collar around the origin"""
+    return builder.add_ring("DomeRing", (0, 0, 0), inner_radius, outer_radius, height, material, segments)
 
-def create_dome_ring(inner_radius, outer_radius, height, location, segments=32):
+def create_dome_ring(builder, inner_radius, outer_radius, height, location, material, segments=32):
     """Create a ring/collar for the dome"""
-    bpy.ops.mesh.primitive_cylinder_add(
-        radius=outer_radius,
-        depth=height,
-        vertices=segments,
-        location=location
-    )
-    outer = bpy.context.active_object
-    outer.name = "DomeRing"
-
-    # Create inner cutout
-    bpy.ops.mesh.primitive_cylinder_add(
-        radius=inner_radius,
-        depth=height + 0.2,
-        vertices=segments,
-        location=location
-    )
-    inner = bpy.context.active_object
-
-    # Boolean difference
-    bool_mod = outer.modifiers.new(name="Boolean", type='BOOLEAN')
-    bool_mod.operation = 'DIFFERENCE'
-    bool_mod.object = inner
-    bpy.context.view_layer.objects.active = outer
-    bpy.ops.object.modifier_apply(modifier="Boolean")
-
-    # Delete inner
-    bpy.data.objects.remove(inner)
+    ring = builder.component("DomeRing", build_dome_ring, inner_radius=inner_radius,
+                             outer_radius=outer_radius, height=height, material=material, segments=segments)
+    return builder.place("DomeRing", ring, location)
 
-    return outer
-
-def create_pillar(radius, height, location, segments=12):
-    """Create a classical pillar"""
+def build_pillar(builder, radius, height, material, segments):
+    """Component: a classical pillar standing on the origin"""
     # Main shaft
-    bpy.ops.mesh.primitive_cylinder_add(
-        radius=radius,
-        depth=height,
-        vertices=segments,
-        location=(location[0], location[1], location[2] + height/2)
-    )
-    shaft = bpy.context.active_object
-    shaft.name = "PillarShaft"
-
+    builder.add_cylinder("Shaft", (0, 0, height/2), radius, height, material, segments)
     # Base
-    bpy.ops.mesh.primitive_cylinder_add(
-        radius=radius * 1.3,
-        depth=height * 0.08,
-        vertices=segments,
-        location=(location[0], location[1], location[2] + height * 0.04)
-    )
-    base = bpy.context.active_object
-
+    builder.add_cylinder("Base", (0, 0, height * 0.04), radius * 1.3, height * 0.08, material, segments)
     # Capital
-    bpy.ops.mesh.primitive_cylinder_add(
-        radius=radius * 1.4,
-        depth=height * 0.1,
-        vertices=segments,
-        location=(location[0], location[1], location[2] + height - height * 0.05)
-    )
-    capital = bpy.context.active_object
-
-    # Join all parts
-    bpy.ops.object.select_all(action='DESELECT')
-    shaft.select_set(True)
-    base.select_set(True)
-    capital.select_set(True)
-    bpy.context.view_layer.objects.active = shaft
-    bpy.ops.object.join()
+    builder.add_cylinder("Capital", (0, 0, height - height * 0.05), radius * 1.4, height * 0.1,
+                         material, segments)
 
-    return shaft
+def create_pillar(builder, radius, height, location, material, segments=12, name="Pillar"):
+    """Create a classical pillar (built once per size and material, placed as an instance)"""
+    pillar = builder.component("Pillar", build_pillar, radius=radius, height=height, material=material,
+                               segments=segments)
+    return builder.place(name, pillar, location)
 
-def create_trim(width, depth, height, thickness, y_offset):
+def create_trim(builder, width, depth, height, thickness, material):
     """Create decorative trim/molding"""
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, height))
-    trim = bpy.context.active_object
-    trim.name = "Trim"
-    trim.scale = (width + thickness*2, depth + thickness*2, thickness)
-    bpy.ops.object.transform_apply(scale=True)
-
-    # Add bevel
-    bevel = trim.modifiers.new(name="Bevel", type='BEVEL')
-    bevel.width = 0.05
-    bevel.segments = 2
-    bpy.ops.object.modifier_apply(modifier="Bevel")
+    half = ((width + thickness*2) / 2, (depth + thickness*2) / 2, thickness / 2)
+    return builder.add_beveled_box("Trim", (0, 0, height), half, material, bevel=0.05, segments=2)
 
-    return trim
+def build_colored_dome_small(builder, radius, material):
+    """Component: a small squashed sphere around the origin"""
+    return builder.add_uv_sphere("SmallDome", (0, 0, 0), radius, material, segments=24, rings=12, scale_z=0.7)
 
-def create_colored_dome_small(radius, color_name, location):
+def create_colored_dome_small(builder, radius, color_name, location, material):
     """Create a small colored dome (for Ra Yellow, Slifer Red, Obelisk Blue)"""
-    bpy.ops.mesh.primitive_uv_sphere_add(
-        radius=radius,
-        segments=24,
-        ring_count=12,
-        location=location
-    )
-    dome = bpy.context.active_object
-    dome.name = f"Dome_{color_name}"
-    dome.scale.z = 0.7
-    bpy.ops.object.transform_apply(scale=True)
-    return dome
-
-def create_academy_building():
-    """Main function to create the complete academy building"""
-    clear_scene()
+    dome = builder.component("SmallDome", build_colored_dome_small, radius=radius, material=material)
+    return builder.place(f"Dome_{color_name}", dome, location)
 
+def build_academy_building(material_tolerance=DEFAULT_TOLERANCE, palette_png=None):
+    """Build the geometry of the complete academy building"""
     # Materials
-    mat_wall = create_material("Wall", (0.92, 0.9, 0.85), metallic=0.0, roughness=0.9)
-    mat_metal = create_material("Metal", (0.7, 0.72, 0.75), metallic=0.3, roughness=0.4)
-    mat_gold = create_material("Gold", (0.85, 0.7, 0.3), metallic=0.8, roughness=0.3)
-    mat_red = create_material("SliferRed", (0.8, 0.15, 0.1), metallic=0.1, roughness=0.5)
-    mat_yellow = create_material("RaYellow", (0.95, 0.8, 0.2), metallic=0.1, roughness=0.5)
-    mat_blue = create_material("ObeliskBlue", (0.1, 0.3, 0.7), metallic=0.1, roughness=0.5)
-    mat_window = create_material("Window", (0.2, 0.3, 0.4), metallic=0.0, roughness=0.1)
+    materials = MaterialRegistry(material_tolerance)
+    mat_wall = materials.get("Wall", (0.92, 0.9, 0.85), metallic=0.0, roughness=0.9)
+    mat_metal = materials.get("Metal", (0.7, 0.72, 0.75), metallic=0.3, roughness=0.4)
+    mat_gold = materials.get("Gold", (0.85, 0.7, 0.3), metallic=0.8, roughness=0.3)
+    mat_red = materials.get("SliferRed", (0.8, 0.15, 0.1), metallic=0.1, roughness=0.5)
+    mat_yellow = materials.get("RaYellow", (0.95, 0.8, 0.2), metallic=0.1, roughness=0.5)
+    mat_blue = materials.get("ObeliskBlue", (0.1, 0.3, 0.7), metallic=0.1, roughness=0.5)
+    mat_window = materials.get("Window", (0.2, 0.3, 0.4), metallic=0.0, roughness=0.1)
 
-    all_objects = []
+    builder = MeshBuilder()
 
     # Main building - Tier 1 (base)
-    base = create_building_base(55, 14, 35, "Academy_Base")
-    base.data.materials.append(mat_wall)
-    all_objects.append(base)
+    create_building_base(builder, 55, 14, 35, mat_wall, "Academy_Base")
 
     # Tier 2
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 14 + 4))
-    tier2 = bpy.context.active_object
-    tier2.name = "Academy_Tier2"
-    tier2.scale = (45, 28, 8)
-    bpy.ops.object.transform_apply(scale=True)
-    tier2.data.materials.append(mat_metal)
-    all_objects.append(tier2)
+    builder.add_box("Academy_Tier2", (0, 0, 14 + 4), (45/2, 28/2, 8/2), mat_metal)
 
     # Add trim between tiers
-    trim1 = create_trim(55, 35, 14, 0.5, 0)
-    trim1.data.materials.append(mat_metal)
-    all_objects.append(trim1)
-
-    trim2 = create_trim(45, 28, 22, 0.4, 0)
-    trim2.data.materials.append(mat_metal)
-    all_objects.append(trim2)
+    create_trim(builder, 55, 35, 14, 0.5, mat_metal)
+    create_trim(builder, 45, 28, 22, 0.4, mat_metal)
 
     # Tier 3
-    bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 0, 22 + 3))
-    tier3 = bpy.context.active_object
-    tier3.name = "Academy_Tier3"
-    tier3.scale = (35, 22, 6)
-    bpy.ops.object.transform_apply(scale=True)
-    tier3.data.materials.append(mat_metal)
-    all_objects.append(tier3)
+    builder.add_box("Academy_Tier3", (0, 0, 22 + 3), (35/2, 22/2, 6/2), mat_metal)
 
     # Main dome structure - rings
-    ring1 = create_dome_ring(14, 18, 3, (0, 0, 28 + 1.5))
-    ring1.data.materials.append(mat_metal)
-    all_objects.append(ring1)
-
-    ring2 = create_dome_ring(11, 14, 3, (0, 0, 31 + 1.5))
-    ring2.data.materials.append(mat_metal)
-    all_objects.append(ring2)
-
-    ring3 = create_dome_ring(7, 11, 3.5, (0, 0, 34 + 1.75))
-    ring3.data.materials.append(mat_metal)
-    all_objects.append(ring3)
+    create_dome_ring(builder, 14, 18, 3, (0, 0, 28 + 1.5), mat_metal)
+    create_dome_ring(builder, 11, 14, 3, (0, 0, 31 + 1.5), mat_metal)
+    create_dome_ring(builder, 7, 11, 3.5, (0, 0, 34 + 1.75), mat_metal)
 
     # Main dome cap
-    main_dome = create_dome(10, 10, 32, (0, 0, 38))
-    main_dome.data.materials.append(mat_metal)
-    all_objects.append(main_dome)
+    create_dome(builder, 10, 10, mat_metal, 32, (0, 0, 38))
 
     # Colored domes (Ra Yellow, Slifer Red, Obelisk Blue)
-    dome_yellow = create_colored_dome_small(5.5, "RaYellow", (-12, 10, 24))
-    dome_yellow.data.materials.append(mat_yellow)
-    all_objects.append(dome_yellow)
-
-    dome_red = create_colored_dome_small(5.5, "SliferRed", (0, 14, 24))
-    dome_red.data.materials.append(mat_red)
-    all_objects.append(dome_red)
-
-    dome_blue = create_colored_dome_small(5.5, "ObeliskBlue", (12, 10, 24))
-    dome_blue.data.materials.append(mat_blue)
-    all_objects.append(dome_blue)
+    create_colored_dome_small(builder, 5.5, "RaYellow", (-12, 10, 24), mat_yellow)
+    create_colored_dome_small(builder, 5.5, "SliferRed", (0, 14, 24), mat_red)
+    create_colored_dome_small(builder, 5.5, "ObeliskBlue", (12, 10, 24), mat_blue)
 
     # Front pillars
     pillar_positions = [(-14, 16, 0), (-8, 18, 0), (8, 18, 0), (14, 16, 0)]
     for i, pos in enumerate(pillar_positions):
-        pillar = create_pillar(2.0, 18, pos)
-        pillar.name = f"Pillar_{i}"
-        pillar.data.materials.append(mat_metal)
-        all_objects.append(pillar)
+        create_pillar(builder, 2.0, 18, pos, mat_metal, name=f"Pillar_{i}")
 
     # Entrance steps
     for i in range(4):
-        bpy.ops.mesh.primitive_cube_add(size=1, location=(0, 17 + i*2.5, 0.6 + i*1.2))
-        step = bpy.context.active_object
-        step.name = f"Step_{i}"
-        step.scale = (28, 5, 1.2)
-        bpy.ops.object.transform_apply(scale=True)
-        step.data.materials.append(mat_wall)
-        all_objects.append(step)
-
-    # Join all objects
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in all_objects:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = all_objects[0]
-    bpy.ops.object.join()
-
-    final = bpy.context.active_object
-    final.name = "DuelAcademy"
-
-    # Center and apply transforms
-    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
-    final.location = (0, 0, 0)
-
-    return final
+        builder.add_box(f"Step_{i}", (0, 17 + i*2.5, 0.6 + i*1.2), (28/2, 5/2, 1.2/2), mat_wall)
+
+    # Repeated components stay instances; one-off domes and rings join the mesh
+    builder.merge_single_instances()
+    # Center on the bounding box, matching the old ORIGIN_GEOMETRY/BOUNDS step
+    builder.center_on_bounds()
+    print(f"  {len(builder.parts)} parts, {len(builder.instances)} instance(s) of "
+          f"{len(builder.components)} component(s), {builder.triangle_count} triangles stored, "
+          f"{builder.drawn_triangle_count} drawn")
+    materials.report(builder)
+    if palette_png:
+        write_palette_png(palettize(builder, "DuelAcademy_Palette"), palette_png)
+    return builder
+
+def create_academy_building(material_tolerance=DEFAULT_TOLERANCE, palette_png=None):
+    """Main function to create the complete academy building in Blender"""
+    clear_scene()
+    return build_academy_building(material_tolerance, palette_png).to_blender("DuelAcademy")
 
 def export_gltf(filepath):
     """Export scene to glTF"""
@@ -310,23 +185,36 @@ def export_gltf(filepath):
         filepath=filepath,
         export_format='GLB',
         export_materials='EXPORT',
+        # Carries lightmap_size_hint and outline_normals as node extras
+        export_extras=True,
+        # Baked vertex AO
+        **export_color_options(),
         use_selection=True
     )
 
-if __name__ == "__main__":
-    # Create the academy building
-    academy = create_academy_building()
+def configure(parser):
+    add_chunk_arguments(parser)
+    add_collision_arguments(parser)
+    add_occluder_arguments(parser)
+    add_hidden_face_arguments(parser)
+    add_ao_arguments(parser)
+
+def export_blender(builder, shapes, output):
+    """Write the academy and its collision shapes through Blender."""
+    clear_scene()
+    academy = builder.to_blender("DuelAcademy")
+    colliders = shapes_to_blender(shapes)
 
     # Select for export
     bpy.ops.object.select_all(action='DESELECT')
-    academy.select_set(True)
-
-    # Export
-    output_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    output_path = os.path.join(output_dir, "assets", "models", "buildings", "duel_academy.glb")
+    # Pillar instances are children of the academy object
+    for obj in [academy, *academy.children] + colliders:
+        obj.select_set(True)
 
-    # Create output directory if needed
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    export_gltf(output)
 
-    export_gltf(output_path)
-    print(f"Exported to: {output_path}")
+if __name__ == "__main__":
+    args = parse_args(OUTPUT, description="Create the stylized academy building",
+                      configure=configure)
+    builder = build_academy_building(args.material_tolerance, args.palette)
+    export_builder(builder, args, "DuelAcademy", export_blender if bpy else None)
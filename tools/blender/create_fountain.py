@@ -1,164 +1,100 @@
 """
 Blender Python script to create a stylized fountain.
 Run with: blender --background --python create_fountain.py
+Or without Blender: python3 create_fountain.py (written through glb_writer)
 """
-import bpy
-import bmesh
 import math
 import os
+import sys
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from ao_bake import add_ao_arguments, export_color_options
+from collision import add_collision_arguments, shapes_to_blender
+from hidden_faces import add_hidden_face_arguments
+from materials import DEFAULT_TOLERANCE, MaterialRegistry
+from mesh_builder import MeshBuilder
+from palette import palettize, write_palette_png
+from pipeline import export_builder, parse_args
+
+OUTPUT = "assets/models/props/fountain.glb"
+SIDECARS = ["_palette.png"]
+BUILD_OPTIONS = ["--ao", "--remove-hidden"]
+BLENDER_REQUIRED = False
 
 def clear_scene():
     """Remove all objects from scene"""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete()
 
-def create_material(name, color, metallic=0.0, roughness=0.8):
-    """Create a simple material with given color"""
-    mat = bpy.data.materials.new(name=name)
-    mat.use_nodes = True
-    bsdf = mat.node_tree.nodes["Principled BSDF"]
-    bsdf.inputs["Base Color"].default_value = (*color, 1.0)
-    bsdf.inputs["Metallic"].default_value = metallic
-    bsdf.inputs["Roughness"].default_value = roughness
-    return mat
-
-def create_fountain():
-    """Create an ornate fountain"""
-    clear_scene()
+def build_spout(builder, material):
+    """Component: a decorative spout cone around the origin"""
+    return builder.add_cone("Spout", (0, 0, 0), 0.4, 0.1, 0.8, material, segments=8)
 
+def build_fountain(material_tolerance=DEFAULT_TOLERANCE, palette_png=None):
+    """Build the ornate fountain geometry"""
     # Materials
-    mat_stone = create_material("Stone", (0.85, 0.83, 0.8), metallic=0.05, roughness=0.9)
-    mat_water = create_material("Water", (0.3, 0.5, 0.7), metallic=0.0, roughness=0.1)
-    mat_gold = create_material("GoldAccent", (0.85, 0.7, 0.3), metallic=0.8, roughness=0.3)
-
-    all_objects = []
+    materials = MaterialRegistry(material_tolerance)
+    mat_stone = materials.get("Stone", (0.85, 0.83, 0.8), metallic=0.05, roughness=0.9)
+    mat_water = materials.get("Water", (0.3, 0.5, 0.7), metallic=0.0, roughness=0.1)
+    mat_gold = materials.get("GoldAccent", (0.85, 0.7, 0.3), metallic=0.8, roughness=0.3)
 
-    # Base pool - outer ring
-    bpy.ops.mesh.primitive_cylinder_add(radius=8, depth=1.5, vertices=32, location=(0, 0, 0.75))
-    base_outer = bpy.context.active_object
-    base_outer.name = "FountainBaseOuter"
+    builder = MeshBuilder()
 
-    # Add bevel for softer edges
-    bevel = base_outer.modifiers.new(name="Bevel", type='BEVEL')
-    bevel.width = 0.15
-    bevel.segments = 3
-    bpy.ops.object.modifier_apply(modifier="Bevel")
-    base_outer.data.materials.append(mat_stone)
-    all_objects.append(base_outer)
+    # Base pool - outer ring, beveled for softer edges
+    builder.add_cylinder("FountainBaseOuter", (0, 0, 0.75), 8, 1.5, mat_stone, segments=32,
+                         bevel=0.15, bevel_segments=3)
 
     # Base pool - inner (water surface)
-    bpy.ops.mesh.primitive_cylinder_add(radius=7, depth=0.3, vertices=32, location=(0, 0, 1.2))
-    water = bpy.context.active_object
-    water.name = "FountainWater"
-    water.data.materials.append(mat_water)
-    all_objects.append(water)
+    builder.add_cylinder("FountainWater", (0, 0, 1.2), 7, 0.3, mat_water, segments=32)
 
     # Decorative rim
-    bpy.ops.mesh.primitive_torus_add(
-        major_radius=8,
-        minor_radius=0.25,
-        major_segments=32,
-        minor_segments=12,
-        location=(0, 0, 1.5)
-    )
-    rim = bpy.context.active_object
-    rim.name = "FountainRim"
-    rim.data.materials.append(mat_gold)
-    all_objects.append(rim)
+    builder.add_torus("FountainRim", (0, 0, 1.5), 8, 0.25, mat_gold,
+                      major_segments=32, minor_segments=12)
 
     # Central pillar base
-    bpy.ops.mesh.primitive_cylinder_add(radius=1.5, depth=0.8, vertices=8, location=(0, 0, 1.6))
-    pillar_base = bpy.context.active_object
-    pillar_base.name = "PillarBase"
-
-    bevel = pillar_base.modifiers.new(name="Bevel", type='BEVEL')
-    bevel.width = 0.1
-    bevel.segments = 2
-    bpy.ops.object.modifier_apply(modifier="Bevel")
-    pillar_base.data.materials.append(mat_stone)
-    all_objects.append(pillar_base)
+    builder.add_cylinder("PillarBase", (0, 0, 1.6), 1.5, 0.8, mat_stone, segments=8,
+                         bevel=0.1, bevel_segments=2)
 
     # Central pillar shaft
-    bpy.ops.mesh.primitive_cylinder_add(radius=0.8, depth=4, vertices=12, location=(0, 0, 4))
-    pillar = bpy.context.active_object
-    pillar.name = "PillarShaft"
-    pillar.data.materials.append(mat_stone)
-    all_objects.append(pillar)
-
-    # Upper bowl
-    bpy.ops.mesh.primitive_cylinder_add(radius=2.5, depth=1.2, vertices=24, location=(0, 0, 6.6))
-    upper_bowl = bpy.context.active_object
-    upper_bowl.name = "UpperBowl"
-
-    # Taper the bowl
-    bpy.ops.object.mode_set(mode='EDIT')
-    bpy.ops.mesh.select_all(action='DESELECT')
-    bm = bmesh.from_edit_mesh(upper_bowl.data)
-
-    for v in bm.verts:
-        if v.co.z < 0:  # Bottom verts
-            v.co.x *= 0.6
-            v.co.y *= 0.6
-
-    bmesh.update_edit_mesh(upper_bowl.data)
-    bpy.ops.object.mode_set(mode='OBJECT')
-
-    bevel = upper_bowl.modifiers.new(name="Bevel", type='BEVEL')
-    bevel.width = 0.08
-    bevel.segments = 2
-    bpy.ops.object.modifier_apply(modifier="Bevel")
-    upper_bowl.data.materials.append(mat_stone)
-    all_objects.append(upper_bowl)
+    builder.add_cylinder("PillarShaft", (0, 0, 4), 0.8, 4, mat_stone, segments=12)
+
+    # Upper bowl - tapered towards the bottom
+    builder.add_tapered_cylinder("UpperBowl", (0, 0, 6.6), 2.5 * 0.6, 2.5, 1.2, mat_stone,
+                                 segments=24, bevel=0.08, bevel_segments=2)
 
     # Upper bowl water
-    bpy.ops.mesh.primitive_cylinder_add(radius=2.2, depth=0.2, vertices=24, location=(0, 0, 7.0))
-    upper_water = bpy.context.active_object
-    upper_water.name = "UpperWater"
-    upper_water.data.materials.append(mat_water)
-    all_objects.append(upper_water)
+    builder.add_cylinder("UpperWater", (0, 0, 7.0), 2.2, 0.2, mat_water, segments=24)
 
     # Top ornament - sphere
-    bpy.ops.mesh.primitive_uv_sphere_add(radius=1.0, segments=16, ring_count=12, location=(0, 0, 8.2))
-    orb = bpy.context.active_object
-    orb.name = "TopOrb"
-    orb.data.materials.append(mat_gold)
-    all_objects.append(orb)
+    builder.add_uv_sphere("TopOrb", (0, 0, 8.2), 1.0, mat_gold, segments=16, rings=12)
 
-    # Decorative spouts around the base (4 positions)
+    # Decorative spouts around the base (4 positions, one shared mesh)
+    spout = builder.component("Spout", build_spout, material=mat_gold)
     for i in range(4):
         angle = math.pi/4 + i * math.pi/2
         x = math.cos(angle) * 6.5
         y = math.sin(angle) * 6.5
 
-        bpy.ops.mesh.primitive_cone_add(
-            radius1=0.4,
-            radius2=0.1,
-            depth=0.8,
-            vertices=8,
-            location=(x, y, 1.8)
-        )
-        spout = bpy.context.active_object
-        spout.name = f"Spout_{i}"
-        # Rotate to point outward
-        spout.rotation_euler = (math.pi/2, 0, angle + math.pi)
-        spout.data.materials.append(mat_gold)
-        all_objects.append(spout)
-
-    # Join all objects
-    bpy.ops.object.select_all(action='DESELECT')
-    for obj in all_objects:
-        obj.select_set(True)
-    bpy.context.view_layer.objects.active = all_objects[0]
-    bpy.ops.object.join()
-
-    final = bpy.context.active_object
-    final.name = "Fountain"
+        # Rotated to point outward
+        builder.place(f"Spout_{i}", spout, (x, y, 1.8), rotation=(math.pi/2, 0, angle + math.pi))
 
-    # Center and apply transforms
-    bpy.ops.object.origin_set(type='ORIGIN_GEOMETRY', center='BOUNDS')
-    final.location = (0, 0, 0)
+    builder.merge_single_instances()
+    # Center on the bounding box, matching the old ORIGIN_GEOMETRY/BOUNDS step
+    builder.center_on_bounds()
+    materials.report(builder)
+    if palette_png:
+        write_palette_png(palettize(builder, "Fountain_Palette"), palette_png)
+    return builder
 
-    return final
+def create_fountain(material_tolerance=DEFAULT_TOLERANCE, palette_png=None):
+    """Create an ornate fountain in Blender"""
+    clear_scene()
+    return build_fountain(material_tolerance, palette_png).to_blender("Fountain")
 
 def export_gltf(filepath):
     """Export scene to glTF"""
@@ -166,18 +102,33 @@ def export_gltf(filepath):
         filepath=filepath,
         export_format='GLB',
         export_materials='EXPORT',
+        # Carries lightmap_size_hint and outline_normals as node extras
+        export_extras=True,
+        # Baked vertex AO
+        **export_color_options(),
         use_selection=True
     )
 
-if __name__ == "__main__":
-    fountain = create_fountain()
+def configure(parser):
+    # A prop: one convex decomposition instead of a shape per primitive
+    add_collision_arguments(parser, default="convex")
+    add_hidden_face_arguments(parser)
+    add_ao_arguments(parser)
+
+def export_blender(builder, shapes, output):
+    """Write the fountain and its collision shapes through Blender."""
+    clear_scene()
+    fountain = builder.to_blender("Fountain")
+    colliders = shapes_to_blender(shapes)
 
     bpy.ops.object.select_all(action='DESELECT')
-    fountain.select_set(True)
+    # Spout instances are children of the fountain object
+    for obj in [fountain, *fountain.children] + colliders:
+        obj.select_set(True)
 
-    output_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    output_path = os.path.join(output_dir, "assets", "models", "props", "fountain.glb")
+    export_gltf(output)
 
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    export_gltf(output_path)
-    print(f"Exported to: {output_path}")
+if __name__ == "__main__":
+    args = parse_args(OUTPUT, description="Create the stylized fountain", configure=configure)
+    builder = build_fountain(args.material_tolerance, args.palette)
+    export_builder(builder, args, "Fountain", export_blender if bpy else None)
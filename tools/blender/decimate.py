@@ -0,0 +1,189 @@
+"""
+Quadric error metric (Garland-Heckbert) mesh simplification with numpy.
+
+Vertices are welded by position, then edges are collapsed cheapest first
+until the mesh reaches a target triangle count or the next collapse would
+move the surface further than a maximum error (meters). Open boundaries and
+the borders between primitives carry extra constraint planes, so outlines
+and silhouettes survive longer than interior detail. Collapses that would
+flip a triangle or make the mesh non-manifold are rejected.
+
+Surviving triangles keep their original corner order and are returned with
+the index of the source triangle, so per-corner attributes (normals, UVs,
+colors) can be carried over unchanged. For palette and colormap textured
+assets that keeps every face sampling its original color.
+"""
+import heapq
+import math
+
+import numpy as np
+
+# Weight of the planes that pin open boundaries in place
+BOUNDARY_WEIGHT = 10.0
+# Smallest cosine between a triangle's normal before and after a collapse
+MIN_NORMAL_DOT = 0.2
+
+def weld(positions, triangles, decimals=6):
+    """Merge coincident vertices; returns (positions, triangles)."""
+    keys = np.round(np.asarray(positions, dtype=np.float64), decimals)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return np.asarray(positions, dtype=np.float64)[first], inverse.ravel()[triangles]
+
+def _plane_quadric(normal, point, weight=1.0):
+    plane = np.append(normal, -np.dot(normal, point))
+    return weight * np.outer(plane, plane)
+
+def _vertex_quadrics(positions, triangles):
+    """Sum of squared-distance quadrics of each vertex's face and boundary planes."""
+    quadrics = np.zeros((len(positions), 4, 4))
+    a, b, c = (positions[triangles[:, i]] for i in range(3))
+    normals = np.cross(b - a, c - a)
+    lengths = np.linalg.norm(normals, axis=1)
+    normals = normals / np.maximum(lengths, 1e-20)[:, None]
+    planes = np.hstack([normals, -np.einsum("ij,ij->i", normals, a)[:, None]])
+    face_quadrics = planes[:, :, None] * planes[:, None, :]
+    for corner in range(3):
+        np.add.at(quadrics, triangles[:, corner], face_quadrics)
+
+    # Edges used by a single triangle are boundaries
+    edges = np.sort(np.concatenate([triangles[:, [0, 1]], triangles[:, [1, 2]], triangles[:, [2, 0]]]), axis=1)
+    owners = np.tile(np.arange(len(triangles)), 3)
+    unique, index, counts = np.unique(edges, axis=0, return_index=True, return_counts=True)
+    for (v0, v1), face in zip(unique[counts == 1], owners[index[counts == 1]]):
+        edge = positions[v1] - positions[v0]
+        side = np.cross(edge, normals[face])
+        length = np.linalg.norm(side)
+        if length > 1e-20:
+            quadric = _plane_quadric(side / length, positions[v0], BOUNDARY_WEIGHT)
+            quadrics[v0] += quadric
+            quadrics[v1] += quadric
+    return quadrics
+
+def _collapse_target(quadric, p0, p1):
+    """Position minimizing the quadric (falls back to the ends or midpoint) and its cost."""
+    candidates = [p0, p1, (p0 + p1) / 2]
+    system = quadric[:3, :3]
+    if abs(np.linalg.det(system)) > 1e-10:
+        optimum = np.linalg.solve(system, -quadric[:3, 3])
+        # Far away optima come from near-degenerate systems; stay near the edge
+        if np.linalg.norm(optimum - candidates[2]) <= np.linalg.norm(p1 - p0) * 2:
+            candidates.append(optimum)
+    best, best_cost = None, math.inf
+    for point in candidates:
+        h = np.append(point, 1.0)
+        cost = max(float(h @ quadric @ h), 0.0)
+        if cost < best_cost:
+            best, best_cost = point, cost
+    return best, best_cost
+
+def simplify(positions, triangles, target_triangles=0, max_error=math.inf):
+    """Collapse edges until target_triangles remain or max_error (meters) is reached.
+
+    Returns (positions, triangles, source_triangles): the welded, compacted
+    result and, per output triangle, the index of the input triangle it came
+    from (same corner order).
+    """
+    positions, triangles = weld(positions, np.asarray(triangles, dtype=np.int64).reshape(-1, 3))
+    valid = (triangles[:, 0] != triangles[:, 1]) & (triangles[:, 1] != triangles[:, 2]) \
+        & (triangles[:, 2] != triangles[:, 0])
+    source = np.flatnonzero(valid)
+    triangles = triangles[valid]
+    if len(triangles) <= target_triangles:
+        return positions, triangles, source
+
+    quadrics = list(_vertex_quadrics(positions, triangles))
+    points = [p for p in positions]
+    faces = [list(t) for t in triangles]
+    alive = [True] * len(faces)
+    vertex_faces = [set() for _ in points]
+    for f, tri in enumerate(faces):
+        for v in tri:
+            vertex_faces[v].add(f)
+    version = [0] * len(points)
+    max_cost = max_error ** 2 if math.isfinite(max_error) else math.inf
+
+    def neighbors(v):
+        return {u for f in vertex_faces[v] for u in faces[f]} - {v}
+
+    heap = []
+
+    def push(v0, v1):
+        v0, v1 = min(v0, v1), max(v0, v1)
+        target, cost = _collapse_target(quadrics[v0] + quadrics[v1], points[v0], points[v1])
+        heapq.heappush(heap, (cost, v0, v1, version[v0], version[v1], target))
+
+    for v0 in range(len(points)):
+        for v1 in neighbors(v0):
+            if v0 < v1:
+                push(v0, v1)
+
+    def flips(v, other, target):
+        for f in vertex_faces[v]:
+            tri = faces[f]
+            if other in tri:
+                continue  # Removed by the collapse
+            corners = [points[u] for u in tri]
+            before = np.cross(corners[1] - corners[0], corners[2] - corners[0])
+            corners[tri.index(v)] = target
+            after = np.cross(corners[1] - corners[0], corners[2] - corners[0])
+            norm = np.linalg.norm(before) * np.linalg.norm(after)
+            if norm < 1e-20 or np.dot(before, after) / norm < MIN_NORMAL_DOT:
+                return True
+        return False
+
+    remaining = len(faces)
+    while heap and remaining > target_triangles:
+        cost, v0, v1, ver0, ver1, target = heapq.heappop(heap)
+        if cost > max_cost:
+            break
+        if version[v0] != ver0 or version[v1] != ver1:
+            continue  # Stale entry; the vertex changed since it was pushed
+        shared = vertex_faces[v0] & vertex_faces[v1]
+        # Link condition: the edge's only common neighbors are its opposite corners
+        if len(neighbors(v0) & neighbors(v1)) != len(shared):
+            continue
+        if flips(v0, v1, target) or flips(v1, v0, target):
+            continue
+
+        for f in shared:
+            alive[f] = False
+            remaining -= 1
+            for u in faces[f]:
+                vertex_faces[u].discard(f)
+        for f in vertex_faces[v1]:
+            faces[f][faces[f].index(v1)] = v0
+        vertex_faces[v0] |= vertex_faces[v1]
+        vertex_faces[v1] = set()
+        points[v0] = target
+        quadrics[v0] = quadrics[v0] + quadrics[v1]
+        version[v0] += 1
+        version[v1] += 1
+        for u in neighbors(v0):
+            push(v0, u)
+
+    kept = [f for f in range(len(faces)) if alive[f]]
+    result = np.array([faces[f] for f in kept], dtype=np.int64).reshape(-1, 3)
+    used, remapped = np.unique(result, return_inverse=True)
+    return (np.array(points)[used] if len(used) else np.zeros((0, 3)),
+            remapped.reshape(-1, 3), source[np.array(kept, dtype=np.int64)])
+
+def component_sizes(positions, triangles):
+    """Bounding box diagonal of the connected piece each triangle belongs to."""
+    labels = np.arange(len(positions))
+    while True:
+        # Propagate the smallest label across every triangle until stable
+        smallest = labels[triangles].min(axis=1)
+        updated = labels.copy()
+        for corner in range(3):
+            np.minimum.at(updated, triangles[:, corner], smallest)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    face_labels = labels[triangles[:, 0]]
+    sizes = np.zeros(len(triangles))
+    for label in np.unique(face_labels):
+        members = face_labels == label
+        points = positions[triangles[members].ravel()]
+        sizes[members] = np.linalg.norm(points.max(axis=0) - points.min(axis=0))
+    return sizes
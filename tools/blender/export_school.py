@@ -2,18 +2,24 @@
 """
 Export the Haruhi School model to GLB format.
 Run with: blender "path/to/file.blend" --background --python export_school.py
+
+Any .blend can be converted the same way by passing an output path:
+    blender file.blend --background --python export_school.py -- --output out.glb
+build_assets.py --blend uses this to batch-convert .blend files.
 """
 
 import bpy
 import os
+import sys
 
-def export_to_glb():
-    output_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-    output_path = os.path.join(output_dir, "assets", "models", "buildings", "anime_school.glb")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from compression import compress_exported
+from lightmap_uv import unwrap_exported
+from pipeline import parse_args
 
-    # Ensure directory exists
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+DEFAULT_OUTPUT = "assets/models/buildings/anime_school.glb"
 
+def export_to_glb(output_path):
     print(f"Exporting to: {output_path}")
 
     # Select all mesh objects
@@ -31,4 +37,8 @@ def export_to_glb():
     print(f"Export complete: {output_path}")
 
 if __name__ == "__main__":
-    export_to_glb()
+    args = parse_args(DEFAULT_OUTPUT, description="Export the open .blend file as GLB")
+    export_to_glb(args.output)
+    if args.lightmap_texel_size:
+        unwrap_exported(args.output, args.lightmap_texel_size)
+    compress_exported(args.output, args.compression)
@@ -0,0 +1,233 @@
+"""
+Explicit LOD chains for GLB models, no Blender needed.
+
+Every mesh node gets child nodes "<node>_LOD1" .. "<node>_LODn" holding
+simplified copies of its mesh (see decimate.py). Each level is simplified
+until the next collapse would be visible: the allowed error is the size of
+--pixel-error pixels at the level's distance, and connected pieces smaller
+than --min-pixels disappear. --ratios overrides that with fixed triangle
+ratios per level.
+
+The levels' distances go into the node extras, which
+scripts/tools/model_post_import.gd turns into visibility ranges on import. The
+asset's .import file is switched to that script with meshes/generate_lods
+off, so Godot imports the chain as is instead of re-simplifying.
+
+Run with:
+    python3 generate_lods.py ../../assets/models/buildings/duel_academy.glb
+    python3 generate_lods.py ../../assets/models/buildings/kenney/*.glb --report lods.json
+"""
+import argparse
+import json
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from decimate import component_sizes, simplify, weld
+from glb_reader import (GlbError, accessor_array, add_file_arguments, is_collision_only,
+                        mesh_instances, normalized_attributes, read_glb, run_on_files)
+from glb_writer import GlbDocument, weld_corners
+from godot_import import use_post_import
+
+DEFAULT_DISTANCES = (30.0, 80.0, 200.0)
+DEFAULT_PIXEL_ERROR = 2.0
+DEFAULT_MIN_PIXELS = 4.0
+# Camera used to turn pixels into meters
+DEFAULT_FOV = 75.0
+DEFAULT_SCREEN_HEIGHT = 1080
+# Cross-fade margin as a fraction of each switch distance
+FADE_MARGIN = 0.1
+
+def meters_per_pixel(distance, fov=DEFAULT_FOV, screen_height=DEFAULT_SCREEN_HEIGHT):
+    """Size of one screen pixel at a distance from the camera."""
+    return distance * 2 * math.tan(math.radians(fov) / 2) / screen_height
+
+def _primitive_triangles(gltf, binary, primitive):
+    if "indices" in primitive:
+        indices = accessor_array(gltf, binary, primitive["indices"]).astype(np.int64)
+    else:
+        count = gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]
+        indices = np.arange(count)
+    return indices.reshape(-1, 3)
+
+def simplify_primitive(gltf, binary, primitive, max_error, min_size, ratio=None):
+    """A simplified copy of a triangle primitive for GlbDocument.add_mesh, or None if nothing is left.
+
+    TANGENT is dropped (Godot regenerates it); other attributes are copied
+    per corner from the source triangles.
+    """
+    triangles = _primitive_triangles(gltf, binary, primitive)
+    attributes = {semantic: accessor_array(gltf, binary, index)
+                  for semantic, index in primitive["attributes"].items() if semantic != "TANGENT"}
+    positions = attributes["POSITION"].astype(np.float64)
+    if min_size > 0 and len(triangles):
+        triangles = triangles[component_sizes(*weld(positions, triangles)) >= min_size]
+
+    target = int(len(triangles) * ratio) if ratio is not None else 0
+    error = math.inf if ratio is not None else max_error
+    new_positions, new_triangles, source = simplify(positions, triangles, target, error)
+    if not len(new_triangles):
+        return None
+
+    corners = triangles[source].ravel()
+    corner_attributes = {semantic: array[corners] for semantic, array in attributes.items()}
+    corner_attributes["POSITION"] = new_positions[new_triangles.ravel()].astype(np.float32)
+    # Weld corners that ended up identical in every attribute
+    attributes, indices = weld_corners(corner_attributes)
+    return {
+        "attributes": attributes,
+        "indices": indices,
+        "material": primitive.get("material"),
+        "normalized": normalized_attributes(gltf, primitive),
+    }
+
+def _lod_capable(gltf, mesh_index):
+    # Meshes with points/lines, skinned or morphed primitives are left alone
+    return all(p.get("mode", 4) == 4 and "targets" not in p and "JOINTS_0" not in p["attributes"]
+               for p in gltf["meshes"][mesh_index]["primitives"])
+
+def mesh_scales(gltf, binary):
+    """Largest world-space scale each mesh is drawn at, so errors can be given in meters."""
+    scales = {}
+    for _node, mesh, world in mesh_instances(gltf, binary):
+        scale = float(np.linalg.norm(world[:3, :3], axis=0).max())
+        scales[mesh] = max(scales.get(mesh, 0.0), scale)
+    return scales
+
+def mesh_triangles(gltf, binary, mesh_index):
+    return sum(len(_primitive_triangles(gltf, binary, p))
+               for p in gltf["meshes"][mesh_index]["primitives"])
+
+def generate_lods(filepath, output, distances=DEFAULT_DISTANCES, pixel_error=DEFAULT_PIXEL_ERROR,
+                  min_pixels=DEFAULT_MIN_PIXELS, ratios=None, fov=DEFAULT_FOV,
+                  screen_height=DEFAULT_SCREEN_HEIGHT):
+    """Write filepath with LOD nodes to output; returns the per-level report rows."""
+    gltf, binary = read_glb(filepath)
+    nodes = gltf.get("nodes", [])
+    if any("lod" in node.get("extras", {}) for node in nodes):
+        raise GlbError(f"{filepath}: already has LOD nodes; regenerate the source model first")
+    document = GlbDocument.from_glb(gltf, binary)
+
+    mesh_nodes = [i for i, node in enumerate(nodes) if "mesh" in node and not is_collision_only(node)]
+    report = [{"lod": 0, "distance": 0.0,
+               "triangles": sum(mesh_triangles(gltf, binary, nodes[i]["mesh"]) for i in mesh_nodes)}]
+    # Simplify each mesh once per level, however many nodes use it
+    lod_meshes = {}
+    scales = mesh_scales(gltf, binary)
+    for level, distance in enumerate(distances, start=1):
+        max_error = meters_per_pixel(distance, fov, screen_height) * pixel_error
+        min_size = meters_per_pixel(distance, fov, screen_height) * min_pixels
+        ratio = ratios[level - 1] if ratios else None
+        triangles = 0
+        for mesh_index in sorted({nodes[i]["mesh"] for i in mesh_nodes}):
+            mesh = gltf["meshes"][mesh_index]
+            if not _lod_capable(gltf, mesh_index):
+                lod_meshes[mesh_index, level] = None
+                continue
+            scale = scales.get(mesh_index, 1.0) or 1.0
+            primitives = [simplify_primitive(gltf, binary, p, max_error / scale, min_size / scale, ratio)
+                          for p in mesh["primitives"]]
+            primitives = [p for p in primitives if p is not None]
+            lod_meshes[mesh_index, level] = (document.add_mesh(
+                f"{mesh.get('name', 'Mesh')}_LOD{level}", primitives, blender_axes=False)
+                if primitives else None)
+        for i in mesh_nodes:
+            lod_mesh = lod_meshes[nodes[i]["mesh"], level]
+            if lod_mesh is not None:
+                triangles += mesh_triangles(document.gltf, document.binary, lod_mesh)
+            elif not _lod_capable(gltf, nodes[i]["mesh"]):
+                triangles += mesh_triangles(gltf, binary, nodes[i]["mesh"])
+        report.append({"lod": level, "distance": distance, "triangles": triangles})
+
+    for i in mesh_nodes:
+        node = nodes[i]
+        if not _lod_capable(gltf, node["mesh"]):
+            continue
+        # Levels simplified away entirely get no node: the model is culled there
+        node.setdefault("extras", {}).update(_visibility_extras(0, distances))
+        children = []
+        for level in range(1, len(distances) + 1):
+            mesh = lod_meshes[node["mesh"], level]
+            if mesh is None:
+                continue
+            child = {"name": f"{node.get('name', 'Node')}_LOD{level}", "mesh": mesh,
+                     "extras": _visibility_extras(level, distances)}
+            if "EXT_mesh_gpu_instancing" in node.get("extensions", {}):
+                child["extensions"] = {"EXT_mesh_gpu_instancing": node["extensions"]["EXT_mesh_gpu_instancing"]}
+            children.append(document._append("nodes", child))
+        node["children"] = node.get("children", []) + children
+
+    document.write(output)
+    return report
+
+def _visibility_extras(level, distances):
+    """Node extras read by model_post_import.gd: visibility range and fade margins."""
+    begin = distances[level - 1] if level > 0 else 0.0
+    end = distances[level] if level < len(distances) else 0.0
+    return {
+        "lod": level,
+        "visibility_range_begin": begin,
+        "visibility_range_begin_margin": begin * FADE_MARGIN,
+        "visibility_range_end": end,
+        "visibility_range_end_margin": end * FADE_MARGIN,
+    }
+
+def use_lod_import(asset_path):
+    """Point an asset's .import at the post-import script with auto LODs off."""
+    return use_post_import(asset_path, {"meshes/generate_lods": False})
+
+def print_report(name, report):
+    print(name)
+    full = report[0]["triangles"] or 1
+    for row in report:
+        print(f"  LOD{row['lod']}  {row['distance']:>6.0f}m  {row['triangles']:>7} tris "
+              f"({100 * row['triangles'] / full:.0f}%)")
+
+def _float_list(text):
+    return [float(value) for value in text.split(",") if value]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write explicit LOD chains into GLB files")
+    add_file_arguments(parser)
+    parser.add_argument("--distances", type=_float_list, default=list(DEFAULT_DISTANCES),
+                        help="comma separated switch distance of each LOD level in meters "
+                             "(default: %(default)s)")
+    parser.add_argument("--pixel-error", type=float, default=DEFAULT_PIXEL_ERROR,
+                        help="allowed screen-space error in pixels (default: %(default)s)")
+    parser.add_argument("--min-pixels", type=float, default=DEFAULT_MIN_PIXELS,
+                        help="drop pieces smaller than this many pixels (default: %(default)s)")
+    parser.add_argument("--ratios", type=_float_list,
+                        help="comma separated triangle ratio per level instead of the error threshold")
+    parser.add_argument("--fov", type=float, default=DEFAULT_FOV,
+                        help="vertical camera field of view in degrees (default: %(default)s)")
+    parser.add_argument("--screen-height", type=int, default=DEFAULT_SCREEN_HEIGHT,
+                        help="screen height in pixels (default: %(default)s)")
+    parser.add_argument("--report", help="also write the triangle report as JSON here")
+    args = parser.parse_args(argv)
+
+    distances = sorted(args.distances)
+    if args.ratios and len(args.ratios) != len(distances):
+        parser.error("--ratios needs one value per distance")
+
+    reports = {}
+
+    def process(filepath, output):
+        report = generate_lods(filepath, output, distances, args.pixel_error, args.min_pixels,
+                               args.ratios, args.fov, args.screen_height)
+        reports[os.path.basename(filepath)] = report
+        print_report(os.path.basename(filepath), report)
+        if output == filepath:
+            use_lod_import(filepath)
+
+    status = run_on_files(args, process)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(reports, f, indent=2)
+            f.write("\n")
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Minimal binary glTF (GLB) reader, no Blender needed.
+"""
+import json
+import os
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+COMPONENT_DTYPES = {
+    5120: np.int8,
+    5121: np.uint8,
+    5122: np.int16,
+    5123: np.uint16,
+    5125: np.uint32,
+    5126: np.float32,
+}
+ACCESSOR_COMPONENTS = {"SCALAR": 1, "VEC2": 2, "VEC3": 3, "VEC4": 4, "MAT2": 4, "MAT3": 9, "MAT4": 16}
+# Godot turns nodes with these name suffixes into physics shapes without a render mesh
+COLLISION_ONLY_SUFFIXES = ("-colonly", "-convcolonly")
+
+class GlbError(ValueError):
+    """Raised for files that are not valid GLB containers."""
+
+def read_glb_json(filepath):
+    """Parse only the JSON chunk of a GLB file."""
+    with open(filepath, "rb") as f:
+        header = f.read(20)
+        if len(header) < 20:
+            raise GlbError(f"{filepath}: truncated GLB header")
+        magic, version, _length, chunk_length, chunk_type = struct.unpack("<IIIII", header)
+        if magic != GLB_MAGIC or version != 2 or chunk_type != CHUNK_JSON:
+            raise GlbError(f"{filepath}: not a glTF 2.0 binary file")
+        return json.loads(f.read(chunk_length))
+
+def read_glb(filepath):
+    """Parse a GLB file into its JSON dict and BIN chunk bytes (b"" when absent)."""
+    with open(filepath, "rb") as f:
+        data = f.read()
+    if len(data) < 20:
+        raise GlbError(f"{filepath}: truncated GLB header")
+    magic, version, _length = struct.unpack_from("<III", data)
+    if magic != GLB_MAGIC or version != 2:
+        raise GlbError(f"{filepath}: not a glTF 2.0 binary file")
+    gltf, binary = None, b""
+    offset = 12
+    while offset + 8 <= len(data):
+        chunk_length, chunk_type = struct.unpack_from("<II", data, offset)
+        chunk = data[offset + 8:offset + 8 + chunk_length]
+        if chunk_type == CHUNK_JSON:
+            gltf = json.loads(chunk)
+        elif chunk_type == CHUNK_BIN:
+            binary = chunk
+        offset += 8 + chunk_length
+    if gltf is None:
+        raise GlbError(f"{filepath}: missing JSON chunk")
+    if len(gltf.get("buffers", [])) > 1 or any("uri" in b for b in gltf.get("buffers", [])):
+        raise GlbError(f"{filepath}: only the embedded GLB buffer is supported")
+    return gltf, binary
+
+def accessor_array(gltf, binary, index):
+    """An accessor's data as a (count, components) numpy array (count,) for scalars."""
+    accessor = gltf["accessors"][index]
+    if "sparse" in accessor or "bufferView" not in accessor:
+        raise GlbError(f"accessor {index}: sparse or empty accessors are not supported")
+    view = gltf["bufferViews"][accessor["bufferView"]]
+    dtype = np.dtype(COMPONENT_DTYPES[accessor["componentType"]]).newbyteorder("<")
+    components = ACCESSOR_COMPONENTS[accessor["type"]]
+    count = accessor["count"]
+    offset = view.get("byteOffset", 0) + accessor.get("byteOffset", 0)
+    stride = view.get("byteStride", dtype.itemsize * components)
+    raw = np.frombuffer(binary, dtype=np.uint8, count=stride * (count - 1) + dtype.itemsize * components,
+                        offset=offset) if count else np.zeros(0, dtype=np.uint8)
+    rows = np.lib.stride_tricks.as_strided(raw, shape=(count, dtype.itemsize * components),
+                                           strides=(stride, 1)) if count else raw.reshape(0, 0)
+    array = np.ascontiguousarray(rows).view(dtype).reshape(count, components)
+    return array[:, 0] if components == 1 else array
+
+def accessor_floats(gltf, binary, index):
+    """An accessor's data as float32, with normalized integers (KHR_mesh_quantization, colors) scaled back."""
+    array = accessor_array(gltf, binary, index)
+    if gltf["accessors"][index].get("normalized"):
+        # Signed values map -max..max to -1..1, with the one extra negative value clamped
+        return np.maximum(array.astype(np.float32) / np.iinfo(array.dtype).max, -1.0)
+    return array.astype(np.float32)
+
+def trs_matrix(translation=(0.0, 0.0, 0.0), rotation=(0.0, 0.0, 0.0, 1.0), scale=(1.0, 1.0, 1.0)):
+    """4x4 matrix of a glTF translation, (x, y, z, w) rotation quaternion and scale."""
+    x, y, z, w = rotation
+    matrix = np.eye(4)
+    matrix[:3, :3] = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ]) * np.asarray(scale, dtype=np.float64)
+    matrix[:3, 3] = translation
+    return matrix
+
+def node_matrix(node):
+    """A node's local transform as a 4x4 matrix."""
+    if "matrix" in node:
+        return np.array(node["matrix"], dtype=np.float64).reshape(4, 4).T
+    return trs_matrix(node.get("translation", (0.0, 0.0, 0.0)),
+                      node.get("rotation", (0.0, 0.0, 0.0, 1.0)),
+                      node.get("scale", (1.0, 1.0, 1.0)))
+
+def mesh_instances(gltf, binary=b""):
+    """(node index, mesh index, world matrix) for every mesh drawn by the default scene.
+
+    EXT_mesh_gpu_instancing nodes yield one entry per instance (their
+    accessors are read from binary).
+    """
+    nodes = gltf.get("nodes", [])
+    scenes = gltf.get("scenes", [])
+    roots = scenes[gltf.get("scene", 0)].get("nodes", []) if scenes else []
+    instances = []
+    stack = [(i, np.eye(4)) for i in reversed(roots)]
+    while stack:
+        index, parent = stack.pop()
+        node = nodes[index]
+        world = parent @ node_matrix(node)
+        if "mesh" in node and not is_collision_only(node):
+            gpu = node.get("extensions", {}).get("EXT_mesh_gpu_instancing")
+            if gpu:
+                attributes = {name: accessor_array(gltf, binary, accessor)
+                              for name, accessor in gpu.get("attributes", {}).items()}
+                count = len(next(iter(attributes.values()))) if attributes else 0
+                for i in range(count):
+                    local = trs_matrix(
+                        attributes["TRANSLATION"][i] if "TRANSLATION" in attributes else (0.0, 0.0, 0.0),
+                        attributes["ROTATION"][i] if "ROTATION" in attributes else (0.0, 0.0, 0.0, 1.0),
+                        attributes["SCALE"][i] if "SCALE" in attributes else (1.0, 1.0, 1.0))
+                    instances.append((index, node["mesh"], world @ local))
+            else:
+                instances.append((index, node["mesh"], world))
+        stack.extend((child, world) for child in reversed(node.get("children", [])))
+    return instances
+
+def normalized_attributes(gltf, primitive):
+    """Semantics of a primitive's integer attributes stored normalized."""
+    return {semantic for semantic, index in primitive["attributes"].items()
+            if gltf["accessors"][index].get("normalized")}
+
+def is_collision_only(node):
+    return node.get("name", "").endswith(COLLISION_ONLY_SUFFIXES)
+
+def surface_count(gltf):
+    """Primitives drawn for one instance of the scene, i.e. draw calls in Godot."""
+    meshes = gltf.get("meshes", [])
+    return sum(len(meshes[node["mesh"]]["primitives"])
+               for node in gltf.get("nodes", []) if "mesh" in node and not is_collision_only(node))
+
+def add_file_arguments(parser, verb="process"):
+    """The files and --output-dir arguments shared by the tools that rewrite GLBs."""
+    parser.add_argument("files", nargs="+", help=f"GLB files to {verb} (in place by default)")
+    parser.add_argument("--output-dir", help="write results here instead of overwriting the inputs")
+
+def run_on_files(args, process):
+    """Call process(filepath, output) for every file of add_file_arguments; returns the exit code.
+
+    A file that raises GlbError is reported and skipped, and the exit code is 1.
+    """
+    failed = False
+    for filepath in args.files:
+        output = filepath
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            output = os.path.join(args.output_dir, os.path.basename(filepath))
+        try:
+            process(filepath, output)
+        except GlbError as e:
+            print(f"error: {e}")
+            failed = True
+    return 1 if failed else 0
@@ -0,0 +1,424 @@
+"""
+Minimal binary glTF 2.0 (GLB) writer built on numpy, no Blender needed.
+
+Writes a single little-endian BIN chunk with 4-byte aligned buffer views,
+accessors with min/max bounds and one primitive per material. Input
+coordinates are Blender's (Z up) and are converted to glTF's Y-up axes, the
+same as the Blender exporter's default +Y Up option. Output is deterministic:
+the same input arrays always produce the same bytes.
+"""
+import json
+import struct
+
+import numpy as np
+
+GLB_MAGIC = 0x46546C67
+CHUNK_JSON = 0x4E4F534A
+CHUNK_BIN = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+
+NEAREST = 9728
+NEAREST_MIPMAP_NEAREST = 9984
+CLAMP_TO_EDGE = 33071
+
+COMPONENT_TYPES = {
+    np.dtype(np.int8): 5120,
+    np.dtype(np.uint8): 5121,
+    np.dtype(np.int16): 5122,
+    np.dtype(np.uint16): 5123,
+    np.dtype(np.uint32): 5125,
+    np.dtype(np.float32): 5126,
+}
+# Texture coordinate sets; TEXCOORD_2 and up hold packed custom data (CUSTOM0-3 in Godot)
+UV_SETS = ("TEXCOORD_0", "TEXCOORD_1")
+ACCESSOR_TYPES = {1: "SCALAR", 2: "VEC2", 3: "VEC3", 4: "VEC4", 16: "MAT4"}
+
+GENERATOR = "Duel Academy tools/blender glb_writer"
+
+def to_gltf_axes(vectors):
+    """Blender (x, y, z) Z-up vectors to glTF (x, z, -y) Y-up vectors."""
+    vectors = np.asarray(vectors)
+    return np.stack([vectors[..., 0], vectors[..., 2], -vectors[..., 1]], axis=-1)
+
+def from_gltf_axes(vectors):
+    """glTF (x, y, z) Y-up vectors back to Blender (x, -z, y) Z-up vectors."""
+    vectors = np.asarray(vectors)
+    return np.stack([vectors[..., 0], -vectors[..., 2], vectors[..., 1]], axis=-1)
+
+def to_gltf_rotation(matrix):
+    """(x, y, z, w) glTF quaternion of a 3x3 rotation matrix in Blender axes."""
+    # Columns are the rotated axes; convert them, then the result's rows
+    m = to_gltf_axes(to_gltf_axes(np.asarray(matrix, dtype=np.float64).T).T)
+    trace = np.trace(m)
+    if trace > 0:
+        s = 2 * np.sqrt(trace + 1)
+        q = (m[2, 1] - m[1, 2], m[0, 2] - m[2, 0], m[1, 0] - m[0, 1], s * s / 4)
+    else:
+        i = int(np.argmax(np.diag(m)))
+        j, k = (i + 1) % 3, (i + 2) % 3
+        s = 2 * np.sqrt(1 + m[i, i] - m[j, j] - m[k, k])
+        q = [0.0, 0.0, 0.0, m[k, j] - m[j, k]]
+        q[i] = s * s / 4
+        q[j] = m[j, i] + m[i, j]
+        q[k] = m[k, i] + m[i, k]
+    return (np.array(q) / s).tolist()
+
+def _json_value(value):
+    """numpy scalars/arrays to plain JSON values."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+class GlbDocument:
+    """Accumulates glTF JSON and binary data, then writes one .glb file."""
+
+    def __init__(self, generator=GENERATOR):
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": generator},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [],
+            "meshes": [],
+            "materials": [],
+            "accessors": [],
+            "bufferViews": [],
+            "buffers": [],
+        }
+        self.binary = bytearray()
+
+    @classmethod
+    def from_glb(cls, gltf, binary):
+        """Continue an existing file (glb_reader.read_glb output); new data is appended."""
+        document = cls.__new__(cls)
+        document.gltf = gltf
+        document.binary = bytearray(binary)
+        return document
+
+    def _append(self, key, item):
+        self.gltf.setdefault(key, []).append(item)
+        return len(self.gltf[key]) - 1
+
+    def use_extension(self, name, required=False):
+        used = self.gltf.setdefault("extensionsUsed", [])
+        if name not in used:
+            used.append(name)
+        if required:
+            required_list = self.gltf.setdefault("extensionsRequired", [])
+            if name not in required_list:
+                required_list.append(name)
+
+    # === BINARY DATA ===
+
+    def add_buffer_view(self, data, target=None, byte_stride=None):
+        """Append raw bytes (4-byte aligned) and return the buffer view index."""
+        padding = (-len(self.binary)) % 4
+        self.binary.extend(b"\0" * padding)
+        view = {"buffer": 0, "byteOffset": len(self.binary), "byteLength": len(data)}
+        if target is not None:
+            view["target"] = target
+        if byte_stride is not None:
+            view["byteStride"] = byte_stride
+        self.binary.extend(data)
+        return self._append("bufferViews", view)
+
+    def add_accessor(self, array, target=None, normalized=False):
+        """Store a (count, components) array and return its accessor index."""
+        array = np.ascontiguousarray(array)
+        if array.dtype == np.float64:
+            array = array.astype(np.float32)
+        components = 1 if array.ndim == 1 else array.shape[1]
+        data = array.astype(array.dtype.newbyteorder("<")).tobytes()
+        element = array.dtype.itemsize * components
+        stride = None
+        if target == ARRAY_BUFFER and element % 4:
+            # Vertex attribute elements must start on 4-byte boundaries (8-bit and 16-bit VEC3)
+            stride = element + (-element) % 4
+            rows = np.zeros((len(array), stride), np.uint8)
+            rows[:, :element] = np.frombuffer(data, np.uint8).reshape(len(array), element)
+            data = rows.tobytes()
+        view = self.add_buffer_view(data, target, stride)
+
+        accessor = {
+            "bufferView": view,
+            "componentType": COMPONENT_TYPES[array.dtype],
+            "count": len(array),
+            "type": ACCESSOR_TYPES[components],
+        }
+        if normalized:
+            accessor["normalized"] = True
+        if len(array):
+            flat = array.reshape(len(array), components)
+            accessor["min"] = flat.min(axis=0).tolist()
+            accessor["max"] = flat.max(axis=0).tolist()
+        return self._append("accessors", accessor)
+
+    def add_indices(self, indices):
+        indices = np.asarray(indices).ravel()
+        dtype = np.uint16 if indices.size and indices.max() < 0xFFFF else np.uint32
+        return self.add_accessor(indices.astype(dtype), ELEMENT_ARRAY_BUFFER)
+
+    # === TEXTURES ===
+
+    def add_image(self, name, png_data):
+        """Embed a PNG file in the binary chunk and return the image index."""
+        view = self.add_buffer_view(png_data)
+        return self._append("images", {"name": name, "bufferView": view, "mimeType": "image/png"})
+
+    def add_texture(self, image):
+        """Texture with nearest filtering and clamped edges, suited to palette lookups."""
+        if not self.gltf.get("samplers"):
+            self._append("samplers", {
+                "magFilter": NEAREST, "minFilter": NEAREST_MIPMAP_NEAREST,
+                "wrapS": CLAMP_TO_EDGE, "wrapT": CLAMP_TO_EDGE,
+            })
+        return self._append("textures", {"sampler": 0, "source": image})
+
+    # === SCENE ===
+
+    def add_material(self, name, base_color, metallic=0.0, roughness=0.5, double_sided=True,
+                     textures=None):
+        """Textures map pbrMetallicRoughness slots ("baseColorTexture", ...) to texture indices."""
+        color = list(base_color) + [1.0] * (4 - len(base_color))
+        pbr = {
+            "baseColorFactor": [float(c) for c in color],
+            "metallicFactor": float(metallic),
+            "roughnessFactor": float(roughness),
+        }
+        for slot, texture in sorted((textures or {}).items()):
+            pbr[slot] = {"index": texture}
+        material = {"name": name, "doubleSided": double_sided, "pbrMetallicRoughness": pbr}
+        return self._append("materials", material)
+
+    def add_mesh(self, name, primitives, blender_axes=True, index=None):
+        """Primitives are dicts with "attributes" (name -> array), "indices" and "material".
+
+        POSITION/NORMAL arrays are in Blender axes and TEXCOORD_0/1 in Blender UV
+        space unless blender_axes is False (data read back from a glTF file).
+        Higher TEXCOORD_n carry packed custom data and are always stored as is.
+        An optional "normalized" set names integer attributes stored normalized.
+        With index, the mesh replaces an existing one (see compact()).
+        """
+        gltf_primitives = []
+        for primitive in primitives:
+            source = dict(primitive["attributes"])
+            # glTF needs contiguous TEXCOORD sets: zero-fill any gap below packed data
+            sets = [int(semantic[9:]) for semantic in source if semantic.startswith("TEXCOORD_")]
+            for n in range(max(sets, default=-1)):
+                source.setdefault(f"TEXCOORD_{n}", np.zeros((len(source["POSITION"]), 2), np.float32))
+            attributes = {}
+            for semantic, array in sorted(source.items()):
+                if blender_axes and semantic in ("POSITION", "NORMAL"):
+                    array = to_gltf_axes(array)
+                elif blender_axes and semantic in UV_SETS:
+                    # glTF puts the UV origin at the top left, Blender at the bottom left
+                    array = np.stack([array[:, 0], 1.0 - array[:, 1]], axis=1)
+                attributes[semantic] = self.add_accessor(
+                    array, ARRAY_BUFFER, semantic in primitive.get("normalized", ()))
+            gltf_primitive = {"attributes": attributes, "indices": self.add_indices(primitive["indices"])}
+            if primitive.get("material") is not None:
+                gltf_primitive["material"] = primitive["material"]
+            gltf_primitives.append(gltf_primitive)
+        mesh = {"name": name, "primitives": gltf_primitives}
+        if index is not None:
+            self.gltf["meshes"][index] = mesh
+            return index
+        return self._append("meshes", mesh)
+
+    def add_node(self, name, mesh=None, translation=None, children=None, extras=None, root=True,
+                 rotation=None):
+        """Add a node (translation and 3x3 rotation matrix in Blender axes); root nodes are added to the scene."""
+        node = {"name": name}
+        if mesh is not None:
+            node["mesh"] = mesh
+        if rotation is not None and not np.allclose(rotation, np.eye(3)):
+            node["rotation"] = to_gltf_rotation(rotation)
+        if translation is not None and any(translation):
+            node["translation"] = to_gltf_axes(np.asarray(translation, dtype=np.float64)).tolist()
+        if children:
+            node["children"] = list(children)
+        if extras:
+            node["extras"] = extras
+        index = self._append("nodes", node)
+        if root:
+            self.gltf["scenes"][0]["nodes"].append(index)
+        return index
+
+    def compact(self):
+        """Drop accessors and buffer views nothing refers to anymore, and their bytes.
+
+        Only understands the core spec and EXT_mesh_gpu_instancing; files using
+        other extensions that reference binary data are left as they are.
+        """
+        known = ("KHR_texture_transform", "KHR_mesh_quantization", "EXT_mesh_gpu_instancing")
+        if any(not (name.startswith("KHR_materials_") or name in known)
+               for name in self.gltf.get("extensionsUsed", [])):
+            return False
+        # Every place holding an accessor index, as (container, key)
+        slots = []
+        for mesh in self.gltf.get("meshes", []):
+            for primitive in mesh["primitives"]:
+                slots += [(primitive["attributes"], key) for key in primitive["attributes"]]
+                if "indices" in primitive:
+                    slots.append((primitive, "indices"))
+                for target in primitive.get("targets", []):
+                    slots += [(target, key) for key in target]
+        for skin in self.gltf.get("skins", []):
+            if "inverseBindMatrices" in skin:
+                slots.append((skin, "inverseBindMatrices"))
+        for animation in self.gltf.get("animations", []):
+            for sampler in animation["samplers"]:
+                slots += [(sampler, "input"), (sampler, "output")]
+        for node in self.gltf.get("nodes", []):
+            attributes = node.get("extensions", {}).get("EXT_mesh_gpu_instancing", {}).get("attributes", {})
+            slots += [(attributes, key) for key in attributes]
+
+        accessors = self.gltf.get("accessors", [])
+        used = sorted({container[key] for container, key in slots})
+        accessor_map = {old: new for new, old in enumerate(used)}
+        for container, key in slots:
+            container[key] = accessor_map[container[key]]
+        self.gltf["accessors"] = [accessors[i] for i in used]
+
+        # Same for buffer views, then rebuild the binary from the views still in use
+        view_slots = [(accessor, "bufferView") for accessor in self.gltf["accessors"] if "bufferView" in accessor]
+        for accessor in self.gltf["accessors"]:
+            sparse = accessor.get("sparse")
+            if sparse:
+                view_slots += [(sparse["indices"], "bufferView"), (sparse["values"], "bufferView")]
+        view_slots += [(image, "bufferView") for image in self.gltf.get("images", []) if "bufferView" in image]
+        views = self.gltf.get("bufferViews", [])
+        used = sorted({container[key] for container, key in view_slots})
+        view_map = {old: new for new, old in enumerate(used)}
+        for container, key in view_slots:
+            container[key] = view_map[container[key]]
+        binary = bytearray()
+        for i in used:
+            view = views[i]
+            start = view.get("byteOffset", 0)
+            binary.extend(b"\0" * ((-len(binary)) % 4))
+            data = self.binary[start:start + view["byteLength"]]
+            view["byteOffset"] = len(binary)
+            binary.extend(data)
+        self.gltf["bufferViews"] = [views[i] for i in used]
+        self.binary = binary
+        return True
+
+    # === OUTPUT ===
+
+    def to_bytes(self):
+        gltf = {key: value for key, value in self.gltf.items() if value != []}
+        if self.binary:
+            gltf["buffers"] = [{"byteLength": len(self.binary)}]
+        json_bytes = json.dumps(gltf, separators=(",", ":"), default=_json_value).encode("utf-8")
+        json_bytes += b" " * ((-len(json_bytes)) % 4)
+        binary = bytes(self.binary) + b"\0" * ((-len(self.binary)) % 4)
+
+        chunks = struct.pack("<II", len(json_bytes), CHUNK_JSON) + json_bytes
+        if binary:
+            chunks += struct.pack("<II", len(binary), CHUNK_BIN) + binary
+        return struct.pack("<III", GLB_MAGIC, 2, 12 + len(chunks)) + chunks
+
+    def write(self, filepath):
+        data = self.to_bytes()
+        with open(filepath, "wb") as f:
+            f.write(data)
+        return len(data)
+
+def weld_corners(corner_attributes):
+    """Merge corners that are identical in every attribute.
+
+    corner_attributes maps semantics to per-corner arrays (three per
+    triangle); returns (attributes, indices) with vertices in first-use order.
+    """
+    count = len(next(iter(corner_attributes.values())))
+    keys = np.hstack([array.reshape(count, -1).astype(np.float64)
+                      for _semantic, array in sorted(corner_attributes.items())])
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    keep = first[order]
+    return ({semantic: array[keep] for semantic, array in corner_attributes.items()},
+            rank[inverse.ravel()].reshape(-1, 3))
+
+def gray_colors(values):
+    """Gray RGBA vertex colors for 0..1 values, as normalized unsigned bytes (COLOR_0)."""
+    gray = np.round(np.clip(values, 0.0, 1.0) * 255).astype(np.uint8)
+    return np.stack([gray, gray, gray, np.full_like(gray, 255)], axis=1)
+
+def custom_channel(values, first_set=2):
+    """Pack (n, 3 or 4) values into the TEXCOORD pair that Godot imports as one CUSTOMn channel.
+
+    TEXCOORD_2/3 become CUSTOM0, TEXCOORD_4/5 CUSTOM1 and so on.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if values.shape[1] == 3:
+        values = np.hstack([values, np.zeros((len(values), 1), np.float32)])
+    return {f"TEXCOORD_{first_set}": values[:, :2], f"TEXCOORD_{first_set + 1}": values[:, 2:]}
+
+def add_builder_mesh(document, builder, name, material_indices):
+    """Add a MeshBuilder as one mesh with one primitive per material."""
+    primitives = []
+    for material, arrays, indices in builder.vertex_buffers():
+        attributes = {"POSITION": arrays["positions"], "NORMAL": arrays["normals"],
+                      "TEXCOORD_0": arrays["uvs"]}
+        if "lightmap_uvs" in arrays:
+            attributes["TEXCOORD_1"] = arrays["lightmap_uvs"]
+        if "ao" in arrays:
+            attributes["COLOR_0"] = gray_colors(arrays["ao"])
+        if "outline_normals" in arrays:
+            # Packed data, stored as is (already in glTF axes)
+            attributes.update(custom_channel(to_gltf_axes(arrays["outline_normals"])))
+        primitives.append({
+            "attributes": attributes,
+            "indices": indices,
+            "material": material_indices[material],
+            "normalized": {"COLOR_0"},
+        })
+    return document.add_mesh(name, primitives)
+
+def builder_extras(builder):
+    """Node extras of an exported MeshBuilder (lightmap size of its UV2 atlas, outline normals)."""
+    extras = {}
+    if builder.lightmap_size is not None:
+        extras["lightmap_size_hint"] = list(builder.lightmap_size)
+    if builder.parts and all(part.outline_normals is not None for part in builder.parts):
+        extras["outline_normals"] = True
+    return extras or None
+
+def add_spec_material(document, material):
+    """Add a materials.Material spec, embedding its images as textures."""
+    textures = {slot: document.add_texture(document.add_image(image_name, data))
+                for slot, (image_name, data) in sorted(material.images.items())}
+    return document.add_material(material.name, material.color, material.metallic,
+                                  material.roughness, textures=textures)
+
+def write_builder_glb(builder, filepath, name, extra_meshes=()):
+    """Write a MeshBuilder whose materials are materials.Material specs as a GLB.
+
+    extra_meshes are (node name, positions, triangles) written as material-less
+    nodes, e.g. the collision shapes from collision.py. Placed components are
+    written once and referenced by one child node per placement.
+    """
+    document = GlbDocument()
+    material_indices = {material: add_spec_material(document, material)
+                        for material in builder.materials()}
+    mesh = add_builder_mesh(document, builder, name, material_indices)
+    meshes = {}
+    children = []
+    for instance in builder.instances:
+        component = instance.component
+        if id(component) not in meshes:
+            meshes[id(component)] = add_builder_mesh(document, component, component.name, material_indices)
+        children.append(document.add_node(instance.name, meshes[id(component)], instance.location,
+                                          extras=builder_extras(component), root=False,
+                                          rotation=instance.matrix()))
+    document.add_node(name, mesh, children=children, extras=builder_extras(builder))
+    for node_name, positions, triangles in extra_meshes:
+        document.add_node(node_name, document.add_mesh(
+            node_name, [{"attributes": {"POSITION": positions}, "indices": triangles}]))
+    return document.write(filepath)
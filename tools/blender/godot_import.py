@@ -0,0 +1,142 @@
+"""
+Read and update Godot .import files (the [params] of an imported asset).
+"""
+import os
+
+# Applies the node extras written by the tools (LOD ranges, lightmap sizes)
+POST_IMPORT_SCRIPT = "res://scripts/tools/model_post_import.gd"
+
+def format_value(value):
+    """Python value as written in a .import file."""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, str):
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    return repr(value)
+
+def import_path(asset_path):
+    return asset_path + ".import"
+
+def read_params(asset_path):
+    """The raw [params] values of an asset's .import file ({} when not imported yet)."""
+    path = import_path(asset_path)
+    if not os.path.exists(path):
+        return {}
+    params, section = {}, None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                section = line
+            elif section == "[params]" and "=" in line:
+                key, value = line.split("=", 1)
+                params[key] = value
+    return params
+
+def remap_index(project_dir):
+    """{uid or imported res:// path: source res:// path} from every .import file of the project.
+
+    Lets references to .godot/imported/ files or by uid alone be followed back to the source asset.
+    """
+    index = {}
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]
+        for name in files:
+            if not name.endswith(".import"):
+                continue
+            source = "res://" + os.path.relpath(os.path.join(root, name[:-len(".import")]),
+                                                project_dir).replace(os.sep, "/")
+            section = None
+            with open(os.path.join(root, name)) as f:
+                for line in f:
+                    line = line.strip()
+                    if line.startswith("["):
+                        section = line
+                        continue
+                    key, _, value = line.partition("=")
+                    if section == "[remap]" and (key in ("uid", "path") or key.startswith("path.")):
+                        index[value.strip('"')] = source
+    return index
+
+def update_params(asset_path, values):
+    """Set [params] keys of an existing .import file; returns False when there is none.
+
+    Godot reimports the asset when it notices the changed settings.
+    """
+    path = import_path(asset_path)
+    if not os.path.exists(path):
+        return False
+    with open(path) as f:
+        lines = f.read().splitlines()
+    pending = {key: format_value(value) for key, value in values.items()}
+    section, params_end = None, None
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith("["):
+            section = stripped
+            if section == "[params]":
+                params_end = i + 1
+        elif section == "[params]" and "=" in stripped:
+            key = stripped.split("=", 1)[0]
+            if key in pending:
+                lines[i] = f"{key}={pending.pop(key)}"
+            params_end = i + 1
+    if pending:
+        if params_end is None:
+            lines += ["", "[params]", ""]
+            params_end = len(lines) - 1
+        lines[params_end:params_end] = [f"{key}={value}" for key, value in pending.items()]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return True
+
+def read_remap(asset_path):
+    """The raw [remap] values of an asset's .import file (importer, type, uid...; {} when not imported yet)."""
+    path = import_path(asset_path)
+    if not os.path.exists(path):
+        return {}
+    remap, section = {}, None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                section = line
+            elif section == "[remap]" and "=" in line:
+                key, value = line.split("=", 1)
+                remap[key] = value
+    return remap
+
+def ensure_params(asset_path, importer, resource_type, values):
+    """update_params, first writing a minimal .import when the asset is new or imported differently.
+
+    Godot (re)imports the asset with the [params] it finds and fills in the rest;
+    an existing uid is kept so references to the asset stay valid.
+    """
+    remap = read_remap(asset_path)
+    if remap.get("importer", "").strip('"') == importer:
+        return update_params(asset_path, values)
+    lines = ["[remap]", "", f"importer={format_value(importer)}", f"type={format_value(resource_type)}"]
+    if "uid" in remap:
+        lines.append(f"uid={remap['uid']}")
+    lines += ["", "[params]", ""]
+    lines += [f"{key}={format_value(value)}" for key, value in values.items()]
+    with open(import_path(asset_path), "w") as f:
+        f.write("\n".join(lines) + "\n")
+    return True
+
+def warn_if_not_imported(asset_path, setting):
+    """Say so when an asset has no .import yet, so a setting could not be written."""
+    if not os.path.exists(import_path(asset_path)):
+        print(f"  warning: {asset_path} has no .import yet, so {setting} was not set; "
+              f"rebuild it (build_assets.py --force) once Godot has imported it")
+
+def use_post_import(asset_path, values):
+    """Set .import params together with the tools' post-import script.
+
+    Assets already using another import script are left alone (False).
+    """
+    script = read_params(asset_path).get("import_script/path", '""').strip('"')
+    if script and script != POST_IMPORT_SCRIPT:
+        print(f"  warning: {asset_path} already uses import script {script}; not changed")
+        return False
+    return update_params(asset_path, dict(values, **{"import_script/path": POST_IMPORT_SCRIPT}))
@@ -0,0 +1,178 @@
+"""
+Read Godot text resources (.tscn scenes and .tres resources).
+
+Only what the tools need: the ext_resource and sub_resource tables, the node
+tree of a scene and the property values, parsed into plain Python values.
+"""
+import json
+import re
+
+# Values naming another resource
+EXT_RESOURCE = "ExtResource"
+SUB_RESOURCE = "SubResource"
+
+_HEADER = re.compile(r"^\[(\w+)(.*)\]$", re.S)
+_HEADER_FIELD = re.compile(r'(\w+)=("(?:[^"\\]|\\.)*"|\[[^\]]*\]|\w+\([^)]*\)|[^\s\]]+)')
+_PROPERTY = re.compile(r"^([\w/:.\-]+)\s*=\s*(.*)$", re.S)
+_NUMBER = re.compile(r"^-?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?$")
+_CALL = re.compile(r"^([\w\[\]]+)\((.*)\)$", re.S)
+
+class Reference:
+    """ExtResource("id") or SubResource("id") in a property value."""
+
+    def __init__(self, kind, id):
+        self.kind = kind
+        self.id = id
+
+    def __repr__(self):
+        return f'{self.kind}("{self.id}")'
+
+class Node:
+    """A [node] section of a scene."""
+
+    def __init__(self, fields, properties):
+        self.name = fields.get("name", "")
+        self.type = fields.get("type")
+        self.parent = fields.get("parent")
+        instance = fields.get("instance")
+        self.instance = instance.id if isinstance(instance, Reference) else None
+        self.properties = properties
+
+    @property
+    def path(self):
+        """Path from the scene root: "." for the root, "Parent/Name" below it."""
+        if self.parent is None:
+            return "."
+        return self.name if self.parent == "." else f"{self.parent}/{self.name}"
+
+class Resource:
+    """A parsed .tscn or .tres file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.header = {}
+        # id -> (type, res:// path, uid)
+        self.ext_resources = {}
+        # id -> (type, properties)
+        self.sub_resources = {}
+        self.nodes = []
+        # Properties of the [resource] section of a .tres
+        self.properties = {}
+        for kind, fields, properties in read_sections(path):
+            if kind in ("gd_scene", "gd_resource"):
+                self.header = fields
+            elif kind == "ext_resource":
+                self.ext_resources[fields.get("id")] = (fields.get("type"), fields.get("path"), fields.get("uid"))
+            elif kind == "sub_resource":
+                self.sub_resources[fields.get("id")] = (fields.get("type"), properties)
+            elif kind == "node":
+                self.nodes.append(Node(fields, properties))
+            elif kind == "resource":
+                self.properties = properties
+
+def _balanced(text):
+    """True when every bracket and string opened in text is closed again."""
+    depth, in_string, escaped = 0, False, False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+    return depth <= 0 and not in_string
+
+def split_top_level(text, separator=","):
+    """Split text at separators outside brackets and strings."""
+    parts, depth, in_string, escaped, start = [], 0, False, False, 0
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "([{":
+            depth += 1
+        elif char in ")]}":
+            depth -= 1
+        elif char == separator and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+def parse_value(text):
+    """A property value as Python: numbers, bools, strings, lists, tuples for vectors and colors,
+    References for resources; anything else stays the raw text."""
+    text = text.strip()
+    if text in ("true", "false"):
+        return text == "true"
+    if text == "null":
+        return None
+    if _NUMBER.match(text):
+        return float(text) if any(c in text for c in ".eE") else int(text)
+    if text.startswith('"') and text.endswith('"'):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return text[1:-1]
+    if text.startswith("[") and text.endswith("]"):
+        return [parse_value(item) for item in split_top_level(text[1:-1])]
+    call = _CALL.match(text)
+    if call:
+        name, arguments = call.groups()
+        if name in (EXT_RESOURCE, SUB_RESOURCE):
+            return Reference(name, parse_value(arguments))
+        # Typed arrays: Array[PackedScene]([...])
+        if name.startswith("Array["):
+            return parse_value(arguments)
+        values = [parse_value(item) for item in split_top_level(arguments)]
+        if all(isinstance(value, (int, float)) for value in values):
+            return tuple(values)
+    return text
+
+def _header_fields(text):
+    return {key: parse_value(value) for key, value in _HEADER_FIELD.findall(text)}
+
+def read_sections(path):
+    """[(section kind, header fields, properties)] of a .tscn/.tres file, in file order."""
+    sections, pending = [], None
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if pending is not None:
+                # A multi-line value continues until its brackets are closed
+                key, value = pending
+                value += "\n" + line
+                if _balanced(value):
+                    sections[-1][2][key] = parse_value(value)
+                    pending = None
+                else:
+                    pending = (key, value)
+                continue
+            stripped = line.strip()
+            if not stripped or stripped.startswith(";"):
+                continue
+            header = _HEADER.match(stripped)
+            if header:
+                sections.append((header.group(1), _header_fields(header.group(2)), {}))
+                continue
+            prop = _PROPERTY.match(stripped)
+            if prop and sections:
+                key, value = prop.groups()
+                if _balanced(value):
+                    sections[-1][2][key] = parse_value(value)
+                else:
+                    pending = (key, value)
+    return sections
@@ -0,0 +1,311 @@
+"""
+Removal of hidden interior faces from MeshBuilder models.
+
+The generators build buildings from overlapping primitives: tiers stand on
+the base, towers sink into the main block, corridors run into the wings.
+Joined as they are, every buried face is still rasterized and shaded. A
+face is hidden when every point of it, nudged a hair along its normal, lies
+inside another closed part: buried faces stay inside when nudged, and faces
+pressed against another part (a tier's bottom on the base's roof) move into
+it. Coplanar faces pointing the same way move out of each other and are
+kept, so no holes open up.
+
+Points are tested against closed, outward-wound parts only (every edge
+shared by two faces), using the generalized winding number. Corners and
+the center of every triangle are tested first; triangles that pass are
+then sampled at --hidden-spacing before they are dropped.
+
+Generators run it on their MeshBuilder before export with --remove-hidden.
+That adds 2-20 s per model on one core, so it is off when a generator is run
+by hand; build_assets.py passes it through their BUILD_OPTIONS. Already
+exported GLBs are handled by finding the primitives again as connected pieces:
+    python3 hidden_faces.py ../../assets/models/buildings/duel_academy.glb
+"""
+import argparse
+import math
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import (accessor_array, add_file_arguments, mesh_instances, normalized_attributes,
+                        read_glb, run_on_files)
+from glb_writer import GlbDocument
+
+# Sample spacing (meters) for the dense test of candidate triangles
+DEFAULT_SPACING = 0.25
+# Test points are moved this far along the face normal (meters)
+NORMAL_OFFSET = 1e-3
+# Test points are pulled this much towards the triangle center, off shared edges
+EDGE_INSET = 1e-3
+WELD_DECIMALS = 5
+# Point-triangle pairs per winding number batch
+BATCH_PAIRS = 2_000_000
+
+def add_hidden_face_arguments(parser):
+    """Hidden face removal options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--remove-hidden", action=argparse.BooleanOptionalAction, default=False,
+                        help="drop faces buried inside or pressed against other parts; slow, "
+                             "on in build_assets.py builds (default: off)")
+    parser.add_argument("--hidden-spacing", type=float, default=DEFAULT_SPACING,
+                        help="sample spacing in meters when confirming a hidden face (default: %(default)s)")
+
+def is_closed_volume(part):
+    """True when the part is watertight (after welding seams) and wound outward."""
+    if not len(part.triangles):
+        return False
+    _, ids = np.unique(np.round(part.positions, WELD_DECIMALS), axis=0, return_inverse=True)
+    faces = ids.ravel()[part.triangles]
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    # Every directed edge must appear once and its reverse once
+    directed, counts = np.unique(edges, axis=0, return_counts=True)
+    if (counts != 1).any():
+        return False
+    reverse = np.unique(edges[:, ::-1], axis=0)
+    if len(reverse) != len(directed) or not np.array_equal(reverse, directed):
+        return False
+    a, b, c = (part.positions[part.triangles[:, i]] for i in range(3))
+    return float(np.einsum("ij,ij->i", a, np.cross(b, c)).sum()) > 0
+
+def winding_numbers(points, corners):
+    """Generalized winding number of (m, 3) points about a closed (k, 3, 3) triangle mesh."""
+    result = np.zeros(len(points))
+    step = max(BATCH_PAIRS // max(len(corners), 1), 1)
+    for start in range(0, len(points), step):
+        p = points[start:start + step, None, None, :]
+        a, b, c = (corners[None, :, i, :] - p[:, :, 0, :] for i in range(3))
+        la, lb, lc = (np.linalg.norm(v, axis=2) for v in (a, b, c))
+        numerator = np.einsum("mkc,mkc->mk", a, np.cross(b, c))
+        denominator = (la * lb * lc + np.einsum("mkc,mkc->mk", a, b) * lc
+                       + np.einsum("mkc,mkc->mk", b, c) * la + np.einsum("mkc,mkc->mk", c, a) * lb)
+        result[start:start + step] = 2 * np.arctan2(numerator, denominator).sum(axis=1) / (4 * math.pi)
+    return result
+
+def _sample_weights(steps):
+    """Barycentric weights of a triangular grid with the given number of steps per edge."""
+    i, j = np.array([(i, j) for i in range(steps + 1) for j in range(steps + 1 - i)]).T / steps
+    return np.stack([1.0 - i - j, i, j], axis=1)
+
+def _test_points(triangle, weights):
+    """Points on a (3, 3) triangle, inset from its edges and nudged along its normal."""
+    normal = np.cross(triangle[1] - triangle[0], triangle[2] - triangle[0])
+    normal /= np.linalg.norm(normal)
+    center = triangle.mean(axis=0)
+    points = weights @ triangle
+    size = np.linalg.norm(points - center, axis=1, keepdims=True)
+    points += (center - points) * np.minimum(EDGE_INSET / np.maximum(size, 1e-12), 0.5)
+    return points + normal * NORMAL_OFFSET
+
+class _Volume:
+    """A closed part used as an occluding solid."""
+
+    def __init__(self, index, part):
+        self.index = index
+        self.corners = part.positions[part.triangles]
+        self.low = part.positions.min(axis=0) - NORMAL_OFFSET
+        self.high = part.positions.max(axis=0) + NORMAL_OFFSET
+
+    def contains(self, points):
+        inside = np.all((points >= self.low) & (points <= self.high), axis=1)
+        if inside.any():
+            inside[inside] = winding_numbers(points[inside], self.corners) > 0.5
+        return inside
+
+def _covered(points, volumes, exclude):
+    """True where a point lies inside some volume other than part `exclude`."""
+    covered = np.zeros(len(points), dtype=bool)
+    for volume in volumes:
+        if volume.index == exclude:
+            continue
+        pending = ~covered
+        if not pending.any():
+            break
+        covered[pending] = volume.contains(points[pending])
+    return covered
+
+def hidden_triangles(parts, spacing=DEFAULT_SPACING):
+    """Per part (anything with positions and triangles), a mask of the triangles never seen."""
+    volumes = [_Volume(i, part) for i, part in enumerate(parts) if is_closed_volume(part)]
+    coarse = np.vstack([np.eye(3), [[1 / 3, 1 / 3, 1 / 3]]])
+    masks = []
+    for i, part in enumerate(parts):
+        corners = part.positions[part.triangles]
+        hidden = np.zeros(len(corners), dtype=bool)
+        others = [v for v in volumes if v.index != i and np.all(v.low <= corners.reshape(-1, 3).max(axis=0))
+                  and np.all(v.high >= corners.reshape(-1, 3).min(axis=0))]
+        if others:
+            # Corners and center of every triangle in one batch
+            points = np.vstack([_test_points(triangle, coarse) for triangle in corners])
+            candidates = _covered(points, others, i).reshape(-1, len(coarse)).all(axis=1)
+            for t in np.flatnonzero(candidates):
+                longest = np.linalg.norm(corners[t] - np.roll(corners[t], 1, axis=0), axis=1).max()
+                steps = max(int(math.ceil(longest / spacing)), 1)
+                hidden[t] = _covered(_test_points(corners[t], _sample_weights(steps)), others, i).all()
+        masks.append(hidden)
+    return masks
+
+def remove_hidden_faces(builder, spacing=DEFAULT_SPACING):
+    """Drop hidden triangles (and parts left empty) in place; returns a summary dict.
+
+    Placed components are tested where they stand. Their shared mesh only
+    loses the triangles hidden in every placement.
+    """
+    placed = builder.instanced_parts()
+    copies = [copy for _instance, _part, copy in placed]
+    masks = hidden_triangles(builder.parts + copies, spacing)
+    shared = {}
+    for (_instance, part, _copy), hidden in zip(placed, masks[len(builder.parts):]):
+        shared[id(part)] = shared[id(part)] & hidden if id(part) in shared else hidden
+    own_masks = masks[:len(builder.parts)]
+    summary = _summary(builder.parts + copies, own_masks + [shared[id(part)] for _i, part, _c in placed])
+
+    builder.parts = _drop_hidden(builder.parts, own_masks)
+    for component in builder.components.values():
+        unplaced = [np.zeros(len(part.triangles), dtype=bool) for part in component.parts]
+        component.parts = _drop_hidden(component.parts, [shared.get(id(part), mask)
+                                                         for part, mask in zip(component.parts, unplaced)])
+    builder.instances = [instance for instance in builder.instances if instance.component.parts]
+    _report(summary)
+    return summary
+
+def _drop_hidden(parts, masks):
+    """The parts with their masked triangles and unused vertices removed, empty parts left out."""
+    kept_parts = []
+    for part, hidden in zip(parts, masks):
+        if part.collision is None:
+            # Collision falls back to the vertices; keep the full part's
+            part.collision = [part.positions]
+        if hidden.any():
+            used, remapped = np.unique(part.triangles[~hidden], return_inverse=True)
+            part.positions = part.positions[used]
+            part.uvs = part.uvs[used]
+            part.triangles = remapped.reshape(-1, 3)
+        if len(part.triangles):
+            kept_parts.append(part)
+    return kept_parts
+
+def _summary(parts, masks):
+    """Triangle counts and surface areas before and after removing the masked triangles."""
+    area = removed_area = 0.0
+    for part, hidden in zip(parts, masks):
+        corners = part.positions[part.triangles]
+        areas = 0.5 * np.linalg.norm(np.cross(corners[:, 1] - corners[:, 0],
+                                              corners[:, 2] - corners[:, 0]), axis=1)
+        area += areas.sum()
+        removed_area += areas[hidden].sum()
+    return {
+        "triangles": int(sum(len(hidden) for hidden in masks)),
+        "removed": int(sum(hidden.sum() for hidden in masks)),
+        "area": float(area),
+        "removed_area": float(removed_area),
+    }
+
+def _report(summary):
+    triangles, removed = summary["triangles"], summary["removed"]
+    print(f"  hidden faces: removed {removed} of {triangles} triangles "
+          f"({100 * removed / max(triangles, 1):.0f}%), "
+          f"{summary['removed_area']:.0f} of {summary['area']:.0f} m2 of shaded surface "
+          f"({100 * summary['removed_area'] / max(summary['area'], 1e-12):.0f}% less overdraw)")
+
+class _Piece:
+    """A connected piece of a glTF mesh: one primitive of the generator that joined it."""
+
+    def __init__(self, positions, triangles):
+        self.positions = positions
+        self.triangles = triangles
+
+def _connected_pieces(positions, triangles):
+    """Split a triangle soup into edge- or vertex-connected pieces; returns (pieces, triangle ids)."""
+    _, ids = np.unique(np.round(positions, WELD_DECIMALS), axis=0, return_inverse=True)
+    faces = ids.ravel()[triangles]
+    labels = np.arange(ids.max() + 1)
+    while True:
+        # Every vertex takes the smallest label among the faces it belongs to
+        face_labels = labels[faces].min(axis=1)
+        updated = labels.copy()
+        for k in range(3):
+            np.minimum.at(updated, faces[:, k], face_labels)
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            break
+        labels = updated
+    face_labels = labels[faces[:, 0]]
+    pieces, members = [], []
+    for label in np.unique(face_labels):
+        selected = np.flatnonzero(face_labels == label)
+        used, remapped = np.unique(triangles[selected], return_inverse=True)
+        pieces.append(_Piece(positions[used], remapped.reshape(-1, 3)))
+        members.append(selected)
+    return pieces, members
+
+def remove_hidden_glb(filepath, output, spacing=DEFAULT_SPACING):
+    """Write filepath without the hidden triangles of its meshes to output; returns a summary dict.
+
+    The generators' primitives are found again as the connected pieces of
+    each mesh. Only faces hidden by pieces of the same mesh are removed.
+    """
+    gltf, binary = read_glb(filepath)
+    document = GlbDocument.from_glb(gltf, binary)
+    drawn = sorted({mesh for _node, mesh, _world in mesh_instances(gltf, binary)})
+    totals = {"triangles": 0, "removed": 0, "area": 0.0, "removed_area": 0.0}
+    for mesh_index in drawn:
+        mesh = gltf["meshes"][mesh_index]
+        primitives = mesh["primitives"]
+        if any(p.get("mode", 4) != 4 or "indices" not in p for p in primitives):
+            continue
+        attributes = [{semantic: accessor_array(gltf, binary, index)
+                       for semantic, index in p["attributes"].items()} for p in primitives]
+        indices = [accessor_array(gltf, binary, p["indices"]).astype(np.int64).reshape(-1, 3)
+                   for p in primitives]
+        # All primitives in one index space, so pieces can span materials
+        offsets = np.cumsum([0] + [len(a["POSITION"]) for a in attributes])
+        positions = np.vstack([a["POSITION"].astype(np.float64) for a in attributes])
+        triangles = np.vstack([faces + offset for faces, offset in zip(indices, offsets)])
+        pieces, members = _connected_pieces(positions, triangles)
+        masks = hidden_triangles(pieces, spacing)
+        summary = _summary(pieces, masks)
+        for key in totals:
+            totals[key] += summary[key]
+        if not summary["removed"]:
+            continue
+
+        hidden = np.zeros(len(triangles), dtype=bool)
+        for selected, mask in zip(members, masks):
+            hidden[selected[mask]] = True
+        new_primitives, start = [], 0
+        for primitive, primitive_attributes, faces in zip(primitives, attributes, indices):
+            keep = faces[~hidden[start:start + len(faces)]]
+            start += len(faces)
+            if not len(keep):
+                continue
+            used, remapped = np.unique(keep, return_inverse=True)
+            new_primitives.append({"attributes": {semantic: array[used]
+                                                  for semantic, array in primitive_attributes.items()},
+                                   "indices": remapped.reshape(-1, 3),
+                                   "material": primitive.get("material"),
+                                   "normalized": normalized_attributes(gltf, primitive)})
+        document.add_mesh(mesh.get("name", "Mesh"), new_primitives, blender_axes=False, index=mesh_index)
+        for key in ("extras", "weights"):
+            if key in mesh:
+                document.gltf["meshes"][mesh_index][key] = mesh[key]
+    document.compact()
+    document.write(output)
+    _report(totals)
+    return totals
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove hidden interior faces from GLB files")
+    add_file_arguments(parser)
+    parser.add_argument("--spacing", type=float, default=DEFAULT_SPACING,
+                        help="sample spacing in meters when confirming a hidden face (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        print(os.path.basename(filepath))
+        remove_hidden_glb(filepath, output, args.spacing)
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Lightmap UV2 generation, no Blender needed.
+
+Triangles are grouped into charts: edge-connected faces whose normals share
+the same dominant axis and direction. Each chart is projected onto that axis
+plane at a fixed texel size in world meters, so lightmap density follows the
+real size of the model (node scale included). Charts are padded and shelf
+packed into one atlas, largest first and ties broken by face order, so the
+same mesh always gets the same UV2.
+
+The UVs are written as TEXCOORD_1, which Godot imports as UV2, and the atlas
+size goes into the node extras as "lightmap_size_hint" (applied by
+scripts/tools/model_post_import.gd). The .import file is switched to Static
+light baking, which keeps the UV2 from the file instead of unwrapping on
+every import.
+
+Run with:
+    python3 lightmap_uv.py ../../assets/models/buildings/kenney/*.glb
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import (accessor_array, add_file_arguments, mesh_instances, normalized_attributes,
+                        read_glb, run_on_files)
+from glb_writer import GlbDocument, weld_corners
+from godot_import import use_post_import, warn_if_not_imported
+
+# Matches meshes/lightmap_texel_size of the project's .import files
+DEFAULT_TEXEL_SIZE = 0.2
+# Empty texels around every chart, so bilinear filtering never bleeds across
+PADDING = 2
+MAX_ATLAS_SIZE = 4096
+# Godot's meshes/light_baking "Static": lightmapped with the UV2 from the file
+LIGHT_BAKE_STATIC = 1
+
+def _charts(corners):
+    """Chart label and projection key (dominant axis * 2 + negative) per triangle."""
+    normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    axis = np.abs(normals).argmax(axis=1)
+    keys = axis * 2 + (normals[np.arange(len(normals)), axis] < 0)
+
+    _, vertex_ids = np.unique(np.round(corners.reshape(-1, 3), 6), axis=0, return_inverse=True)
+    vertex_ids = vertex_ids.reshape(-1, 3)
+    edges = np.sort(np.concatenate([vertex_ids[:, [0, 1]], vertex_ids[:, [1, 2]], vertex_ids[:, [2, 0]]]), axis=1)
+    faces = np.tile(np.arange(len(corners)), 3)
+    order = np.lexsort((faces, edges[:, 1], edges[:, 0]))
+    edges, faces = edges[order], faces[order]
+    # Faces listed next to each other under the same edge and key are joined
+    same = np.all(edges[1:] == edges[:-1], axis=1) & (keys[faces[1:]] == keys[faces[:-1]])
+    a, b = faces[:-1][same], faces[1:][same]
+
+    labels = np.arange(len(corners))
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, a, labels[b])
+        np.minimum.at(updated, b, labels[a])
+        updated = updated[updated]
+        if np.array_equal(updated, labels):
+            return labels, keys
+        labels = updated
+
+def _project(points, key):
+    """2D coordinates on the dominant axis plane, mirrored for back-facing keys."""
+    axis, negative = divmod(int(key), 2)
+    coords = points[..., [(axis + 1) % 3, (axis + 2) % 3]].copy()
+    if negative:
+        coords[..., 0] = -coords[..., 0]
+    return coords
+
+def _pack(sizes, width):
+    """Shelf packing of (width, height) rectangles; returns (offsets, used height)."""
+    offsets = np.zeros((len(sizes), 2), dtype=np.int64)
+    x = y = shelf = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0], i)):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        offsets[i] = (x, y)
+        x += w
+        shelf = max(shelf, h)
+    return offsets, y + shelf
+
+def unwrap(corners, texel_size=DEFAULT_TEXEL_SIZE):
+    """Lightmap UVs for (faces, 3, 3) world-space corners; returns ((faces, 3, 2) UVs, (width, height))."""
+    corners = np.asarray(corners, dtype=np.float64)
+    labels, keys = _charts(corners)
+    charts = np.unique(labels)
+    face_charts = np.searchsorted(charts, labels)
+    projected = np.empty((len(corners), 3, 2))
+    for key in np.unique(keys):
+        projected[keys == key] = _project(corners[keys == key], key)
+
+    while True:
+        low = np.full((len(charts), 2), np.inf)
+        high = np.full((len(charts), 2), -np.inf)
+        np.minimum.at(low, face_charts, projected.min(axis=1))
+        np.maximum.at(high, face_charts, projected.max(axis=1))
+        sizes = [tuple(size) for size in
+                 (np.maximum(np.ceil((high - low) / texel_size), 1).astype(np.int64) + 2 * PADDING)]
+        area = sum(w * h for w, h in sizes)
+        width = 1 << int(np.ceil(np.log2(max(np.sqrt(area), max(w for w, _h in sizes)))))
+        offsets, height = _pack(sizes, width)
+        while height > width:
+            width *= 2
+            offsets, height = _pack(sizes, width)
+        height = -(-height // 4) * 4
+        if max(width, height) <= MAX_ATLAS_SIZE:
+            break
+        # Too big for one lightmap: coarsen the texels until it fits
+        texel_size *= max(width, height) / MAX_ATLAS_SIZE
+
+    texels = (projected - low[face_charts][:, None, :]) / texel_size
+    texels += (offsets[face_charts] + PADDING)[:, None, :]
+    return texels / np.array([width, height]), (int(width), int(height))
+
+def _primitive_corners(gltf, binary, primitive):
+    if "indices" in primitive:
+        return accessor_array(gltf, binary, primitive["indices"]).astype(np.int64).reshape(-1, 3)
+    count = gltf["accessors"][primitive["attributes"]["POSITION"]]["count"]
+    return np.arange(count).reshape(-1, 3)
+
+def unwrap_glb(filepath, output, texel_size=DEFAULT_TEXEL_SIZE, force=False):
+    """Write filepath with TEXCOORD_1 lightmap UVs to output; returns the number of meshes unwrapped."""
+    gltf, binary = read_glb(filepath)
+    document = GlbDocument.from_glb(gltf, binary)
+
+    # Size charts for the largest instance of every mesh
+    transforms = {}
+    for _node, mesh, world in mesh_instances(gltf, binary):
+        scale = float(np.linalg.norm(world[:3, :3], axis=0).max())
+        if mesh not in transforms or scale > transforms[mesh][0]:
+            transforms[mesh] = (scale, world[:3, :3])
+
+    unwrapped = {}
+    for mesh_index, (_scale, matrix) in sorted(transforms.items()):
+        mesh = gltf["meshes"][mesh_index]
+        primitives = mesh["primitives"]
+        if any(p.get("mode", 4) != 4 or "JOINTS_0" in p["attributes"] for p in primitives):
+            continue  # Points/lines and skinned meshes cannot be lightmapped
+        if not force and any("TEXCOORD_1" in p["attributes"] for p in primitives):
+            continue
+        triangles = [_primitive_corners(gltf, binary, p) for p in primitives]
+        positions = [accessor_array(gltf, binary, p["attributes"]["POSITION"]).astype(np.float64)
+                     for p in primitives]
+        corners = np.concatenate([(points @ matrix.T)[faces] for points, faces in zip(positions, triangles)])
+        uvs, size = unwrap(corners, texel_size)
+
+        new_primitives, start = [], 0
+        for primitive, faces in zip(primitives, triangles):
+            corner_attributes = {semantic: accessor_array(gltf, binary, index)[faces.ravel()]
+                                 for semantic, index in primitive["attributes"].items()}
+            corner_attributes["TEXCOORD_1"] = uvs[start:start + len(faces)].reshape(-1, 2).astype(np.float32)
+            start += len(faces)
+            attributes, indices = weld_corners(corner_attributes)
+            new_primitives.append({"attributes": attributes, "indices": indices,
+                                   "material": primitive.get("material"),
+                                   "normalized": normalized_attributes(gltf, primitive)})
+        document.add_mesh(mesh.get("name", "Mesh"), new_primitives, blender_axes=False, index=mesh_index)
+        for key in ("extras", "weights"):
+            if key in mesh:
+                document.gltf["meshes"][mesh_index][key] = mesh[key]
+        unwrapped[mesh_index] = size
+
+    for node in document.gltf.get("nodes", []):
+        if node.get("mesh") in unwrapped:
+            node.setdefault("extras", {})["lightmap_size_hint"] = list(unwrapped[node["mesh"]])
+    document.compact()
+    document.write(output)
+    return len(unwrapped)
+
+def use_lightmap_import(asset_path, texel_size=DEFAULT_TEXEL_SIZE):
+    """Point an asset's .import at the UV2 in the file instead of an import-time unwrap."""
+    changed = use_post_import(asset_path, {"meshes/light_baking": LIGHT_BAKE_STATIC,
+                                           "meshes/lightmap_texel_size": texel_size})
+    if not changed:
+        warn_if_not_imported(asset_path, "meshes/light_baking")
+    return changed
+
+def unwrap_exported(filepath, texel_size=DEFAULT_TEXEL_SIZE):
+    """Unwrap a freshly exported GLB in place and point its .import at the UV2."""
+    count = unwrap_glb(filepath, filepath, texel_size, force=True)
+    use_lightmap_import(filepath, texel_size)
+    print(f"  lightmap UV2: {count} mesh(es) unwrapped at {texel_size} m per texel")
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add lightmap UV2 channels to GLB files")
+    add_file_arguments(parser)
+    parser.add_argument("--texel-size", type=float, default=DEFAULT_TEXEL_SIZE,
+                        help="world size of one lightmap texel in meters (default: %(default)s)")
+    parser.add_argument("--force", action="store_true", help="replace existing TEXCOORD_1 channels")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        count = unwrap_glb(filepath, output, args.texel_size, args.force)
+        print(f"{os.path.basename(filepath)}: {count} mesh(es) unwrapped")
+        if output == filepath:
+            use_lightmap_import(filepath, args.texel_size)
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Per-location render and memory budget report, no Godot needed.
+
+Every location in SceneManager.LOCATION_PATHS (scripts/core/scene_manager.gd)
+is walked the way Godot loads it: the nodes of the scene, the scenes and
+models it instances (ext_resources followed through the .import remaps back
+to the source GLB/glTF files), primitive meshes, MultiMeshes, and the nodes
+the environment scripts create at runtime (the GrassBlades MultiMesh and the
+scattered props). For each location the report totals
+
+- triangles and draw calls of a frame with everything in view: every visible
+  surface times its instances and material passes (outline passes included),
+  counting only the nearest LOD of a model,
+- texture memory: every texture loaded once, sized from its image header and
+  the compression, mipmap and size limit settings of its .import,
+- mesh memory: vertex and index buffers of every mesh loaded once (the sizes
+  stored in the source files) plus the MultiMesh instance buffers,
+
+and checks them against budgets: DEFAULT_BUDGETS, overridden for all or single
+locations by a JSON file like {"default": {"draw_calls": 800},
+"courtyard": {"triangles": 1500000}}. Exits with 1 when a location is over.
+
+Run with:
+    python3 location_budget.py
+    python3 location_budget.py --budgets budgets.json --json report.json
+    python3 location_budget.py ../../scenes/locations/classroom.tscn --top 10
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+from urllib.parse import unquote
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from asset_report import analyze, drawn_nodes, image_file_size, mesh_triangles, read_asset
+from godot_import import POST_IMPORT_SCRIPT, read_params, remap_index
+from godot_resource import EXT_RESOURCE, Reference, Resource, parse_value
+from pipeline import PROJECT_DIR
+
+SCENE_MANAGER = "scripts/core/scene_manager.gd"
+_LOCATION_PATH = re.compile(r'Location\.(\w+)\s*:\s*"(res://[^"]+)"')
+_EXPORT = re.compile(r"^@export\s+var\s+(\w+)\s*(?::\s*[\w\[\]]+)?\s*=\s*(.+?)\s*(?:#.*)?$")
+
+MIB = 1024 * 1024
+DEFAULT_BUDGETS = {
+    "triangles": 1_000_000,
+    "draw_calls": 1000,
+    "texture_bytes": 256 * MIB,
+    "mesh_bytes": 64 * MIB,
+}
+# Columns of the table: (key, heading, format)
+METRICS = [
+    ("triangles", "tris", "count"),
+    ("draw_calls", "draws", "count"),
+    ("texture_bytes", "textures", "bytes"),
+    ("mesh_bytes", "meshes", "bytes"),
+]
+
+# GPU bytes per texel by .import compress/mode: lossless, lossy, VRAM compressed,
+# VRAM uncompressed, Basis Universal (transcoded to a block format)
+BYTES_PER_TEXEL = {0: 4, 1: 4, 2: 1, 3: 4, 4: 1}
+# detect_3d/compress_to: what a texture first seen on a 3D surface is reimported as
+DETECT_3D_MODES = {1: 2, 2: 4}
+# Vertex of a primitive or script-built mesh: position, octahedral normal and tangent, UV
+PRIMITIVE_VERTEX_BYTES = 12 + 4 + 4 + 8
+# MultiMesh instance data by transform_format (2D, 3D), plus colors and custom data
+MULTIMESH_TRANSFORM_BYTES = {0: 32, 1: 48}
+MULTIMESH_EXTRA_BYTES = 16
+# vat_crowd.gd animation textures: half float RGBA
+VAT_TEXEL_BYTES = 8
+MODEL_EXTENSIONS = (".glb", ".gltf")
+SCENE_EXTENSIONS = (".tscn", ".scn")
+
+# Node names cel_shader_applier.gd leaves alone (its skip_patterns, lowercased)
+CEL_SKIP_PATTERNS = ["gltf", "glb", "tree", "bush", "flower", "grass", "kenney", "fountain", "hedge",
+                     "bench", "academy"]
+
+def locations(project_dir=PROJECT_DIR):
+    """[(name, res:// path)] of SceneManager.LOCATION_PATHS, in declaration order."""
+    with open(os.path.join(project_dir, *SCENE_MANAGER.split("/"))) as f:
+        source = f.read()
+    block = source[source.index("LOCATION_PATHS"):]
+    block = block[:block.index("}")]
+    return [(name.lower(), path) for name, path in _LOCATION_PATH.findall(block)]
+
+def primitive_counts(kind, properties):
+    """(triangles, vertices) of a Godot PrimitiveMesh, None for other mesh types.
+
+    Follows the generators of Godot 4's primitive meshes and their default segment counts.
+    """
+    def get(key, default):
+        return int(properties.get(key, default))
+
+    if kind == "BoxMesh":
+        w, h, d = (get(f"subdivide_{axis}", 0) + 1 for axis in ("width", "height", "depth"))
+        return 4 * (w * h + d * h + w * d), 2 * ((w + 1) * (h + 1) + (d + 1) * (h + 1) + (w + 1) * (d + 1))
+    if kind == "PlaneMesh":
+        w, d = get("subdivide_width", 0) + 1, get("subdivide_depth", 0) + 1
+        return 2 * w * d, (w + 1) * (d + 1)
+    if kind == "QuadMesh":
+        return 2, 4
+    if kind == "PrismMesh":
+        w, h, d = (get(f"subdivide_{axis}", 0) + 1 for axis in ("width", "height", "depth"))
+        return (2 * w * h + 4 * d * h + 2 * w * d,
+                2 * (w + 1) * (h + 1) + 4 * (d + 1) * (h + 1) + (w + 1) * (d + 1))
+    if kind == "SphereMesh":
+        radial, rings = get("radial_segments", 64), get("rings", 32)
+        return 2 * radial * (rings + 1), (radial + 1) * (rings + 2)
+    if kind == "CylinderMesh":
+        radial, rings = get("radial_segments", 64), get("rings", 4)
+        caps = int(properties.get("cap_top", True)) + int(properties.get("cap_bottom", True))
+        return 2 * radial * (rings + 1) + caps * radial, (radial + 1) * (rings + 2) + caps * (radial + 2)
+    if kind == "CapsuleMesh":
+        radial, rings = get("radial_segments", 64), get("rings", 8)
+        return 2 * radial * (2 * rings + 3), (radial + 1) * (2 * rings + 4)
+    if kind == "TorusMesh":
+        rings, segments = get("rings", 64), get("ring_segments", 32)
+        return 2 * rings * segments, (rings + 1) * (segments + 1)
+    return None
+
+def mesh_bytes(triangles, vertices, vertex_bytes=PRIMITIVE_VERTEX_BYTES):
+    """Vertex plus index buffer size; Godot uses 16-bit indices below 65536 vertices."""
+    return vertices * vertex_bytes + triangles * 3 * (2 if vertices < 65536 else 4)
+
+def texture_bytes(width, height, params, in_3d=True):
+    """GPU memory of a texture imported with the given .import params."""
+    mode = int(params.get("compress/mode", 0))
+    mipmaps = params.get("mipmaps/generate", "false") == "true"
+    compress_to = int(params.get("detect_3d/compress_to", 1))
+    if in_3d and mode in (0, 1) and compress_to in DETECT_3D_MODES:
+        # What the editor reimports a texture as once it is used on a 3D surface
+        mode, mipmaps = DETECT_3D_MODES[compress_to], True
+    limit = int(params.get("process/size_limit", 0))
+    if limit and max(width, height) > limit:
+        scale = limit / max(width, height)
+        width, height = max(int(width * scale), 1), max(int(height * scale), 1)
+    size = width * height * BYTES_PER_TEXEL.get(mode, 4)
+    return int(size * 4 / 3) if mipmaps else size
+
+def script_defaults(path):
+    """Default values of a GDScript's `@export var name: Type = value` lines."""
+    defaults = {}
+    if not os.path.exists(path):
+        return defaults
+    with open(path) as f:
+        for line in f:
+            match = _EXPORT.match(line.strip())
+            if match:
+                defaults[match.group(1)] = parse_value(match.group(2))
+    return defaults
+
+def accepted_fraction(width, depth, excluded, samples=200):
+    """Share of a width x depth area centered on the origin that excluded(x, z) lets through."""
+    accepted = 0
+    for i in range(samples):
+        x = (i + 0.5) / samples * width - width / 2
+        for j in range(samples):
+            z = (j + 0.5) / samples * depth - depth / 2
+            accepted += not excluded(x, z)
+    return accepted / (samples * samples)
+
+def _grass_excluded(properties):
+    """grass_generator.gd's _is_excluded for the given properties."""
+    radius, path_width = properties["exclude_radius"], properties["path_width"]
+
+    def excluded(x, z):
+        return (math.hypot(x, z) < radius
+                or (abs(x) < path_width / 2 and -10 < z < 55)
+                or (z < -2 and abs(x) < 25)
+                or 15 < abs(x) < 22)
+    return excluded
+
+class Budget:
+    """Running totals of one location."""
+
+    def __init__(self, name, scene):
+        self.name = name
+        self.scene = scene
+        self.triangles = 0
+        self.draw_calls = 0
+        # Loaded resources count once however often they are used: key -> bytes
+        self.textures = {}
+        self.meshes = {}
+        # What draws: source -> [instances, triangles, draw calls]
+        self.sources = {}
+        self.notes = {}
+
+    def draw(self, source, triangles, draw_calls, copies=1):
+        self.triangles += triangles * copies
+        self.draw_calls += draw_calls * copies
+        entry = self.sources.setdefault(source, [0, 0, 0])
+        entry[0] += copies
+        entry[1] += triangles * copies
+        entry[2] += draw_calls * copies
+
+    def note(self, text):
+        self.notes[text] = None
+
+    def totals(self):
+        return {
+            "triangles": self.triangles,
+            "draw_calls": self.draw_calls,
+            "texture_bytes": sum(self.textures.values()),
+            "mesh_bytes": sum(self.meshes.values()),
+        }
+
+    def result(self, budgets):
+        """The report of this location checked against its budgets."""
+        totals = self.totals()
+        over = [key for key, value in totals.items() if key in budgets and value > budgets[key]]
+        sources = sorted(self.sources.items(), key=lambda item: (item[1][1], item[1][2]), reverse=True)
+        return dict(totals, name=self.name, scene=self.scene, budgets=budgets, over=over,
+                    textures=len(self.textures), meshes=len(self.meshes),
+                    sources=[{"source": source, "instances": instances, "triangles": triangles,
+                              "draw_calls": draw_calls}
+                             for source, (instances, triangles, draw_calls) in sources],
+                    notes=list(self.notes))
+
+class SceneWalker:
+    """Adds what scenes cost to Budgets; parsed resources and models are cached across locations."""
+
+    def __init__(self, project_dir=PROJECT_DIR):
+        self.project_dir = project_dir
+        self.remaps = remap_index(project_dir)
+        self._resources = {}
+        self._models = {}
+        self._scripts = {}
+
+    def file(self, res_path):
+        return os.path.join(self.project_dir, *res_path[len("res://"):].split("/"))
+
+    def resolve(self, path, uid=None):
+        """Source res:// path of a reference: the file itself, or what an imported file or uid remaps to."""
+        if path and os.path.exists(self.file(path)):
+            return path
+        return self.remaps.get(path) or self.remaps.get(uid)
+
+    def resource(self, res_path):
+        if res_path not in self._resources:
+            self._resources[res_path] = Resource(self.file(res_path))
+        return self._resources[res_path]
+
+    def external(self, budget, owner, id):
+        """(type, source res:// path) of an ext_resource, None (with a note) when it cannot be found."""
+        kind, path, uid = owner.ext_resources.get(id, (None, None, None))
+        source = self.resolve(path, uid)
+        if source is None:
+            budget.note(f"{owner_name(owner)}: ext_resource {id} ({path or uid}) not found")
+            return None
+        return kind, source
+
+    def location(self, name, res_path):
+        """Budget of one location scene."""
+        budget = Budget(name, res_path)
+        self.add_scene(budget, res_path, "", copies=1, drawn=True, outlines=False, stack=())
+        return budget
+
+    def add_dependencies(self, budget, owner):
+        """Textures every loaded ext_resource of a scene or resource brings along."""
+        for id, (kind, path, _uid) in owner.ext_resources.items():
+            if kind and "Texture" in kind:
+                resolved = self.external(budget, owner, id)
+                if resolved:
+                    self.add_texture(budget, self.file(resolved[1]), resolved[1])
+            elif path and path.endswith(".tres"):
+                resolved = self.external(budget, owner, id)
+                if resolved:
+                    self.add_dependencies(budget, self.resource(resolved[1]))
+
+    def add_texture(self, budget, path, key, params=None):
+        if key in budget.textures:
+            return
+        size = image_file_size(path)
+        if size is None:
+            budget.note(f"texture {os.path.relpath(path, self.project_dir)} missing or unreadable")
+            budget.textures[key] = 0
+            return
+        budget.textures[key] = texture_bytes(*size, read_params(path) if params is None else params)
+
+    def add_scene(self, budget, res_path, prefix, copies, drawn, outlines, stack):
+        """Add a .tscn instanced copies times; prefix is the path of the instancing node."""
+        if res_path in stack:
+            budget.note(f"{res_path}: recursive instance skipped")
+            return
+        scene = self.resource(res_path)
+        stack = stack + (res_path,)
+        self.add_dependencies(budget, scene)
+        for node in scene.nodes:
+            script = self.node_script(budget, scene, node)
+            if script and os.path.basename(script) == "cel_shader_applier.gd":
+                properties = self.properties(script, node)
+                outlines = outlines or (properties.get("apply_to_children") and properties.get("add_outlines"))
+
+        hidden = set()
+        for node in scene.nodes:
+            if (node.parent is not None and node.parent in hidden) or node.properties.get("visible") is False:
+                hidden.add(node.path)
+            shown = drawn and node.path not in hidden
+            path = "/".join(part for part in (prefix, node.name if node.parent is not None else "") if part)
+            label = path or os.path.basename(res_path)
+
+            if node.instance:
+                resolved = self.external(budget, scene, node.instance)
+                if resolved:
+                    self.add_packed_scene(budget, resolved[1], label, copies, shown, outlines, stack)
+            if "mesh" in node.properties:
+                self.add_mesh_instance(budget, scene, node, label, copies, shown, outlines)
+            if "multimesh" in node.properties:
+                self.add_multimesh(budget, scene, node, label, copies, shown)
+
+            script = self.node_script(budget, scene, node)
+            estimator = SCRIPT_ESTIMATORS.get(os.path.basename(script)) if script else None
+            if estimator:
+                estimator(self, budget, scene, node, self.properties(script, node), label, copies, shown,
+                          outlines, stack)
+
+    def add_packed_scene(self, budget, res_path, label, copies, drawn, outlines, stack):
+        if res_path.endswith(SCENE_EXTENSIONS):
+            self.add_scene(budget, res_path, label, copies, drawn, outlines, stack)
+        elif res_path.endswith(MODEL_EXTENSIONS):
+            self.add_model(budget, res_path, copies, drawn)
+        else:
+            budget.note(f"{label}: cannot estimate {res_path}")
+
+    def node_script(self, budget, scene, node):
+        script = node.properties.get("script")
+        if isinstance(script, Reference) and script.kind == EXT_RESOURCE:
+            resolved = self.external(budget, scene, script.id)
+            return resolved[1] if resolved else None
+        return None
+
+    def properties(self, script, node):
+        """A scripted node's properties over the script's @export defaults."""
+        if script not in self._scripts:
+            self._scripts[script] = script_defaults(self.file(script))
+        return dict(self._scripts[script], **node.properties)
+
+    def material(self, budget, owner, reference):
+        """(type, properties, resource owning its sub_resources) of a material reference."""
+        if not isinstance(reference, Reference):
+            return None
+        if reference.kind == EXT_RESOURCE:
+            resolved = self.external(budget, owner, reference.id)
+            if not resolved or not resolved[1].endswith(".tres"):
+                return None
+            resource = self.resource(resolved[1])
+            return resource.header.get("type"), resource.properties, resource
+        kind, properties = owner.sub_resources.get(reference.id, (None, {}))
+        return kind, properties, owner
+
+    def passes(self, budget, owner, reference):
+        """Render passes of a material: itself plus its next_pass chain."""
+        count, seen = 1, set()
+        material = self.material(budget, owner, reference)
+        while material and isinstance(material[1].get("next_pass"), Reference) and len(seen) < 8:
+            count += 1
+            seen.add(id(material[1]))
+            material = self.material(budget, material[2], material[1]["next_pass"])
+        return count
+
+    def mesh(self, budget, scene, reference):
+        """(key, type, properties, owner) of a mesh reference."""
+        if reference.kind == EXT_RESOURCE:
+            resolved = self.external(budget, scene, reference.id)
+            if not resolved:
+                return None
+            if resolved[1].endswith(".tres"):
+                resource = self.resource(resolved[1])
+                return resolved[1], resource.header.get("type"), resource.properties, resource
+            return resolved[1], resolved[0], {}, None
+        kind, properties = scene.sub_resources.get(reference.id, (None, {}))
+        return f"{scene.path}::{reference.id}", kind, properties, scene
+
+    def add_mesh_instance(self, budget, scene, node, label, copies, drawn, outlines):
+        reference = node.properties["mesh"]
+        if not isinstance(reference, Reference):
+            return
+        mesh = self.mesh(budget, scene, reference)
+        if not mesh:
+            return
+        key, kind, properties, owner = mesh
+        counts = primitive_counts(kind, properties)
+        if counts is None:
+            budget.note(f"{label}: no estimate for {kind} meshes")
+            return
+        triangles, vertices = counts
+        budget.meshes[key] = mesh_bytes(triangles, vertices)
+        if not drawn:
+            return
+
+        override = node.properties.get("material_override")
+        if override:
+            reference, material_owner = override, scene
+        elif "surface_material_override/0" in node.properties:
+            reference, material_owner = node.properties["surface_material_override/0"], scene
+        else:
+            reference, material_owner = properties.get("material"), owner
+        material = self.material(budget, material_owner, reference)
+        passes = self.passes(budget, material_owner, reference) if reference else 1
+        if node.properties.get("material_overlay"):
+            passes += 1
+        # cel_shader_applier.gd gives plain untextured StandardMaterial3D surfaces an outline pass
+        if (outlines and not override and material and material[0] == "StandardMaterial3D"
+                and "albedo_texture" not in material[1]
+                and not any(pattern in label.lower() for pattern in CEL_SKIP_PATTERNS)):
+            passes += 1
+        budget.draw(f"{kind} meshes", triangles * passes, passes, copies)
+
+    def add_multimesh(self, budget, scene, node, label, copies, drawn):
+        reference = node.properties["multimesh"]
+        if not isinstance(reference, Reference) or reference.kind == EXT_RESOURCE:
+            budget.note(f"{label}: external MultiMesh not estimated")
+            return
+        _kind, properties = scene.sub_resources.get(reference.id, (None, {}))
+        count = int(properties.get("instance_count", 0))
+        visible = int(properties.get("visible_instance_count", -1))
+        per_instance = MULTIMESH_TRANSFORM_BYTES.get(int(properties.get("transform_format", 0)), 48)
+        per_instance += MULTIMESH_EXTRA_BYTES * (bool(properties.get("use_colors"))
+                                                 + bool(properties.get("use_custom_data")))
+        budget.meshes[f"{label} instances"] = count * per_instance * copies
+        mesh = self.mesh(budget, scene, properties["mesh"]) if isinstance(properties.get("mesh"), Reference) else None
+        counts = primitive_counts(mesh[1], mesh[2]) if mesh else None
+        if counts is None:
+            budget.note(f"{label}: MultiMesh mesh not estimated")
+            return
+        budget.meshes[mesh[0]] = mesh_bytes(*counts)
+        drawn_instances = count if visible < 0 else min(visible, count)
+        if drawn and drawn_instances:
+            budget.draw(f"{label} (MultiMesh)", counts[0] * drawn_instances, 1, copies)
+
+    def model(self, res_path):
+        """What one instance of an imported GLB/glTF costs (cached)."""
+        if res_path in self._models:
+            return self._models[res_path]
+        path = self.file(res_path)
+        row = analyze(path)
+        info = {"row": row, "triangles": 0, "draw_calls": 0}
+        self._models[res_path] = info
+        if "error" in row:
+            return info
+        mappings = []
+        try:
+            gltf = read_asset(path, mappings)[0]
+        finally:
+            for mapped in mappings:
+                mapped.close()
+        # model_post_import.gd turns node extras into LOD ranges and outline passes
+        post_import = read_params(path).get("import_script/path", '""').strip('"') == POST_IMPORT_SCRIPT
+        meshes = gltf.get("meshes", [])
+        for node, instances in drawn_nodes(gltf):
+            extras = node.get("extras") or {}
+            if post_import and extras.get("visibility_range_begin", 0) > 0:
+                # A farther LOD never draws together with the nearest one
+                continue
+            passes = 2 if post_import and extras.get("outline_normals") else 1
+            mesh = meshes[node["mesh"]]
+            info["triangles"] += mesh_triangles(gltf, mesh) * instances * passes
+            info["draw_calls"] += len(mesh["primitives"]) * passes
+        return info
+
+    def add_model(self, budget, res_path, copies, drawn):
+        info = self.model(res_path)
+        row = info["row"]
+        if "error" in row:
+            budget.note(f"{res_path}: {row['error']}")
+            return
+        budget.meshes[res_path] = row["vertex_bytes"] + row["index_bytes"]
+        path = self.file(res_path)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for i, image in enumerate(row["images"]):
+            if image["uri"] is not None:
+                image_path = os.path.normpath(os.path.join(os.path.dirname(path), unquote(image["uri"])))
+                self.add_texture(budget, image_path, image_path)
+            elif image["width"]:
+                # Embedded images are extracted next to the model and imported from there
+                extracted = os.path.join(os.path.dirname(path), f"{stem}_{image['name']}.png")
+                if f"{res_path}#{i}" not in budget.textures:
+                    budget.textures[f"{res_path}#{i}"] = texture_bytes(image["width"], image["height"],
+                                                                       read_params(extracted))
+        if drawn:
+            budget.draw(res_path, info["triangles"], info["draw_calls"], copies)
+
+    def grass_generator(self, budget, scene, node, properties, label, copies, drawn, outlines, stack):
+        """GrassBlades: a MultiMesh of tapered blades, area x density minus the excluded zones."""
+        width, depth = properties["area_size"]
+        requested = int(width * depth * properties["grass_density"])
+        # Up to twice the requested count is tried before giving up on the excluded zones
+        fraction = accepted_fraction(width, depth, _grass_excluded(properties))
+        blades = min(requested, int(2 * requested * fraction))
+        segments = int(properties["blade_segments"])
+        triangles, vertices = 2 * segments, 2 * (segments + 1)
+        # The blade has positions, normals and UVs only
+        budget.meshes[f"{label} blade"] = mesh_bytes(triangles, vertices, 12 + 4 + 8)
+        budget.meshes[f"{label} instances"] = blades * MULTIMESH_TRANSFORM_BYTES[1] * copies
+        material = properties.get("grass_material")
+        passes = self.passes(budget, scene, material) if material else 1
+        if drawn:
+            budget.draw(f"{label} (grass_generator.gd)", triangles * blades * passes, passes, copies)
+        budget.note(f"{label}: {blades:,} grass blades estimated from area, density and exclusion zones")
+
+    def scatter_props(self, budget, scene, node, properties, label, copies, drawn, outlines, stack):
+        """ScatterProps: prop_count instances picked evenly from prop_scenes (an upper bound)."""
+        props = [prop for prop in properties.get("prop_scenes", []) if isinstance(prop, Reference)]
+        count = int(properties.get("prop_count", 0))
+        for i, prop in enumerate(props):
+            resolved = self.external(budget, scene, prop.id)
+            share = count // len(props) + (i < count % len(props))
+            if resolved and share:
+                self.add_packed_scene(budget, resolved[1], label, copies * share, drawn, outlines, stack)
+        if props:
+            budget.note(f"{label}: {count} scattered props assumed, split evenly over {len(props)} scenes")
+
+    def vat_crowd(self, budget, scene, node, properties, label, copies, drawn, outlines, stack):
+        """VatCrowd: instance_count copies of a baked mesh in one MultiMesh, plus its animation textures."""
+        manifest_path = properties.get("manifest_path")
+        if not manifest_path or not os.path.exists(self.file(manifest_path)):
+            budget.note(f"{label}: VAT manifest {manifest_path or '(none)'} not found")
+            return
+        with open(self.file(manifest_path)) as f:
+            manifest = json.load(f)
+        base_dir = manifest_path.rsplit("/", 1)[0]
+        mesh_path = f"{base_dir}/{manifest['mesh']}"
+        self.add_model(budget, mesh_path, copies, drawn=False)
+        info = self.model(mesh_path)
+        count = int(properties.get("instance_count", 0))
+        budget.meshes[f"{label} instances"] = count * (MULTIMESH_TRANSFORM_BYTES[1] + MULTIMESH_EXTRA_BYTES) * copies
+        for key in ("positions", "normals"):
+            budget.textures[f"{base_dir}/{manifest[key]}"] = (manifest["texture_width"] * manifest["texture_height"]
+                                                             * VAT_TEXEL_BYTES)
+        if drawn:
+            budget.draw(f"{label} (vat_crowd.gd)", info["triangles"] * count, info["draw_calls"], copies)
+        budget.note(f"{label}: {count} VAT crowd instances of {manifest['mesh']}")
+
+SCRIPT_ESTIMATORS = {
+    "grass_generator.gd": SceneWalker.grass_generator,
+    "scatter_props.gd": SceneWalker.scatter_props,
+    "vat_crowd.gd": SceneWalker.vat_crowd,
+}
+
+def owner_name(resource):
+    return os.path.basename(resource.path)
+
+def load_budgets(path):
+    """{"default": {...}, location: {...}} budget overrides from a JSON file."""
+    if not path:
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def budgets_for(name, overrides):
+    return dict(DEFAULT_BUDGETS, **overrides.get("default", {}), **overrides.get(name, {}))
+
+def _format(value, kind):
+    if kind == "count":
+        return f"{value:,}"
+    return f"{value / MIB:.1f} MB"
+
+def print_report(results, top):
+    """Print one table line per location, then its most expensive sources and notes."""
+    width = max([len(result["name"]) for result in results] + [8])
+    print(f"{'location':<{width}}  " + "  ".join(f"{heading:>24}" for _key, heading, _kind in METRICS))
+    for result in results:
+        cells = []
+        for key, _heading, kind in METRICS:
+            cell = f"{_format(result[key], kind)} / {_format(result['budgets'][key], kind)}"
+            cells.append(f"{cell}{' !' if key in result['over'] else '  '}")
+        print(f"{result['name']:<{width}}  " + "  ".join(f"{cell:>24}" for cell in cells))
+    for result in results:
+        print(f"\n{result['name']} ({result['scene']}): {result['textures']} texture(s), "
+              f"{result['meshes']} mesh buffer(s)"
+              + (f", over budget: {', '.join(result['over'])}" if result["over"] else ""))
+        for source in result["sources"][:top]:
+            print(f"  {source['triangles']:>10,} tris  {source['draw_calls']:>5,} draws  "
+                  f"{source['instances']:>4}x  {source['source']}")
+        for note in result["notes"]:
+            print(f"  note: {note}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check every location against its render and memory budgets")
+    parser.add_argument("scenes", nargs="*",
+                        help="scene files to check (default: every location in SceneManager.LOCATION_PATHS)")
+    parser.add_argument("--budgets", metavar="FILE",
+                        help='JSON budget overrides: {"default": {...}, "<location>": {...}}')
+    parser.add_argument("--top", type=int, default=5, help="most expensive sources listed per location")
+    parser.add_argument("--json", metavar="FILE", help="also write the full report as JSON ('-' for stdout only)")
+    args = parser.parse_args(argv)
+
+    walker = SceneWalker()
+    if args.scenes:
+        scenes = []
+        for scene in args.scenes:
+            res_path = "res://" + os.path.relpath(os.path.abspath(scene), PROJECT_DIR).replace(os.sep, "/")
+            scenes.append((os.path.splitext(os.path.basename(scene))[0], res_path))
+    else:
+        scenes = locations()
+    overrides = load_budgets(args.budgets)
+    results = [walker.location(name, path).result(budgets_for(name, overrides)) for name, path in scenes]
+
+    if args.json == "-":
+        json.dump({"locations": results}, sys.stdout, indent=2)
+        print()
+    else:
+        print_report(results, args.top)
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump({"locations": results}, f, indent=2)
+                f.write("\n")
+    return 1 if any(result["over"] for result in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
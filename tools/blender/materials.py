@@ -0,0 +1,121 @@
+"""
+Flat Principled BSDF material specs shared by the generators.
+
+A Material only holds the PBR factors, so generators can describe their
+materials without Blender; the bpy material is created on demand when the
+model is written through Blender.
+
+Generators request materials from a MaterialRegistry, which hands back an
+existing material when the factors are within tolerance. Every distinct
+material on a mesh becomes its own surface (and draw call) in Godot, and
+only materials a mesh actually uses are ever created or exported.
+"""
+import os
+
+from glb_reader import read_glb_json, surface_count
+
+# Largest per-channel difference (color, metallic, roughness) that still merges
+DEFAULT_TOLERANCE = 0.02
+
+class Material:
+    """Flat-colored PBR material (base color, metallic, roughness)."""
+
+    def __init__(self, name, color, metallic=0.0, roughness=0.5):
+        self.name = name
+        self.color = tuple(color)
+        self.metallic = metallic
+        self.roughness = roughness
+        # glTF texture slot ("baseColorTexture", ...) -> (image name, PNG bytes)
+        self.images = {}
+        self._blender_material = None
+
+    def matches(self, color, metallic, roughness, tolerance):
+        differences = [abs(a - b) for a, b in zip(self.color, color)]
+        differences += [abs(self.metallic - metallic), abs(self.roughness - roughness)]
+        return len(self.color) == len(color) and max(differences) <= tolerance
+
+    def __repr__(self):
+        return f"Material({self.name!r}, {self.color}, {self.metallic}, {self.roughness})"
+
+    def to_blender(self):
+        """The matching Blender material, created on first use."""
+        if self._blender_material is None:
+            import bpy
+
+            mat = bpy.data.materials.new(name=self.name)
+            mat.use_nodes = True
+            bsdf = mat.node_tree.nodes["Principled BSDF"]
+            bsdf.inputs["Base Color"].default_value = (*self.color, 1.0)
+            bsdf.inputs["Metallic"].default_value = self.metallic
+            bsdf.inputs["Roughness"].default_value = self.roughness
+            self._blender_material = mat
+        return self._blender_material
+
+class MaterialRegistry:
+    """Hands out shared Material specs keyed by (color, metallic, roughness)."""
+
+    def __init__(self, tolerance=DEFAULT_TOLERANCE):
+        self.tolerance = tolerance
+        self.materials = []
+        # Requested name -> material it was merged into
+        self.merged = {}
+
+    def get(self, name, color, metallic=0.0, roughness=0.5):
+        """The registered material matching these factors, or a new one."""
+        for material in self.materials:
+            if material.matches(tuple(color), metallic, roughness, self.tolerance):
+                if name != material.name:
+                    self.merged[name] = material
+                return material
+        material = Material(name, color, metallic, roughness)
+        self.materials.append(material)
+        return material
+
+    def report(self, builder):
+        """Print merged and unused materials for a finished MeshBuilder."""
+        used = builder.materials()
+        unused = [m.name for m in self.materials if m not in used]
+        for name, material in self.merged.items():
+            print(f"  material {name} merged into {material.name}")
+        if unused:
+            print(f"  dropped unused materials: {', '.join(unused)}")
+        print(f"  {len(used)} material(s) in use")
+
+def _blender_signature(material):
+    """What a Blender material looks like when exported: its images and BSDF factors."""
+    if not material.use_nodes or not material.node_tree:
+        return ("flat", tuple(round(c, 4) for c in material.diffuse_color))
+    signature = []
+    for node in sorted(material.node_tree.nodes, key=lambda n: n.name):
+        if node.type == 'TEX_IMAGE' and node.image:
+            signature.append(("image", node.image.filepath or node.image.name))
+        elif node.type == 'BSDF_PRINCIPLED':
+            for name in ("Base Color", "Metallic", "Roughness", "Alpha"):
+                value = node.inputs[name].default_value
+                value = tuple(value) if hasattr(value, "__len__") else (value,)
+                signature.append((name, tuple(round(v, 4) for v in value)))
+    return tuple(sorted(signature))
+
+def merge_duplicate_blender_materials(objects):
+    """Point every material slot at one material per distinct look (e.g. Kenney "colormap.001")."""
+    import bpy
+
+    canonical = {}
+    merged = 0
+    for obj in objects:
+        for slot in getattr(obj, "material_slots", []):
+            if slot.material is None:
+                continue
+            keep = canonical.setdefault(_blender_signature(slot.material), slot.material)
+            if keep is not slot.material:
+                slot.material = keep
+                merged += 1
+    for material in [m for m in bpy.data.materials if m.users == 0]:
+        bpy.data.materials.remove(material)
+    return merged
+
+def print_surface_report(filepath):
+    """Print how many surfaces (draw calls) an exported GLB costs in Godot."""
+    gltf = read_glb_json(filepath)
+    print(f"{os.path.basename(filepath)}: {len(gltf.get('materials', []))} material(s), "
+          f"{surface_count(gltf)} surface(s)")
@@ -0,0 +1,676 @@
+"""
+Analytic mesh construction with numpy.
+
+Primitives (boxes, beveled boxes, cylinders, cones, rings, domes, spheres,
+tori and arbitrary surfaces of revolution) are generated directly as vertex,
+triangle and UV arrays instead of going through bpy.ops. A MeshBuilder
+collects the parts of a model and writes them into a single Blender mesh in
+one foreach_set pass, so no operator, depsgraph update or undo push is paid
+per primitive.
+
+Repeated parts (pillars, windows, domes) are built once as a component,
+memoized by their parameters, and placed as instances: every placement
+shares the component's mesh in the exported file, so adding rows of them
+costs nodes, not vertices.
+
+Coordinates are Blender's: Z up, primitives centered on their location like
+bpy.ops.mesh.primitive_*_add.
+"""
+import math
+
+import numpy as np
+
+from ao_bake import bake_ao, ground_quad
+from glb_writer import to_gltf_axes
+from lightmap_uv import unwrap
+from outline_normals import smoothed_normals
+
+# Triangles with less area than this are dropped (collapsed quads at poles)
+DEGENERATE_AREA = 1e-12
+# Sides of the prisms that stand in for round parts in collision proxies
+COLLISION_SEGMENTS = 12
+
+def euler_matrix(rotation):
+    """3x3 rotation matrix for Blender XYZ Euler angles (radians)."""
+    rx, ry, rz = rotation
+    cx, sx = math.cos(rx), math.sin(rx)
+    cy, sy = math.cos(ry), math.sin(ry)
+    cz, sz = math.cos(rz), math.sin(rz)
+    mx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    my = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    mz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return mz @ my @ mx
+
+def triangle_areas(positions, triangles):
+    a, b, c = (positions[triangles[:, i]] for i in range(3))
+    return 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+
+def convex_profile(profile):
+    """Convex hull of an (r, z) profile, counter-clockwise (monotone chain)."""
+    points = sorted(set(map(tuple, np.asarray(profile, dtype=np.float64).round(9))))
+    if len(points) < 3:
+        return np.array(points)
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return np.array(lower[:-1] + upper[:-1])
+
+def lathe_collision(profile, segments=COLLISION_SEGMENTS):
+    """Convex point clouds enclosing a surface of revolution.
+
+    A profile touching the axis becomes one circumscribed prism; a profile
+    with a hole (rings, tori) becomes one convex wedge per segment.
+    """
+    hull = convex_profile(profile)
+    # Circumscribe the polygon so the proxy never cuts into the surface
+    radius = hull[:, 0] / math.cos(math.pi / segments)
+    theta = np.linspace(0, 2 * math.pi, segments + 1)
+
+    def ring(angle):
+        return np.stack([radius * math.cos(angle), radius * math.sin(angle), hull[:, 1]], axis=1)
+
+    if hull[:, 0].min() <= 1e-9:
+        return [np.vstack([ring(angle) for angle in theta[:-1]])]
+    return [np.vstack([ring(a0), ring(a1)]) for a0, a1 in zip(theta[:-1], theta[1:])]
+
+def fillet_profile(profile, width, segments):
+    """Round the interior corners of a (r, z) profile like a BEVEL modifier would.
+
+    Points on the axis (r == 0) and the open ends are kept sharp.
+    """
+    if width <= 0 or segments < 1:
+        return list(profile)
+    points = [np.asarray(p, dtype=float) for p in profile]
+    result = [tuple(points[0])]
+    for prev, corner, nxt in zip(points, points[1:], points[2:]):
+        if corner[0] == 0:
+            result.append(tuple(corner))
+            continue
+        to_prev = prev - corner
+        to_next = nxt - corner
+        w = min(width, np.linalg.norm(to_prev) / 2, np.linalg.norm(to_next) / 2)
+        start = corner + to_prev / np.linalg.norm(to_prev) * w
+        end = corner + to_next / np.linalg.norm(to_next) * w
+        # Quadratic Bezier through the corner approximates the bevel arc
+        for t in np.linspace(0, 1, segments + 1):
+            point = (1 - t) ** 2 * start + 2 * (1 - t) * t * corner + t ** 2 * end
+            result.append(tuple(point))
+    result.append(tuple(points[-1]))
+    return result
+
+class MeshPart:
+    """One primitive of a MeshBuilder, already in model space."""
+
+    def __init__(self, name, positions, triangles, uvs, material, smooth=False, collision=None):
+        self.name = name
+        self.positions = positions
+        self.triangles = triangles
+        self.uvs = uvs
+        self.material = material
+        self.smooth = smooth
+        # Convex point clouds enclosing the part (collision.py); None means its vertices
+        self.collision = collision
+        # Per-corner (triangles, 3, 2) lightmap UVs, set by MeshBuilder.unwrap_lightmap
+        self.lightmap_uvs = None
+        # Per-corner (triangles, 3) ambient occlusion, set by MeshBuilder.bake_ao
+        self.ao = None
+        # Per-corner (triangles, 3, 3) smoothed normals, set by MeshBuilder.bake_outline_normals
+        self.outline_normals = None
+
+    @property
+    def triangle_count(self):
+        return len(self.triangles)
+
+    def corner_normals(self):
+        """Unit normal of every corner: the face normal, or area-weighted vertex normals when smooth."""
+        a, b, c = (self.positions[self.triangles[:, i]] for i in range(3))
+        face_normals = np.cross(b - a, c - a)
+        if self.smooth:
+            vertex_normals = np.zeros_like(self.positions)
+            for i in range(3):
+                np.add.at(vertex_normals, self.triangles[:, i], face_normals)
+            normals = vertex_normals[self.triangles.ravel()]
+        else:
+            normals = np.repeat(face_normals, 3, axis=0)
+        return normals / np.maximum(np.linalg.norm(normals, axis=1, keepdims=True), 1e-12)
+
+    def transformed(self, matrix, offset):
+        """A copy rotated by a 3x3 matrix and then moved by offset, baked data included."""
+        def transform(points):
+            return points @ matrix.T + offset
+
+        collision = None if self.collision is None else [transform(points) for points in self.collision]
+        copy = MeshPart(self.name, transform(self.positions), self.triangles, self.uvs, self.material,
+                        self.smooth, collision)
+        copy.lightmap_uvs = self.lightmap_uvs
+        copy.ao = self.ao
+        if self.outline_normals is not None:
+            copy.outline_normals = self.outline_normals @ matrix.T
+        return copy
+
+class Instance:
+    """A placement of a shared component: rotated (XYZ Euler, radians), then moved to location."""
+
+    def __init__(self, name, component, location, rotation=None):
+        self.name = name
+        self.component = component
+        self.location = np.asarray(location, dtype=np.float64)
+        self.rotation = rotation
+
+    def matrix(self):
+        return np.eye(3) if self.rotation is None else euler_matrix(self.rotation)
+
+    def world_parts(self):
+        """Copies of the component's parts in model space, in component part order."""
+        matrix = self.matrix()
+        parts = []
+        for part in self.component.parts:
+            copy = part.transformed(matrix, self.location)
+            copy.name = self.name if len(self.component.parts) == 1 else f"{self.name}_{part.name}"
+            parts.append(copy)
+        return parts
+
+class MeshBuilder:
+    """Collects analytic primitives and writes them out as one mesh."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self.parts = []
+        # (width, height) of the lightmap atlas once unwrapped
+        self.lightmap_size = None
+        self.lightmap_texel_size = None
+        # Shared components by (name, build, parameters) and their placements
+        self.components = {}
+        self.instances = []
+
+    # === GENERIC ===
+
+    def add(self, name, positions, triangles, uvs, material, smooth=False,
+            location=(0, 0, 0), rotation=None, scale=(1, 1, 1), collision=None):
+        """Add raw local-space geometry, transformed by scale, rotation, then location.
+
+        `collision` optionally lists local-space convex point clouds enclosing it.
+        """
+        def transform(points):
+            points = np.asarray(points, dtype=np.float64) * np.asarray(scale, dtype=np.float64)
+            if rotation is not None:
+                points = points @ euler_matrix(rotation).T
+            return points + np.asarray(location, dtype=np.float64)
+
+        positions = transform(positions)
+        triangles = np.asarray(triangles, dtype=np.int64).reshape(-1, 3)
+        keep = triangle_areas(positions, triangles) > DEGENERATE_AREA
+        if collision is not None:
+            collision = [transform(points) for points in collision]
+        part = MeshPart(name, positions, triangles[keep], np.asarray(uvs, dtype=np.float64),
+                        material, smooth, collision)
+        self.parts.append(part)
+        return part
+
+    def add_lathe(self, name, location, profile, material, segments=32, closed=False,
+                  smooth=False, rotation=None, scale=(1, 1, 1)):
+        """Surface of revolution of an (r, z) profile around the local Z axis.
+
+        The profile should run counter-clockwise in the r/z plane (bottom to
+        top on the outside) for outward facing normals. Points with r == 0
+        become poles; `closed` joins the last point back to the first.
+        """
+        profile = np.asarray(profile, dtype=np.float64)
+        if closed:
+            profile = np.vstack([profile, profile[:1]])
+        rows = len(profile)
+        cols = segments + 1
+
+        theta = np.linspace(0, 2 * math.pi, cols)
+        radius = profile[:, 0][:, None]
+        positions = np.stack([
+            radius * np.cos(theta)[None, :],
+            radius * np.sin(theta)[None, :],
+            np.broadcast_to(profile[:, 1][:, None], (rows, cols)),
+        ], axis=-1).reshape(-1, 3)
+
+        lengths = np.concatenate([[0], np.cumsum(np.linalg.norm(np.diff(profile, axis=0), axis=1))])
+        v = lengths / lengths[-1] if lengths[-1] > 0 else np.zeros(rows)
+        u = np.linspace(0, 1, cols)
+        uvs = np.stack(np.meshgrid(u, v), axis=-1).reshape(-1, 2)
+
+        i, j = np.meshgrid(np.arange(rows - 1), np.arange(segments), indexing="ij")
+        v00 = (i * cols + j).ravel()
+        v01 = v00 + 1
+        v10 = v00 + cols
+        v11 = v10 + 1
+        triangles = np.concatenate([
+            np.stack([v00, v01, v11], axis=1),
+            np.stack([v00, v11, v10], axis=1),
+        ])
+        return self.add(name, positions, triangles, uvs, material, smooth,
+                        location, rotation, scale, collision=lathe_collision(profile))
+
+    # === PRIMITIVES ===
+
+    def add_box(self, name, location, half_extents, material, rotation=None):
+        """Axis-aligned box, like primitive_cube_add with scale=half_extents."""
+        hx, hy, hz = half_extents
+        # Outward normal, then two in-plane axes chosen so (u x v) == normal
+        faces = [
+            ((1, 0, 0), (0, 1, 0), (0, 0, 1)),
+            ((-1, 0, 0), (0, -1, 0), (0, 0, 1)),
+            ((0, 1, 0), (-1, 0, 0), (0, 0, 1)),
+            ((0, -1, 0), (1, 0, 0), (0, 0, 1)),
+            ((0, 0, 1), (1, 0, 0), (0, 1, 0)),
+            ((0, 0, -1), (0, 1, 0), (1, 0, 0)),
+        ]
+        corners = np.array([(-1, -1), (1, -1), (1, 1), (-1, 1)], dtype=np.float64)
+        box_corners = np.array(np.meshgrid([-1, 1], [-1, 1], [-1, 1])).reshape(3, -1).T
+        positions, uvs, triangles = [], [], []
+        for f, (n, a, b) in enumerate(faces):
+            n, a, b = (np.array(x, dtype=np.float64) for x in (n, a, b))
+            quad = n[None, :] + corners[:, :1] * a[None, :] + corners[:, 1:] * b[None, :]
+            positions.append(quad)
+            uvs.append((corners + 1) / 2)
+            base = f * 4
+            triangles += [(base, base + 1, base + 2), (base, base + 2, base + 3)]
+        return self.add(name, np.vstack(positions), triangles, np.vstack(uvs), material,
+                        location=location, rotation=rotation, scale=(hx, hy, hz),
+                        collision=[box_corners])
+
+    def add_beveled_box(self, name, location, half_extents, material, bevel, segments=2):
+        """Box with rounded edges and corners, like a BEVEL modifier on a cube."""
+        hx, hy, hz = half_extents
+        r = min(bevel, hx, hy, hz)
+        inner = np.array([hx - r, hy - r, hz - r])
+        steps = np.linspace(0, math.pi / 2, segments + 1)
+
+        # Longitude columns: one quarter per (x, y) quadrant
+        phis, col_signs = [], []
+        for q, (sx, sy) in enumerate([(1, 1), (-1, 1), (-1, -1), (1, -1)]):
+            phis.append(steps + q * math.pi / 2)
+            col_signs += [(sx, sy)] * (segments + 1)
+        phi = np.concatenate(phis)
+        col_signs = np.array(col_signs, dtype=np.float64)
+        # Latitude rows: upper then lower hemisphere
+        theta = np.concatenate([steps, steps + math.pi / 2])
+        row_sign = np.repeat([1.0, -1.0], segments + 1)
+
+        rows, cols = len(theta), len(phi)
+        st, ct = np.sin(theta)[:, None], np.cos(theta)[:, None]
+        positions = np.stack([
+            col_signs[None, :, 0] * inner[0] + r * st * np.cos(phi)[None, :],
+            col_signs[None, :, 1] * inner[1] + r * st * np.sin(phi)[None, :],
+            np.broadcast_to(row_sign[:, None] * inner[2] + r * ct, (rows, cols)),
+        ], axis=-1).reshape(-1, 3)
+        uvs = np.stack(np.meshgrid(phi / (2 * math.pi), theta / math.pi), axis=-1).reshape(-1, 2)
+
+        i, j = np.meshgrid(np.arange(rows - 1), np.arange(cols), indexing="ij")
+        v00 = (i * cols + j).ravel()
+        v01 = (i * cols + (j + 1) % cols).ravel()
+        v10 = v00 + cols
+        v11 = v01 + cols
+        triangles = [np.stack([v00, v11, v01], axis=1), np.stack([v00, v10, v11], axis=1)]
+        # Flat top and bottom faces between the four corner columns
+        corner_cols = np.arange(4) * (segments + 1)
+        top = corner_cols
+        bottom = (rows - 1) * cols + corner_cols
+        triangles.append(np.array([[top[0], top[1], top[2]], [top[0], top[2], top[3]],
+                                   [bottom[0], bottom[2], bottom[1]], [bottom[0], bottom[3], bottom[2]]]))
+        box_corners = np.array(np.meshgrid([-hx, hx], [-hy, hy], [-hz, hz])).reshape(3, -1).T
+        return self.add(name, positions, np.concatenate(triangles), uvs, material, location=location,
+                        collision=[box_corners])
+
+    def add_cylinder(self, name, location, radius, depth, material, segments=32, bevel=0.0,
+                     bevel_segments=2, rotation=None):
+        """Capped cylinder centered on location, optionally with beveled rims."""
+        return self.add_tapered_cylinder(name, location, radius, radius, depth, material,
+                                         segments, bevel, bevel_segments, rotation)
+
+    def add_tapered_cylinder(self, name, location, bottom_radius, top_radius, depth, material,
+                             segments=32, bevel=0.0, bevel_segments=2, rotation=None):
+        """Capped cylinder whose bottom and top radii differ (bowls, pedestals)."""
+        h = depth / 2
+        profile = [(0, -h), (bottom_radius, -h), (top_radius, h), (0, h)]
+        profile = fillet_profile(profile, bevel, bevel_segments)
+        return self.add_lathe(name, location, profile, material, segments, rotation=rotation)
+
+    def add_cone(self, name, location, radius1, radius2, depth, material, segments=32, rotation=None):
+        """Cone or frustum like primitive_cone_add (radius1 at the bottom)."""
+        return self.add_tapered_cylinder(name, location, radius1, radius2, depth, material,
+                                         segments, rotation=rotation)
+
+    def add_ring(self, name, location, inner_radius, outer_radius, depth, material, segments=32):
+        """Annular ring (a cylinder with a concentric hole)."""
+        h = depth / 2
+        profile = [(inner_radius, -h), (outer_radius, -h), (outer_radius, h), (inner_radius, h)]
+        return self.add_lathe(name, location, profile, material, segments, closed=True)
+
+    def add_uv_sphere(self, name, location, radius, material, segments=32, rings=16, scale_z=1.0,
+                      smooth=False):
+        """UV sphere, optionally squashed along Z."""
+        phi = np.linspace(-math.pi / 2, math.pi / 2, rings + 1)
+        profile = np.stack([radius * np.cos(phi), radius * np.sin(phi) * scale_z], axis=1)
+        profile[[0, -1], 0] = 0
+        return self.add_lathe(name, location, profile, material, segments, smooth=smooth)
+
+    def add_dome(self, name, location, radius, material, height=None, segments=32, rings=8,
+                 smooth=False):
+        """Open hemisphere sitting on location (the upper half of a UV sphere)."""
+        height = radius if height is None else height
+        phi = np.linspace(0, math.pi / 2, rings + 1)
+        profile = np.stack([radius * np.cos(phi), height * np.sin(phi)], axis=1)
+        profile[-1, 0] = 0
+        return self.add_lathe(name, location, profile, material, segments, smooth=smooth)
+
+    def add_torus(self, name, location, major_radius, minor_radius, material,
+                  major_segments=48, minor_segments=12, smooth=False):
+        """Torus around the Z axis."""
+        angle = np.linspace(-math.pi / 2, 3 * math.pi / 2, minor_segments, endpoint=False)
+        profile = np.stack([major_radius + minor_radius * np.cos(angle),
+                            minor_radius * np.sin(angle)], axis=1)
+        return self.add_lathe(name, location, profile, material, major_segments,
+                              closed=True, smooth=smooth)
+
+    # === COMPONENTS ===
+
+    def component(self, name, build, **params):
+        """The component build(component, **params) creates, built once per name, build and parameters.
+
+        Components are MeshBuilders of their own, built around the origin;
+        parameters must be hashable (numbers, tuples, Material specs).
+        """
+        key = (name, build, tuple(sorted(params.items())))
+        if key not in self.components:
+            taken = sum(1 for other in self.components if other[0] == name)
+            component = MeshBuilder(name if not taken else f"{name}_{taken}")
+            build(component, **params)
+            self.components[key] = component
+        return self.components[key]
+
+    def place(self, name, component, location, rotation=None):
+        """Place a copy of a component that shares its mesh."""
+        instance = Instance(name, component, location, rotation)
+        self.instances.append(instance)
+        return instance
+
+    def instanced_parts(self):
+        """(instance, component part, model-space copy) for every placed part."""
+        return [(instance, part, copy) for instance in self.instances
+                for part, copy in zip(instance.component.parts, instance.world_parts())]
+
+    def merge_single_instances(self):
+        """Copy components placed only once into the model's own parts.
+
+        A node of its own would cost a draw call and save no memory.
+        """
+        counts = {}
+        for instance in self.instances:
+            counts[id(instance.component)] = counts.get(id(instance.component), 0) + 1
+        for instance in [i for i in self.instances if counts[id(i.component)] == 1]:
+            self.parts.extend(instance.world_parts())
+            self.instances.remove(instance)
+        self.components = {key: component for key, component in self.components.items()
+                           if counts.get(id(component), 0) > 1}
+        return len(self.instances)
+
+    def all_parts(self):
+        """The model's own parts, then the parts of every component once."""
+        return self.parts + [part for component in self.components.values() for part in component.parts]
+
+    def flattened(self):
+        """A MeshBuilder with every placement copied in, for passes needing one mesh (collision, chunks)."""
+        flat = MeshBuilder(self.name)
+        flat.parts = self.parts + [copy for _instance, _part, copy in self.instanced_parts()]
+        flat.lightmap_size = self.lightmap_size
+        flat.lightmap_texel_size = self.lightmap_texel_size
+        return flat
+
+    # === OUTPUT ===
+
+    @property
+    def triangle_count(self):
+        """Triangles stored: own parts plus every component once."""
+        return sum(part.triangle_count for part in self.all_parts())
+
+    @property
+    def drawn_triangle_count(self):
+        """Triangles drawn: own parts plus every placement."""
+        return (sum(part.triangle_count for part in self.parts)
+                + sum(part.triangle_count for _instance, part, _copy in self.instanced_parts()))
+
+    def materials(self, components=True):
+        """Materials in first-use order, those only used by components included unless told otherwise."""
+        seen = []
+        for part in (self.all_parts() if components else self.parts):
+            if part.material not in seen:
+                seen.append(part.material)
+        return seen
+
+    def bounds(self):
+        points = np.vstack([part.positions for part in self.flattened().parts])
+        return points.min(axis=0), points.max(axis=0)
+
+    def center_on_bounds(self):
+        """Move all geometry so its bounding box is centered on the origin."""
+        low, high = self.bounds()
+        offset = (low + high) / 2
+        for part in self.parts:
+            part.positions = part.positions - offset
+        for instance in self.instances:
+            instance.location = instance.location - offset
+        return offset
+
+    def concatenate(self):
+        """All parts as one set of arrays, with a per-triangle material index."""
+        materials = self.materials(components=False)
+        positions, triangles, uvs, material_index, smooth = [], [], [], [], []
+        base = 0
+        for part in self.parts:
+            positions.append(part.positions)
+            triangles.append(part.triangles + base)
+            uvs.append(part.uvs)
+            material_index.append(np.full(len(part.triangles), materials.index(part.material)))
+            smooth.append(np.full(len(part.triangles), part.smooth))
+            base += len(part.positions)
+        return (np.vstack(positions), np.vstack(triangles), np.vstack(uvs),
+                np.concatenate(material_index), np.concatenate(smooth), materials)
+
+    def unwrap_lightmap(self, texel_size):
+        """Give every part lightmap UVs in one shared atlas (see lightmap_uv.py).
+
+        Components get an atlas of their own; Godot lightmaps every placement separately.
+        """
+        self.lightmap_texel_size = texel_size
+        for component in self.components.values():
+            component.unwrap_lightmap(texel_size)
+        if not self.parts:
+            return self.lightmap_size
+        corners = np.concatenate([part.positions[part.triangles] for part in self.parts])
+        uvs, self.lightmap_size = unwrap(corners, texel_size)
+        start = 0
+        for part in self.parts:
+            part.lightmap_uvs = uvs[start:start + len(part.triangles)]
+            start += len(part.triangles)
+        return self.lightmap_size
+
+    def bake_ao(self, samples, distance, jobs=0, ground=True):
+        """Bake per-corner ambient occlusion against all parts joined (see ao_bake.py).
+
+        Corners sharing a position and normal are baked once. With ground, a
+        plane under the model darkens where it stands. Every placement of a
+        component is baked where it stands; the component keeps their average.
+        """
+        placed = self.instanced_parts()
+        parts = self.parts + [copy for _instance, _part, copy in placed]
+        corners = np.concatenate([part.positions[part.triangles] for part in parts])
+        occluders = np.concatenate([corners, ground_quad(corners, 2, distance)]) if ground else corners
+        points = corners.reshape(-1, 3)
+        normals = np.vstack([part.corner_normals() for part in parts])
+        keys = np.round(np.hstack([points, normals]), 6)
+        _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+        ao = bake_ao(points[first], normals[first], occluders, samples, distance, jobs)[inverse.ravel()]
+        start = 0
+        sums = {}
+        for i, part in enumerate(parts):
+            values = ao[start:start + 3 * len(part.triangles)].reshape(-1, 3)
+            start += 3 * len(part.triangles)
+            if i < len(self.parts):
+                part.ao = values
+            else:
+                source = placed[i - len(self.parts)][1]
+                total, count = sums.get(id(source), (0.0, 0))
+                sums[id(source)] = (total + values, count + 1)
+        for _instance, part, _copy in placed:
+            total, count = sums[id(part)]
+            part.ao = total / count
+        print(f"  vertex AO: {len(first)} vertices baked, mean {ao.mean():.2f}, min {ao.min():.2f}")
+        return ao
+
+    def bake_outline_normals(self):
+        """Give every corner the smoothed normal of its position (see outline_normals.py).
+
+        Components are smoothed on their own, as every placement shares their normals.
+        """
+        for component in self.components.values():
+            component.bake_outline_normals()
+        if not self.parts:
+            return None
+        corners = np.concatenate([part.positions[part.triangles] for part in self.parts])
+        normals = smoothed_normals(corners)
+        start = 0
+        for part in self.parts:
+            part.outline_normals = normals[start:start + len(part.triangles)]
+            start += len(part.triangles)
+        return normals
+
+    def vertex_buffers(self, weld_decimals=6):
+        """Per-material (material, arrays, indices) with explicit normals.
+
+        arrays maps "positions", "normals" and "uvs" to per-vertex arrays, plus
+        "lightmap_uvs", "ao" and "outline_normals" once unwrap_lightmap(),
+        bake_ao() and bake_outline_normals() have run. Flat parts get one face
+        normal per corner, smooth parts area-weighted vertex normals; identical
+        corners are then welded back together.
+        """
+        optional = [key for key in ("lightmap_uvs", "ao", "outline_normals")
+                    if all(getattr(part, key) is not None for part in self.parts)]
+        buffers = []
+        for material in self.materials(components=False):
+            columns = {key: [] for key in ["positions", "normals", "uvs"] + optional}
+            for part in self.parts:
+                if part.material != material:
+                    continue
+                corners = part.triangles.ravel()
+                columns["positions"].append(part.positions[corners])
+                columns["normals"].append(part.corner_normals())
+                columns["uvs"].append(part.uvs[corners])
+                for key in optional:
+                    values = getattr(part, key)
+                    columns[key].append(values.reshape(len(corners), -1))
+
+            arrays = {key: np.vstack(values) for key, values in columns.items()}
+            keys = np.round(np.hstack(list(arrays.values())), weld_decimals)
+            _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+            # Renumber unique vertices in order of first use to keep triangle locality
+            order = np.argsort(first)
+            rank = np.empty_like(order)
+            rank[order] = np.arange(len(order))
+            keep = first[order]
+            indices = rank[inverse.ravel()].reshape(-1, 3)
+            arrays = {key: array[keep] for key, array in arrays.items()}
+            if "ao" in arrays:
+                arrays["ao"] = arrays["ao"][:, 0]
+            buffers.append((material, arrays, indices))
+        return buffers
+
+    def to_blender(self, name):
+        """Create a Blender object holding every part, materials in first-use order.
+
+        Part materials are materials.Material specs. Placements become child
+        objects sharing one mesh per component (linked duplicates), which the
+        glTF exporter writes once and references from every node.
+        """
+        import bpy
+
+        obj = bpy.data.objects.new(name, self._blender_mesh(name))
+        self._set_blender_properties(obj)
+        bpy.context.collection.objects.link(obj)
+        meshes = {}
+        for instance in self.instances:
+            component = instance.component
+            if id(component) not in meshes:
+                meshes[id(component)] = component._blender_mesh(component.name)
+            child = bpy.data.objects.new(instance.name, meshes[id(component)])
+            child.location = instance.location
+            if instance.rotation is not None:
+                child.rotation_euler = instance.rotation
+            component._set_blender_properties(child)
+            child.parent = obj
+            bpy.context.collection.objects.link(child)
+        return obj
+
+    def _blender_mesh(self, name):
+        import bpy
+
+        positions, triangles, uvs, material_index, smooth, materials = self.concatenate()
+        loop_count = triangles.size
+
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(positions))
+        mesh.loops.add(loop_count)
+        mesh.polygons.add(len(triangles))
+        mesh.vertices.foreach_set("co", positions.astype(np.float32).ravel())
+        mesh.loops.foreach_set("vertex_index", triangles.astype(np.int32).ravel())
+        mesh.polygons.foreach_set("loop_start", np.arange(0, loop_count, 3, dtype=np.int32))
+        try:
+            mesh.polygons.foreach_set("loop_total", np.full(len(triangles), 3, dtype=np.int32))
+        except (AttributeError, TypeError, RuntimeError):
+            pass  # Read-only (derived from loop_start) since Blender 4.0
+        mesh.polygons.foreach_set("material_index", material_index.astype(np.int32))
+        mesh.polygons.foreach_set("use_smooth", smooth.astype(bool))
+
+        uv_layer = mesh.uv_layers.new(name="UVMap")
+        uv_layer.data.foreach_set("uv", uvs[triangles.ravel()].astype(np.float32).ravel())
+        if all(part.lightmap_uvs is not None for part in self.parts):
+            # Second layer, exported as TEXCOORD_1 (UV2 in Godot)
+            lightmap_layer = mesh.uv_layers.new(name="UV2")
+            lightmap_uvs = np.concatenate([part.lightmap_uvs for part in self.parts])
+            lightmap_layer.data.foreach_set("uv", lightmap_uvs.astype(np.float32).ravel())
+        if all(part.ao is not None for part in self.parts):
+            # Per-corner gray, exported as COLOR_0
+            ao = np.concatenate([part.ao.ravel() for part in self.parts])
+            colors = np.repeat(ao[:, None], 4, axis=1)
+            colors[:, 3] = 1.0
+            color_layer = mesh.color_attributes.new("AO", 'BYTE_COLOR', 'CORNER')
+            color_layer.data.foreach_set("color", colors.astype(np.float32).ravel())
+            mesh.color_attributes.active_color = color_layer
+        if all(part.outline_normals is not None for part in self.parts):
+            # Two more UV layers, exported as TEXCOORD_2/3 (CUSTOM0 in Godot). The
+            # exporter converts to Y up and flips V, so both are undone here.
+            if mesh.uv_layers.get("UV2") is None:
+                mesh.uv_layers.new(name="UV2")  # Keeps the normals at TEXCOORD_2
+            normals = to_gltf_axes(np.concatenate([part.outline_normals for part in self.parts]).reshape(-1, 3))
+            for layer_name, uv in (("OutlineNormalXY", normals[:, :2]),
+                                   ("OutlineNormalZ", np.stack([normals[:, 2], np.zeros(len(normals))], axis=1))):
+                uv = np.stack([uv[:, 0], 1.0 - uv[:, 1]], axis=1)
+                mesh.uv_layers.new(name=layer_name).data.foreach_set("uv", uv.astype(np.float32).ravel())
+
+        for material in materials:
+            mesh.materials.append(material.to_blender())
+        mesh.update(calc_edges=True)
+        mesh.validate()
+        return mesh
+
+    def _set_blender_properties(self, obj):
+        if self.lightmap_size is not None:
+            # Custom properties are exported as node extras (export_extras=True)
+            obj["lightmap_size_hint"] = list(self.lightmap_size)
+        if all(part.outline_normals is not None for part in self.parts):
+            obj["outline_normals"] = True
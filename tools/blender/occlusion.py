@@ -0,0 +1,241 @@
+"""
+Conservative occluder proxies for buildings, no Blender needed.
+
+The render meshes of a GLB (collision-only nodes excluded) are voxelized
+and the space outside is flood filled; whatever the outside cannot reach is
+solid. Overlapping primitives union cleanly, and hollow but closed shells
+(the Kenney towers with their floors) count as solid because nothing inside
+them can be seen from outside. Boxes are then grown over solid voxels,
+thickest region first, so every box lies inside the body (an inner hull of
+the base, tiers and towers) and never hides anything that is visible.
+
+The boxes are written as a Godot ArrayOccluder3D text resource next to the
+model (model.glb -> model_occluder.tres), ready for an OccluderInstance3D
+with the same transform as the model instance. Occlusion culling also has
+to be on in the project settings (rendering/occlusion_culling).
+"""
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import GlbError, accessor_array, mesh_instances, read_glb
+
+# Voxels along the longest side of the model
+DEFAULT_RESOLUTION = 128
+# Boxes thinner than this (meters) hardly hide anything
+DEFAULT_MIN_SIZE = 2.0
+DEFAULT_MAX_BOXES = 24
+
+# Outward-wound faces of a box whose corner i sits at (i >> 2 & 1, i >> 1 & 1, i & 1)
+BOX_TRIANGLES = np.array([
+    (0, 1, 2), (1, 3, 2), (4, 6, 5), (5, 6, 7),  # -x, +x
+    (0, 4, 1), (1, 4, 5), (2, 3, 6), (3, 7, 6),  # -y, +y
+    (0, 2, 4), (2, 6, 4), (1, 5, 3), (3, 5, 7),  # -z, +z
+])
+
+def add_occluder_arguments(parser):
+    """Occluder options, for pipeline.parse_args(configure=...)."""
+    parser.add_argument("--occluder", action=argparse.BooleanOptionalAction, default=True,
+                        help="write an ArrayOccluder3D resource next to the model (default: on)")
+
+def occluder_path(output):
+    """Occluder resource written next to a model (model.glb -> model_occluder.tres)."""
+    return os.path.splitext(output)[0] + "_occluder.tres"
+
+def world_triangles(gltf, binary):
+    """(faces, 3, 3) world-space corners of every rendered triangle, in glTF axes."""
+    corners = []
+    for _node, mesh, world in mesh_instances(gltf, binary):
+        for primitive in gltf["meshes"][mesh]["primitives"]:
+            if primitive.get("mode", 4) != 4:
+                continue
+            points = accessor_array(gltf, binary, primitive["attributes"]["POSITION"]).astype(np.float64)
+            if "indices" in primitive:
+                faces = accessor_array(gltf, binary, primitive["indices"]).astype(np.int64).reshape(-1, 3)
+            else:
+                faces = np.arange(len(points)).reshape(-1, 3)
+            if np.linalg.det(world[:3, :3]) < 0:
+                faces = faces[:, ::-1]  # Mirrored instances flip the winding
+            corners.append((points @ world[:3, :3].T + world[:3, 3])[faces])
+    return np.concatenate(corners) if corners else np.zeros((0, 3, 3))
+
+def _surface_samples(triangles, spacing):
+    """Points on every triangle, no further than spacing apart."""
+    edges = np.stack([triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 1],
+                      triangles[:, 0] - triangles[:, 2]], axis=1)
+    steps = np.maximum(np.ceil(np.linalg.norm(edges, axis=2).max(axis=1) / spacing), 1).astype(np.int64)
+    samples = [triangles.reshape(-1, 3)]
+    for n in np.unique(steps):
+        group = triangles[steps == n]
+        i, j = np.array([(i, j) for i in range(n + 1) for j in range(n + 1 - i)]).T / n
+        weights = np.stack([1.0 - i - j, i, j], axis=1)
+        samples.append(np.einsum("sk,fkc->fsc", weights, group).reshape(-1, 3))
+    return np.vstack(samples)
+
+def voxelize(triangles, resolution=DEFAULT_RESOLUTION):
+    """Solid voxels of a triangle soup; returns (inside (nx, ny, nz) bool, origin, voxel size).
+
+    Voxels touched by a triangle form the surface. Everything the outside can
+    reach without crossing it is empty, the rest is solid. Surface voxels are
+    left out, so the center of every solid voxel lies strictly inside.
+    """
+    points = triangles.reshape(-1, 3)
+    voxel = float((points.max(axis=0) - points.min(axis=0)).max()) / resolution
+    # One empty layer around the model lets the outside flood all the way round
+    origin = points.min(axis=0) - voxel
+    shape = np.ceil((points.max(axis=0) - origin) / voxel).astype(np.int64) + 2
+
+    surface = np.zeros(shape, dtype=bool)
+    cells = np.floor((_surface_samples(triangles, voxel / 2) - origin) / voxel).astype(np.int64)
+    surface[tuple(np.clip(cells, 0, shape - 1).T)] = True
+
+    # Face-connected flood fill from the border; it cannot pass a surface of samples
+    outside = np.zeros(shape, dtype=bool)
+    outside[0, :, :] = outside[-1, :, :] = True
+    outside[:, 0, :] = outside[:, -1, :] = True
+    outside[:, :, 0] = outside[:, :, -1] = True
+    outside &= ~surface
+    while True:
+        grown = outside.copy()
+        for axis in range(3):
+            for shift in (-1, 1):
+                grown |= np.roll(outside, shift, axis=axis)
+        grown &= ~surface
+        if np.array_equal(grown, outside):
+            break
+        outside = grown
+    return ~outside & ~surface, origin, voxel
+
+def _depth(inside):
+    """Chessboard distance (in voxels) of every inside voxel to the outside."""
+    depth = np.zeros(inside.shape, dtype=np.int32)
+    current = inside.copy()
+    while current.any():
+        depth += current
+        padded = np.pad(current, 1)
+        eroded = current.copy()
+        for axis in range(3):
+            for shift in (-1, 1):
+                eroded &= np.roll(padded, shift, axis=axis)[1:-1, 1:-1, 1:-1]
+        current = eroded
+    return depth
+
+def _grow(inside, seed, axes):
+    """Largest box of inside voxels around seed, grown fully along each axis in turn."""
+    low, high = seed.copy(), seed.copy()
+    for axis in axes:
+        for side in (-1, 1):
+            while True:
+                lo, hi = low.copy(), high.copy()
+                if side < 0:
+                    lo[axis] -= 1
+                    hi[axis] = lo[axis]
+                else:
+                    hi[axis] += 1
+                    lo[axis] = hi[axis]
+                if lo[axis] < 0 or hi[axis] >= inside.shape[axis] \
+                        or not inside[lo[0]:hi[0] + 1, lo[1]:hi[1] + 1, lo[2]:hi[2] + 1].all():
+                    break
+                low, high = np.minimum(low, lo), np.maximum(high, hi)
+    return low, high
+
+def inner_boxes(inside, min_voxels=1, max_boxes=DEFAULT_MAX_BOXES):
+    """Boxes of inside voxels, each seeded at the deepest voxel not covered yet.
+
+    Every seed is grown in all axis orders and the box covering the most new
+    voxels wins. Returns (low, high) voxel index pairs, high inclusive.
+    """
+    depth = _depth(inside)
+    covered = ~inside
+    boxes = []
+    while len(boxes) < max_boxes:
+        candidates = np.where(covered, 0, depth)
+        if candidates.max() == 0:
+            break
+        seed = np.array(np.unravel_index(candidates.argmax(), inside.shape))
+        best, best_new = None, -1
+        for axes in itertools.permutations(range(3)):
+            low, high = _grow(inside, seed, axes)
+            new = int((~covered[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1]).sum())
+            if new > best_new:
+                best, best_new = (low, high), new
+        low, high = best
+        covered[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1] = True
+        # Too thin to occlude, or mostly inside earlier boxes: keep looking elsewhere
+        if (high - low).min() + 1 < min_voxels or best_new < min_voxels ** 2:
+            continue
+        boxes.append((low, high))
+    return boxes
+
+def box_mesh(boxes, origin, voxel):
+    """Vertices and triangles of boxes spanning their outermost voxel centers."""
+    vertices, triangles = [], []
+    for low, high in boxes:
+        lo = origin + (low + 0.5) * voxel
+        hi = origin + (high + 0.5) * voxel
+        corners = np.array([[(lo, hi)[x][0], (lo, hi)[y][1], (lo, hi)[z][2]]
+                            for x in (0, 1) for y in (0, 1) for z in (0, 1)])
+        triangles.append(BOX_TRIANGLES + 8 * len(vertices))
+        vertices.append(corners)
+    if not vertices:
+        return np.zeros((0, 3)), np.zeros((0, 3), dtype=np.int64)
+    return np.vstack(vertices), np.vstack(triangles)
+
+def occluder_resource(vertices, triangles):
+    """Text of a Godot ArrayOccluder3D resource."""
+    values = ", ".join(f"{value:.6g}" for value in np.asarray(vertices, dtype=np.float64).ravel())
+    indices = ", ".join(str(int(index)) for index in np.asarray(triangles).ravel())
+    return ('[gd_resource type="ArrayOccluder3D" format=3]\n\n'
+            "[resource]\n"
+            f"vertices = PackedVector3Array({values})\n"
+            f"indices = PackedInt32Array({indices})\n")
+
+def write_occluder(filepath, output=None, resolution=DEFAULT_RESOLUTION, min_size=DEFAULT_MIN_SIZE,
+                   max_boxes=DEFAULT_MAX_BOXES):
+    """Write the occluder resource for a GLB; returns a summary dict."""
+    output = output or occluder_path(filepath)
+    gltf, binary = read_glb(filepath)
+    triangles = world_triangles(gltf, binary)
+    if not len(triangles):
+        raise GlbError(f"{filepath}: no triangles to build an occluder from")
+    inside, origin, voxel = voxelize(triangles, resolution)
+    # Box edges run between voxel centers, hence the extra voxel
+    boxes = inner_boxes(inside, int(np.ceil(min_size / voxel)) + 1, max_boxes)
+    vertices, faces = box_mesh(boxes, origin, voxel)
+    with open(output, "w") as f:
+        f.write(occluder_resource(vertices, faces))
+    in_boxes = np.zeros(inside.shape, dtype=bool)
+    for low, high in boxes:
+        in_boxes[low[0]:high[0] + 1, low[1]:high[1] + 1, low[2]:high[2] + 1] = True
+    coverage = in_boxes.sum() / max(inside.sum(), 1)
+    print(f"  occluder: {len(boxes)} box(es), {len(faces)} triangles covering "
+          f"{100 * coverage:.0f}% of the solid volume -> {os.path.basename(output)}")
+    return {"boxes": len(boxes), "triangles": len(faces), "coverage": float(coverage)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write ArrayOccluder3D proxies for GLB models")
+    parser.add_argument("files", nargs="+", help="GLB files (model.glb -> model_occluder.tres)")
+    parser.add_argument("--resolution", type=int, default=DEFAULT_RESOLUTION,
+                        help="voxels along the longest side (default: %(default)s)")
+    parser.add_argument("--min-size", type=float, default=DEFAULT_MIN_SIZE,
+                        help="skip boxes thinner than this in meters (default: %(default)s)")
+    parser.add_argument("--max-boxes", type=int, default=DEFAULT_MAX_BOXES,
+                        help="most boxes per occluder (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for filepath in args.files:
+        print(os.path.basename(filepath))
+        try:
+            write_occluder(filepath, None, args.resolution, args.min_size, args.max_boxes)
+        except GlbError as e:
+            print(f"error: {e}")
+            failed = True
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Smoothed normals for inverted-hull outlines, no Blender needed.
+
+An inverted hull pushes every vertex out along its normal. Hard-edged
+geometry has one normal per face at a crease, so the copies of a corner
+move apart and the hull tears open along every edge. Here every position
+gets one normal averaged over all faces that meet there (weighted by the
+corner angle, so a box corner points straight out of the corner), and the
+outline shaders (shaders/cel/outline.gdshader, shaders/outline.gdshader)
+extrude along it instead. The shading normals are left alone.
+
+UV2 holds the lightmap UVs, so the normal goes into TEXCOORD_2 (x, y) and
+TEXCOORD_3 (z, 0), which Godot imports together as the CUSTOM0 channel.
+Node extras get "outline_normals", which makes
+scripts/tools/model_post_import.gd add the outline pass to the materials.
+
+Run with:
+    python3 outline_normals.py ../../assets/models/buildings/academy_assembled.glb
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from glb_reader import (accessor_array, add_file_arguments, mesh_instances, normalized_attributes,
+                        read_glb, run_on_files)
+from glb_writer import GlbDocument, custom_channel
+from godot_import import use_post_import, warn_if_not_imported
+
+# Corners closer than this (meters) share one outline normal
+WELD_DECIMALS = 5
+
+def smoothed_normals(corners):
+    """(faces, 3, 3) corners -> (faces, 3, 3) unit normals shared by every corner at a position."""
+    corners = np.asarray(corners, dtype=np.float64)
+    face_normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+    lengths = np.linalg.norm(face_normals, axis=1, keepdims=True)
+    face_normals = np.where(lengths > 1e-12, face_normals / np.maximum(lengths, 1e-12), 0.0)
+
+    # Angle of every triangle at each of its corners
+    to_next = np.roll(corners, -1, axis=1) - corners
+    to_prev = np.roll(corners, 1, axis=1) - corners
+    cosines = np.einsum("fkc,fkc->fk", to_next, to_prev) / np.maximum(
+        np.linalg.norm(to_next, axis=2) * np.linalg.norm(to_prev, axis=2), 1e-12)
+    angles = np.arccos(np.clip(cosines, -1.0, 1.0))
+
+    _, ids = np.unique(np.round(corners.reshape(-1, 3), WELD_DECIMALS), axis=0, return_inverse=True)
+    ids = ids.ravel()
+    sums = np.zeros((ids.max() + 1, 3))
+    np.add.at(sums, ids, (face_normals[:, None, :] * angles[:, :, None]).reshape(-1, 3))
+    normals = sums[ids]
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    # Faces cancelling out (a sheet seen from both sides) keep their own normal
+    fallback = np.repeat(face_normals, 3, axis=0)
+    normals = np.where(lengths > 1e-6, normals / np.maximum(lengths, 1e-12), fallback)
+    return normals.reshape(corners.shape)
+
+def use_outline_import(asset_path):
+    """Point an asset's .import at the post-import script that adds the outline pass."""
+    changed = use_post_import(asset_path, {})
+    if not changed:
+        warn_if_not_imported(asset_path, "the outline post-import script")
+    return changed
+
+def add_outline_normals_glb(filepath, output, force=False):
+    """Write filepath with CUSTOM0 outline normals to output; returns the number of meshes processed."""
+    gltf, binary = read_glb(filepath)
+    document = GlbDocument.from_glb(gltf, binary)
+    drawn = sorted({mesh for _node, mesh, _world in mesh_instances(gltf, binary)})
+
+    processed = []
+    for mesh_index in drawn:
+        mesh = gltf["meshes"][mesh_index]
+        primitives = mesh["primitives"]
+        if any(p.get("mode", 4) != 4 for p in primitives):
+            continue
+        if not force and any("TEXCOORD_2" in p["attributes"] for p in primitives):
+            continue
+        attributes = [{semantic: accessor_array(gltf, binary, index)
+                       for semantic, index in p["attributes"].items()} for p in primitives]
+        indices = [accessor_array(gltf, binary, p["indices"]).astype(np.int64) if "indices" in p
+                   else np.arange(len(a["POSITION"])) for p, a in zip(primitives, attributes)]
+
+        # Averaged over the whole mesh, so seams between primitives stay closed too
+        corners = np.concatenate([a["POSITION"].astype(np.float64)[i.reshape(-1, 3)]
+                                  for a, i in zip(attributes, indices)])
+        normals = smoothed_normals(corners).reshape(-1, 3)
+        new_primitives, start = [], 0
+        for primitive, primitive_attributes, primitive_indices in zip(primitives, attributes, indices):
+            # Indexed vertices all get the normal of their position
+            vertex_normals = np.zeros((len(primitive_attributes["POSITION"]), 3))
+            vertex_normals[primitive_indices] = normals[start:start + len(primitive_indices)]
+            start += len(primitive_indices)
+            primitive_attributes.update(custom_channel(vertex_normals))
+            new_primitives.append({"attributes": primitive_attributes, "indices": primitive_indices,
+                                   "material": primitive.get("material"),
+                                   "normalized": normalized_attributes(gltf, primitive)})
+        document.add_mesh(mesh.get("name", "Mesh"), new_primitives, blender_axes=False, index=mesh_index)
+        for key in ("extras", "weights"):
+            if key in mesh:
+                document.gltf["meshes"][mesh_index][key] = mesh[key]
+        processed.append(mesh_index)
+
+    for node in document.gltf.get("nodes", []):
+        if node.get("mesh") in processed:
+            node.setdefault("extras", {})["outline_normals"] = True
+    document.compact()
+    document.write(output)
+    return len(processed)
+
+def outline_exported(filepath):
+    """Add outline normals to a freshly exported GLB in place and point its .import at them."""
+    count = add_outline_normals_glb(filepath, filepath, force=True)
+    use_outline_import(filepath)
+    print(f"  outline normals: {count} mesh(es)")
+    return count
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add smoothed outline normals to GLB files")
+    add_file_arguments(parser)
+    parser.add_argument("--force", action="store_true", help="replace existing TEXCOORD_2/3 channels")
+    args = parser.parse_args(argv)
+
+    def process(filepath, output):
+        count = add_outline_normals_glb(filepath, output, args.force)
+        print(f"{os.path.basename(filepath)}: {count} mesh(es) with outline normals")
+        if output == filepath:
+            use_outline_import(filepath)
+
+    return run_on_files(args, process)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+"""
+Palette texture atlasing for the flat-shaded generators.
+
+Every flat Material of a MeshBuilder is baked into one cell of a small
+palette texture (base color, plus metallic/roughness in the glTF layout:
+roughness in green, metallic in blue). Each part's UVs are collapsed onto the
+center of its material's cell and the part is switched to the single
+PaletteMaterial, so the whole model exports as one material and one surface.
+
+The palette PNG can also be written next to the GLB and assigned to the
+albedo_texture of a toon/cel ShaderMaterial (with a white albedo_color), so
+one shader material covers every color of the model.
+"""
+import math
+import struct
+import zlib
+
+import numpy as np
+
+from materials import Material
+
+# Pixels per palette cell side. A power of two keeps cells aligned with the
+# first mip levels, so mipmapped sampling of a cell center stays exact
+CELL_SIZE = 4
+
+def linear_to_srgb(values):
+    """Linear color factors (as Blender and glTF store them) to sRGB-encoded values."""
+    values = np.clip(np.asarray(values, dtype=np.float64), 0.0, 1.0)
+    return np.where(values <= 0.0031308, values * 12.92,
+                    1.055 * np.power(values, 1 / 2.4) - 0.055)
+
+def srgb_to_linear(values):
+    """sRGB-encoded values (e.g. texture samples) to linear color factors."""
+    values = np.clip(np.asarray(values, dtype=np.float64), 0.0, 1.0)
+    return np.where(values <= 0.04045, values / 12.92, np.power((values + 0.055) / 1.055, 2.4))
+
+def png_bytes(pixels):
+    """Encode an (height, width, 4) uint8 RGBA array as a PNG file."""
+    pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+    height, width = pixels.shape[:2]
+
+    def chunk(kind, data):
+        return (struct.pack(">I", len(data)) + kind + data
+                + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF))
+
+    # Filter type 0 (None) in front of every scanline
+    raw = np.hstack([np.zeros((height, 1), dtype=np.uint8), pixels.reshape(height, -1)])
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)) + chunk(b"IEND", b""))
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+def read_png(data):
+    """Decode 8-bit grayscale/RGB/RGBA (optionally with alpha) PNG bytes to (height, width, 4) uint8."""
+    if data[:8] != b"\x89PNG\r\n\x1a\n":
+        raise ValueError("not a PNG file")
+    offset, idat, header = 8, bytearray(), None
+    while offset < len(data):
+        length, kind = struct.unpack_from(">I4s", data, offset)
+        chunk = data[offset + 8:offset + 8 + length]
+        if kind == b"IHDR":
+            header = struct.unpack(">IIBBBBB", chunk)
+        elif kind == b"IDAT":
+            idat.extend(chunk)
+        offset += 12 + length
+    width, height, depth, color_type, _compression, _filter, interlace = header
+    channels = {0: 1, 2: 3, 4: 2, 6: 4}.get(color_type)
+    if depth != 8 or channels is None or interlace:
+        raise ValueError("only non-interlaced 8-bit gray/RGB/RGBA PNGs are supported")
+
+    raw = zlib.decompress(bytes(idat))
+    stride = width * channels
+    rows = np.zeros((height, stride), dtype=np.uint8)
+    previous = bytearray(stride)
+    for y in range(height):
+        start = y * (stride + 1)
+        kind, row = raw[start], bytearray(raw[start + 1:start + 1 + stride])
+        for i in range(stride):
+            left = row[i - channels] if i >= channels else 0
+            up = previous[i]
+            up_left = previous[i - channels] if i >= channels else 0
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                row[i] = (row[i] + _paeth(left, up, up_left)) & 0xFF
+        rows[y] = np.frombuffer(bytes(row), dtype=np.uint8)
+        previous = row
+
+    pixels = rows.reshape(height, width, channels)
+    if channels < 3:
+        gray = np.repeat(pixels[..., :1], 3, axis=2)
+        pixels = np.concatenate([gray, pixels[..., 1:]], axis=2) if channels == 2 else gray
+    if pixels.shape[2] == 3:
+        pixels = np.concatenate([pixels, np.full((height, width, 1), 255, dtype=np.uint8)], axis=2)
+    return pixels
+
+class PaletteMaterial(Material):
+    """The single textured material of a palettized model.
+
+    The factors are neutral (white, fully metallic and rough) because glTF
+    multiplies them with the texture values.
+    """
+
+    def __init__(self, name, palette):
+        super().__init__(name, (1.0, 1.0, 1.0), metallic=1.0, roughness=1.0)
+        self.palette = palette
+        self.images = {
+            "baseColorTexture": (f"{name}_BaseColor", palette.base_color_png()),
+            "metallicRoughnessTexture": (f"{name}_MetallicRoughness", palette.metallic_roughness_png()),
+        }
+
+    def _blender_image(self, name, pixels, non_color):
+        import bpy
+
+        height, width = pixels.shape[:2]
+        image = bpy.data.images.new(name, width, height, alpha=True)
+        if non_color:
+            image.colorspace_settings.name = 'Non-Color'
+        # Blender stores pixel rows bottom to top
+        image.pixels.foreach_set((pixels[::-1] / 255.0).astype(np.float32).ravel())
+        image.pack()
+        return image
+
+    def to_blender(self):
+        """Principled BSDF fed by the two palette images, laid out for the glTF exporter."""
+        if self._blender_material is None:
+            import bpy
+
+            mat = bpy.data.materials.new(name=self.name)
+            mat.use_nodes = True
+            nodes, links = mat.node_tree.nodes, mat.node_tree.links
+            bsdf = nodes["Principled BSDF"]
+
+            base = nodes.new("ShaderNodeTexImage")
+            base.image = self._blender_image(self.images["baseColorTexture"][0],
+                                             self.palette.base_color_pixels(), False)
+            base.interpolation = 'Closest'
+            links.new(base.outputs["Color"], bsdf.inputs["Base Color"])
+
+            metallic_roughness = nodes.new("ShaderNodeTexImage")
+            metallic_roughness.image = self._blender_image(
+                self.images["metallicRoughnessTexture"][0],
+                self.palette.metallic_roughness_pixels(), True)
+            metallic_roughness.interpolation = 'Closest'
+            separate = nodes.new("ShaderNodeSeparateColor")
+            links.new(metallic_roughness.outputs["Color"], separate.inputs["Color"])
+            links.new(separate.outputs["Green"], bsdf.inputs["Roughness"])
+            links.new(separate.outputs["Blue"], bsdf.inputs["Metallic"])
+            self._blender_material = mat
+        return self._blender_material
+
+class Palette:
+    """Grid of flat material colors, one CELL_SIZE square cell per material."""
+
+    def __init__(self, materials, name="Palette", cell_size=CELL_SIZE):
+        self.materials = list(materials)
+        self.cell_size = cell_size
+        count = max(len(self.materials), 1)
+        self.columns = math.ceil(math.sqrt(count))
+        self.rows = math.ceil(count / self.columns)
+        # Power-of-two sides for mipmapping and texture compression
+        self.width = 1 << max(0, math.ceil(math.log2(self.columns * cell_size)))
+        self.height = 1 << max(0, math.ceil(math.log2(self.rows * cell_size)))
+        self.cells = {material: divmod(i, self.columns) for i, material in enumerate(self.materials)}
+        self.material = PaletteMaterial(name, self)
+
+    def cell_uv(self, material):
+        """Blender UV (origin bottom left) of the center of a material's cell."""
+        row, column = self.cells[material]
+        u = (column + 0.5) * self.cell_size / self.width
+        v = 1.0 - (row + 0.5) * self.cell_size / self.height
+        return u, v
+
+    def _pixels(self, value):
+        pixels = np.zeros((self.height, self.width, 4), dtype=np.uint8)
+        pixels[..., 3] = 255
+        size = self.cell_size
+        for material, (row, column) in self.cells.items():
+            pixels[row * size:(row + 1) * size, column * size:(column + 1) * size] = value(material)
+        return pixels
+
+    def base_color_pixels(self):
+        def color(material):
+            rgb = linear_to_srgb(material.color[:3])
+            alpha = material.color[3] if len(material.color) > 3 else 1.0
+            return np.round(np.append(rgb, alpha) * 255)
+        return self._pixels(color)
+
+    def metallic_roughness_pixels(self):
+        def factors(material):
+            return np.round(np.array([0.0, material.roughness, material.metallic, 1.0]) * 255)
+        return self._pixels(factors)
+
+    def base_color_png(self):
+        return png_bytes(self.base_color_pixels())
+
+    def metallic_roughness_png(self):
+        return png_bytes(self.metallic_roughness_pixels())
+
+    def apply(self, builder):
+        """Point every part of a MeshBuilder at its cell and the palette material."""
+        for part in builder.all_parts():
+            part.uvs = np.tile(self.cell_uv(part.material), (len(part.positions), 1))
+            part.material = self.material
+        return builder
+
+def palettize(builder, name="Palette", cell_size=CELL_SIZE):
+    """Bake a MeshBuilder's materials into a palette and remap it; returns the Palette."""
+    palette = Palette(builder.materials(), name, cell_size)
+    palette.apply(builder)
+    print(f"  palette: {len(palette.materials)} material(s) baked into one "
+          f"{palette.width}x{palette.height} texture")
+    return palette
+
+def write_palette_png(palette, filepath):
+    """Write the base color palette, e.g. for a toon material's albedo_texture."""
+    with open(filepath, "wb") as f:
+        f.write(palette.base_color_png())
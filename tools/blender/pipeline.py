@@ -0,0 +1,106 @@
+"""
+Shared helpers for the asset generator scripts in tools/blender.
+
+Generators are run either by hand (blender --background --python script.py)
+or by build_assets.py, which passes its options after a "--" separator so
+Blender ignores them:
+
+    blender --background --python create_fountain.py -- --output /tmp/f.glb
+
+Generators also declare OUTPUT, SIDECARS and BUILD_OPTIONS for build_assets.py
+(see there). The MeshBuilder generators finish through export_builder.
+"""
+import argparse
+import os
+import sys
+
+from chunking import write_chunks
+from collision import collision_shapes
+from compression import add_compression_arguments, compress_exported
+from glb_writer import write_builder_glb
+from hidden_faces import remove_hidden_faces
+from lightmap_uv import DEFAULT_TEXEL_SIZE, use_lightmap_import
+from materials import DEFAULT_TOLERANCE, print_surface_report
+from occlusion import write_occluder
+from outline_normals import use_outline_import
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def script_argv(argv=None):
+    """Return the arguments after "--" (everything when there is no separator)."""
+    argv = sys.argv if argv is None else argv
+    if "--" in argv:
+        return argv[argv.index("--") + 1:]
+    # Plain `python3 script.py ...` has no separator and no Blender arguments
+    if argv and not os.path.basename(argv[0]).lower().startswith("blender"):
+        return argv[1:]
+    return []
+
+def project_path(relative_path):
+    """Resolve a project-relative path ("assets/models/...") to an absolute path."""
+    return os.path.join(PROJECT_DIR, *relative_path.split("/"))
+
+def palette_path(output):
+    """Palette PNG written next to a palettized GLB (model.glb -> model_palette.png)."""
+    return os.path.splitext(output)[0] + "_palette.png"
+
+def parse_args(default_output, description=None, argv=None, configure=None):
+    """Parse the generator command line; `configure` may add extra options."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--output", default=project_path(default_output),
+                        help="GLB file to write (default: %(default)s)")
+    parser.add_argument("--material-tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="merge materials whose factors differ by at most this (default: %(default)s)")
+    parser.add_argument("--palette", action="store_true",
+                        help="bake all flat materials into one palette texture and material")
+    parser.add_argument("--lightmap-texel-size", type=float, default=DEFAULT_TEXEL_SIZE,
+                        help="world size of one lightmap UV2 texel in meters, 0 for no UV2 "
+                             "(default: %(default)s)")
+    parser.add_argument("--outline-normals", action=argparse.BooleanOptionalAction, default=True,
+                        help="store smoothed normals for inverted-hull outlines (default: on)")
+    add_compression_arguments(parser)
+    if configure:
+        configure(parser)
+    args = parser.parse_args(script_argv(argv))
+    args.output = os.path.abspath(args.output)
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    # --palette becomes the PNG written next to the GLB (None when off)
+    args.palette = palette_path(args.output) if args.palette else None
+    return args
+
+def export_builder(builder, args, name, blender_export=None):
+    """Bake a generator's MeshBuilder, write args.output and everything derived from it.
+
+    `blender_export(builder, shapes, output)` writes the GLB through Blender when
+    running inside it; otherwise glb_writer does. Options a generator does not
+    offer (--occluder, --chunks) count as off.
+    """
+    output = args.output
+    # Hidden faces go first so the later bakes spend nothing on them
+    if args.remove_hidden:
+        remove_hidden_faces(builder, args.hidden_spacing)
+    if args.lightmap_texel_size:
+        builder.unwrap_lightmap(args.lightmap_texel_size)
+    if args.ao:
+        builder.bake_ao(args.ao_samples, args.ao_distance, args.jobs)
+    if args.outline_normals:
+        builder.bake_outline_normals()
+    shapes = collision_shapes(builder, name, args.collision, args.collision_tolerance)
+
+    if blender_export:
+        blender_export(builder, shapes, output)
+    else:
+        write_builder_glb(builder, output, name, shapes)
+    print(f"Exported to: {output}")
+    print_surface_report(output)
+    if args.lightmap_texel_size:
+        use_lightmap_import(output, args.lightmap_texel_size)
+    if args.outline_normals:
+        use_outline_import(output)
+    if getattr(args, "occluder", False):
+        write_occluder(output)
+    compress_exported(output, args.compression)
+
+    if getattr(args, "chunks", None):
+        write_chunks(builder, output, name, args.chunks, args.chunk_size, args.chunk_triangles,
+                     args.compression)
@@ -2,25 +2,50 @@
 Blender Script: Combine Judai model with Mixamo animations
 
 HOW TO USE:
-1. Open Blender
-2. Go to the "Scripting" tab at the top
-3. Click "New" to create a new script
-4. Paste this entire script
-5. Click the "Run Script" button (play icon)
-6. The animated GLB will be saved to your Downloads folder
+    blender --background --python tools/combine_judai_animations.py -- \\
+        --source-dir ~/Downloads --output ~/Downloads/Judai_Animated.glb
+
+or open Blender's "Scripting" tab, paste this script and click "Run Script"
+(the defaults apply then: everything is read from and written to ~/Downloads).
+Copy the result to addons/judai_char/Judai.glb.
 
 This script:
-1. Imports the base Judai model
-2. Imports all animation FBX files
-3. Exports as a single GLB with all animations
+1. Converts each animation FBX into an action-only .blend library, once:
+   libraries are cached by FBX content hash, and missing ones are converted
+   in parallel background Blender processes
+2. Imports the base Judai model
+3. Appends the cached actions
+4. Reduces their keyframes: channels that never leave the rest pose are
+   dropped and curves are simplified within per-bone error tolerances,
+   optionally after resampling to --resample-fps
+5. Optimizes the skin: at most 4 bone weights per vertex, no bones that
+   are neither weighted nor animated, no unused shape keys or UV maps
+6. Exports as a single GLB with all animations, or with --split-libraries
+   as the skinned model plus one animation library per category, loaded by
+   judai_skin.gd when first needed
+
+Adding an animation therefore costs one FBX import instead of one per
+animation on every run.
 """
 
-import bpy
+import argparse
+import fnmatch
+import hashlib
+import json
+import math
 import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# Configuration - UPDATE THESE PATHS IF NEEDED
-DOWNLOADS_PATH = "/Users/joselucianodemoraisneto/Downloads"
+import bpy
+import numpy as np
+
+# Defaults, all overridable on the command line
+DOWNLOADS_PATH = os.path.expanduser("~/Downloads")
 BASE_MODEL = os.path.join(DOWNLOADS_PATH, "Judai", "Judai.fbx")
 OUTPUT_PATH = os.path.join(DOWNLOADS_PATH, "Judai_Animated.glb")
 
@@ -30,31 +55,195 @@ ANIMATION_FILES = [
     "Slow Run.fbx",
 ]
 
+# Bump when convert_animation changes what it stores to invalidate cached libraries
+CACHE_VERSION = 1
+LOG_TAIL_LINES = 10
+
+# Bone weights per vertex: what Godot skins with unless a mesh asks for 8
+MAX_INFLUENCES = 4
+
+# Keyframe reduction: largest error per bone channel, in meters, degrees and scale factor
+TOLERANCES = {"position": 0.001, "rotation": 0.1, "scale": 0.001}
+BONE_CHANNEL = re.compile(r'^pose\.bones\["(.+)"\]\.(location|rotation_quaternion|rotation_euler|scale)$')
+REST_VALUES = {
+    "location": (0.0, 0.0, 0.0),
+    "rotation_quaternion": (1.0, 0.0, 0.0, 0.0),
+    "rotation_euler": (0.0, 0.0, 0.0),
+    "scale": (1.0, 1.0, 1.0),
+}
+POSE_BONE_PATH = re.compile(r'^pose\.bones\["(.+?)"\]')
+# Components a glTF channel stores per key (Euler rotations are written as quaternions)
+GLTF_COMPONENTS = {"location": 3, "rotation_quaternion": 4, "rotation_euler": 4, "scale": 3}
+
+def script_path():
+    """This file on disk, None when the script was pasted into Blender's text editor"""
+    path = os.path.abspath(globals().get("__file__", ""))
+    return path if path.endswith(".py") and os.path.isfile(path) else None
+
+def default_cache_dir():
+    """The project's (git-ignored) build cache, or next to the downloads when pasted"""
+    path = script_path()
+    if path:
+        return os.path.join(os.path.dirname(os.path.dirname(path)), ".build_cache", "fbx_actions")
+    return os.path.join(DOWNLOADS_PATH, ".judai_action_cache")
+
+def script_argv(argv=None):
+    """Return the arguments after "--" (Blender keeps everything before it)"""
+    argv = sys.argv if argv is None else argv
+    return argv[argv.index("--") + 1:] if "--" in argv else []
+
+def parse_args(argv=None, description=None, configure=None):
+    """Parse the script's command line; `configure` may add options or change defaults (see bake_crowd_vat.py)"""
+    parser = argparse.ArgumentParser(
+        description=description or "Combine the Judai model with Mixamo animations into one GLB")
+    parser.add_argument("--base-model", default=BASE_MODEL, help="character FBX (default: %(default)s)")
+    parser.add_argument("--source-dir", default=DOWNLOADS_PATH,
+                        help="folder with the animation FBX files (default: %(default)s)")
+    parser.add_argument("--animations", nargs="+", default=ANIMATION_FILES, metavar="FBX",
+                        help="animation files relative to --source-dir, named after their file "
+                             "(default: %(default)s)")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="GLB file to write (default: %(default)s)")
+    parser.add_argument("--cache-dir", default=default_cache_dir(),
+                        help="converted action libraries (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="parallel FBX conversions, 1 converts inside this Blender (default: %(default)s)")
+    parser.add_argument("--blender", default=bpy.app.binary_path,
+                        help="Blender executable for the conversion workers (default: this one)")
+    parser.add_argument("--force", action="store_true", help="convert every FBX again, ignoring the cache")
+    parser.add_argument("--reduce-keyframes", action=argparse.BooleanOptionalAction, default=True,
+                        help="drop rest-pose channels and simplify curves before export (default: on)")
+    parser.add_argument("--position-tolerance", type=float, default=TOLERANCES["position"],
+                        help="largest bone position error in meters (default: %(default)s)")
+    parser.add_argument("--rotation-tolerance", type=float, default=TOLERANCES["rotation"],
+                        help="largest bone rotation error in degrees (default: %(default)s)")
+    parser.add_argument("--scale-tolerance", type=float, default=TOLERANCES["scale"],
+                        help="largest bone scale error (default: %(default)s)")
+    parser.add_argument("--bone-tolerances", metavar="JSON",
+                        help='per-bone overrides, {"bone name pattern": {"position": m, "rotation": deg, '
+                             '"scale": s}}; later patterns win')
+    parser.add_argument("--resample-fps", type=float,
+                        help="resample every curve to this rate before reducing (default: keep the keys)")
+    parser.add_argument("--optimize-skin", action=argparse.BooleanOptionalAction, default=True,
+                        help="limit bone influences, prune unused bones and strip unused shape keys and "
+                             "UV maps (default: on)")
+    parser.add_argument("--max-influences", type=int, default=MAX_INFLUENCES,
+                        help="bone weights kept per vertex, 0 keeps all (default: %(default)s)")
+    parser.add_argument("--keep-bones", nargs="+", default=[], metavar="PATTERN",
+                        help="bone name patterns never pruned (bones Godot scripts attach things to)")
+    parser.add_argument("--split-libraries", action="store_true",
+                        help="write the skinned model without animations plus one animation library GLB "
+                             "per category and a manifest, for judai_skin.gd to load on demand")
+    parser.add_argument("--library", action="append", default=[], metavar="CATEGORY=CLIP,...",
+                        help="with --split-libraries: clips of a library of their own; repeatable "
+                             "(others go to \"locomotion\")")
+    # Worker mode, used by convert_animations: convert one FBX and quit
+    parser.add_argument("--convert", nargs=2, metavar=("FBX", "BLEND"), help=argparse.SUPPRESS)
+    if configure:
+        configure(parser)
+    args = parser.parse_args(script_argv(argv))
+    args.base_model = os.path.abspath(os.path.expanduser(args.base_model))
+    args.source_dir = os.path.abspath(os.path.expanduser(args.source_dir))
+    args.output = os.path.abspath(os.path.expanduser(args.output))
+    args.cache_dir = os.path.abspath(os.path.expanduser(args.cache_dir))
+    args.tolerances = {"position": args.position_tolerance, "rotation": args.rotation_tolerance,
+                       "scale": args.scale_tolerance}
+    if args.bone_tolerances:
+        with open(args.bone_tolerances) as f:
+            args.bone_tolerances = json.load(f)
+    return args
+
+def purge_orphans():
+    """Free all data nothing uses any more (what deleted imports leave behind)"""
+    bpy.data.orphans_purge(do_local_ids=True, do_linked_ids=True, do_recursive=True)
+
 def clear_scene():
     """Clear all objects from the scene"""
     bpy.ops.object.select_all(action='SELECT')
     bpy.ops.object.delete()
 
     # Clear orphan data
-    for block in bpy.data.meshes:
-        if block.users == 0:
-            bpy.data.meshes.remove(block)
-    for block in bpy.data.armatures:
-        if block.users == 0:
-            bpy.data.armatures.remove(block)
-    for block in bpy.data.actions:
-        if block.users == 0:
-            bpy.data.actions.remove(block)
-
-def import_base_model():
+    purge_orphans()
+
+def cached_library(cache_dir, fbx_path):
+    """Action library for an FBX, keyed by its content, the converter and the Blender version"""
+    h = hashlib.sha256(f"{CACHE_VERSION}:{bpy.app.version_string}:".encode())
+    with open(fbx_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return os.path.join(cache_dir, h.hexdigest() + ".blend")
+
+def convert_animation(fbx_path, library_path):
+    """Import an animation FBX and write only its actions to a .blend library"""
+    existing_objects = set(bpy.data.objects.keys())
+    existing_actions = set(bpy.data.actions.keys())
+
+    # Import the FBX (ignore materials to preserve original colors)
+    bpy.ops.import_scene.fbx(filepath=fbx_path, use_image_search=False)
+
+    actions = [bpy.data.actions[name] for name in sorted(set(bpy.data.actions.keys()) - existing_actions)]
+    if actions:
+        # Write next to the final name first so an interrupted run leaves no partial library
+        temporary = os.path.splitext(library_path)[0] + f".{os.getpid()}.tmp.blend"
+        bpy.data.libraries.write(temporary, set(actions), fake_user=True)
+        os.replace(temporary, library_path)
+
+    # Delete ALL imported data (meshes, armatures, materials, the actions)
+    for obj_name in set(bpy.data.objects.keys()) - existing_objects:
+        bpy.data.objects.remove(bpy.data.objects[obj_name], do_unlink=True)
+    for action in actions:
+        bpy.data.actions.remove(action)
+    purge_orphans()
+    return len(actions)
+
+def _convert_in_worker(args, worker, fbx_path, library_path):
+    """Convert one FBX in a background Blender; returns (converted, seconds, log)"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [args.blender, "--background", "--factory-startup", "--python-exit-code", "1",
+         "--python", worker, "--", "--convert", fbx_path, library_path],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors="replace")
+    converted = result.returncode == 0 and os.path.exists(library_path)
+    return converted, time.perf_counter() - start, result.stdout
+
+def convert_animations(fbx_paths, args):
+    """{FBX path: action library} for every FBX that has actions, converting those not cached yet"""
+    os.makedirs(args.cache_dir, exist_ok=True)
+    libraries = {path: cached_library(args.cache_dir, path) for path in fbx_paths}
+    missing = [path for path in fbx_paths if args.force or not os.path.exists(libraries[path])]
+    print(f"  {len(fbx_paths) - len(missing)} cached, {len(missing)} to convert")
+    for path in missing:
+        if os.path.exists(libraries[path]):
+            os.remove(libraries[path])
+
+    worker = script_path()
+    if args.jobs > 1 and len(missing) > 1 and worker and args.blender:
+        # One fresh Blender per FBX: conversions run side by side and each
+        # process's memory is returned when it exits
+        with ThreadPoolExecutor(max_workers=args.jobs) as pool:
+            results = pool.map(lambda path: _convert_in_worker(args, worker, path, libraries[path]), missing)
+            for path, (converted, elapsed, log) in zip(missing, results):
+                print(f"  [{'ok' if converted else 'failed':^6}] {os.path.basename(path)} {elapsed:.2f}s")
+                if not converted:
+                    tail = log.rstrip().splitlines()[-LOG_TAIL_LINES:]
+                    print("\n".join("      | " + line for line in tail))
+    else:
+        for path in missing:
+            start = time.perf_counter()
+            converted = convert_animation(path, libraries[path]) > 0
+            elapsed = time.perf_counter() - start
+            print(f"  [{'ok' if converted else 'failed':^6}] {os.path.basename(path)} {elapsed:.2f}s")
+
+    return {path: library for path, library in libraries.items() if os.path.exists(library)}
+
+def import_base_model(base_model):
     """Import the base character model"""
-    print(f"Importing base model: {BASE_MODEL}")
-    if not os.path.exists(BASE_MODEL):
-        print(f"ERROR: Base model not found at {BASE_MODEL}")
-        print("Make sure you have Judai/Judai.fbx in your Downloads folder")
+    print(f"Importing base model: {base_model}")
+    if not os.path.exists(base_model):
+        print(f"ERROR: Base model not found at {base_model}")
+        print("Pass the character FBX with --base-model")
         return None
 
-    bpy.ops.import_scene.fbx(filepath=BASE_MODEL)
+    bpy.ops.import_scene.fbx(filepath=base_model)
 
     # Find the armature
     armature = None
@@ -97,47 +286,18 @@ def import_base_model():
 
     return armature
 
-def import_animation(armature, anim_file, anim_name):
-    """Import an animation and add it to the armature"""
-    filepath = os.path.join(DOWNLOADS_PATH, anim_file)
-
-    if not os.path.exists(filepath):
-        print(f"  Skipping (not found): {anim_file}")
-        return False
-
-    print(f"  Importing: {anim_file} -> {anim_name}")
+def append_animation(library_path, anim_name):
+    """Append the cached actions of one animation, renamed after its file"""
+    # Appended rather than linked: linked actions cannot be renamed or edited
+    with bpy.data.libraries.load(library_path, link=False) as (data_from, data_to):
+        data_to.actions = list(data_from.actions)
 
-    # Store existing objects, actions, and materials
-    existing_objects = set(bpy.data.objects.keys())
-    existing_actions = set(bpy.data.actions.keys())
-    existing_materials = set(bpy.data.materials.keys())
-
-    # Import the FBX (ignore materials to preserve original colors)
-    bpy.ops.import_scene.fbx(filepath=filepath, use_image_search=False)
-
-    # Find new actions
-    new_actions = set(bpy.data.actions.keys()) - existing_actions
-
-    # Rename the new action
-    for action_name in new_actions:
-        action = bpy.data.actions[action_name]
+    for action in data_to.actions:
         action.name = anim_name
-        print(f"    Renamed action to: {anim_name}")
+        action.use_fake_user = False
+        print(f"    Appended action: {action.name}")
 
-    # Delete ALL imported objects (meshes, armatures, everything)
-    new_objects = set(bpy.data.objects.keys()) - existing_objects
-    for obj_name in new_objects:
-        if obj_name in bpy.data.objects:
-            obj = bpy.data.objects[obj_name]
-            bpy.data.objects.remove(obj, do_unlink=True)
-
-    # Delete any new materials from Mixamo (keep original Jaden materials)
-    new_materials = set(bpy.data.materials.keys()) - existing_materials
-    for mat_name in new_materials:
-        if mat_name in bpy.data.materials:
-            bpy.data.materials.remove(bpy.data.materials[mat_name])
-
-    return len(new_actions) > 0
+    return len(data_to.actions) > 0
 
 def push_all_actions_to_nla(armature):
     """Push all actions to NLA tracks so they export properly"""
@@ -156,53 +316,378 @@ def push_all_actions_to_nla(armature):
         strip = track.strips.new(action.name, int(action.frame_range[0]), action)
         strip.name = action.name
 
-def export_glb():
+def channel_groups(action):
+    """{(bone, property): fcurves by array index} for the pose bone transform curves of an action"""
+    groups = {}
+    for fcurve in action.fcurves:
+        match = BONE_CHANNEL.match(fcurve.data_path)
+        if match:
+            groups.setdefault((match.group(1), match.group(2)), []).append(fcurve)
+    for fcurves in groups.values():
+        fcurves.sort(key=lambda fcurve: fcurve.array_index)
+    return groups
+
+def bone_tolerances(bone, args):
+    """Error tolerances of one bone: the defaults updated by every matching --bone-tolerances pattern"""
+    tolerances = dict(args.tolerances)
+    for pattern, overrides in (args.bone_tolerances or {}).items():
+        if fnmatch.fnmatchcase(bone, pattern):
+            tolerances.update(overrides)
+    return tolerances
+
+def component_tolerance(prop, tolerances, unit_scale):
+    """Largest error of one curve value of a channel, in the units Blender stores it in"""
+    if prop == "location":
+        # Bone locations are in armature units, which the armature object scales to meters
+        return tolerances["position"] / unit_scale
+    if prop == "rotation_quaternion":
+        # A quaternion component off by e turns the bone by up to about 2e radians
+        return math.radians(tolerances["rotation"]) / 2
+    if prop == "rotation_euler":
+        return math.radians(tolerances["rotation"])
+    return tolerances["scale"]
+
+def reduce_keys(frames, values, tolerance):
+    """Indices of the keys to keep so linear interpolation stays within tolerance of every value
+
+    Ramer-Douglas-Peucker on the value error: a span is split at its worst key
+    until no key in between is further than its tolerance from the line.
+    """
+    values = values / tolerance
+    keep = {0, len(frames) - 1}
+    spans = [(0, len(frames) - 1)]
+    while spans:
+        first, last = spans.pop()
+        if last - first < 2:
+            continue
+        t = (frames[first + 1:last] - frames[first]) / (frames[last] - frames[first])
+        line = values[first] + t[:, None] * (values[last] - values[first])
+        error = np.abs(values[first + 1:last] - line).max(axis=1)
+        worst = int(error.argmax())
+        if error[worst] > 1.0:
+            split = first + 1 + worst
+            keep.add(split)
+            spans += [(first, split), (split, last)]
+    return sorted(keep)
+
+def sample_frames(fcurves, step):
+    """Frames to reduce from: every key of the channel, or a grid step frames apart when resampling"""
+    frames = sorted({point.co[0] for fcurve in fcurves for point in fcurve.keyframe_points})
+    if step and len(frames) > 1:
+        grid = np.arange(frames[0], frames[-1], step)
+        frames = list(grid) + [frames[-1]] if frames[-1] - grid[-1] > 1e-6 else list(grid)
+    return np.asarray(frames, dtype=np.float64)
+
+def set_keys(fcurves, frames, values):
+    """Replace the keys of a channel's curves with linear keys at frames"""
+    for column, fcurve in enumerate(fcurves):
+        points = fcurve.keyframe_points
+        points.clear()
+        points.add(len(frames))
+        points.foreach_set("co", np.column_stack([frames, values[:, column]]).ravel().tolist())
+        for point in points:
+            point.interpolation = 'LINEAR'
+        fcurve.update()
+
+def analyze_channels(armature, args, step=None):
+    """Sample every action's bone channels
+
+    Returns ({action: [(bone, property, fcurves, frames, values, tolerance,
+    constant)]}, {(bone, property) that leaves the rest pose in some clip}).
+    """
+    unit_scale = max(armature.matrix_world.to_scale())
+    plans = {}
+    moving = set()
+    for action in bpy.data.actions:
+        if action.name == "RESET":
+            continue
+        plan = []
+        for (bone, prop), fcurves in channel_groups(action).items():
+            frames = sample_frames(fcurves, step)
+            if not len(frames):
+                continue
+            values = np.array([[fcurve.evaluate(frame) for fcurve in fcurves] for frame in frames])
+            tolerance = component_tolerance(prop, bone_tolerances(bone, args), unit_scale)
+            rest = np.array(REST_VALUES[prop])[[fcurve.array_index for fcurve in fcurves]]
+            constant = bool(np.all(np.abs(values - values[0]) <= tolerance))
+            if not (constant and np.all(np.abs(values[0] - rest) <= tolerance)):
+                moving.add((bone, prop))
+            plan.append((bone, prop, fcurves, frames, values, tolerance, constant))
+        plans[action] = plan
+    return plans, moving
+
+def reduce_animations(armature, args):
+    """Remove rest-pose channels and simplify every action's curves, reporting the savings per clip"""
+    scene = bpy.context.scene
+    step = scene.render.fps / scene.render.fps_base / args.resample_fps if args.resample_fps else None
+    plans, moving = analyze_channels(armature, args, step)
+
+    total_before = total_after = 0
+    for action, plan in plans.items():
+        start, end = action.frame_range
+        # What the exporter writes without reduction: a key per frame for every channel
+        sampled_keys = int(round(end - start)) + 1
+        before = after = keys_before = keys_after = kept = 0
+        for bone, prop, fcurves, frames, values, tolerance, constant in plan:
+            key_bytes = 4 * (1 + GLTF_COMPONENTS[prop])
+            before += sampled_keys * key_bytes
+            keys_before += sampled_keys
+            # A channel at rest in every clip is dropped; one at rest in only some
+            # clips is kept so switching clips still resets the bone
+            if (bone, prop) not in moving:
+                for fcurve in fcurves:
+                    action.fcurves.remove(fcurve)
+                continue
+            keep = [0] if constant else reduce_keys(frames, values, tolerance)
+            set_keys(fcurves, frames[keep], values[keep])
+            after += len(keep) * key_bytes
+            keys_after += len(keep)
+            kept += 1
+        total_before += before
+        total_after += after
+        print(f"  {action.name}: {len(plan)} -> {kept} channels, {keys_before:,} -> {keys_after:,} keys, "
+              f"~{before:,} -> {after:,} bytes ({after / max(before, 1):.0%})")
+    print(f"  Animation data: ~{total_before:,} -> {total_after:,} bytes ({total_after / max(total_before, 1):.0%})")
+
+def skinned_meshes(armature):
+    """Mesh objects deformed by the armature"""
+    return [obj for obj in bpy.data.objects if obj.type == 'MESH' and any(
+        modifier.type == 'ARMATURE' and modifier.object == armature for modifier in obj.modifiers)]
+
+def bone_weights(obj, vertex, deform_bones):
+    """[(weight, vertex group index)] of a vertex's non-zero bone weights, heaviest first"""
+    groups = obj.vertex_groups
+    return sorted(((element.weight, element.group) for element in vertex.groups
+                   if element.weight > 0 and groups[element.group].name in deform_bones), reverse=True)
+
+def skin_stats(armature, limit):
+    """What skinning the character costs: bones, weights per vertex, shape keys, UV and color layers"""
+    deform_bones = {bone.name for bone in armature.data.bones if bone.use_deform}
+    stats = {"bones": len(armature.data.bones), "vertices": 0, "bone weights": 0, "most weights": 0,
+             f"over {limit} weights": 0, "shape keys": 0, "uv maps": 0, "color layers": 0}
+    for obj in skinned_meshes(armature):
+        mesh = obj.data
+        for vertex in mesh.vertices:
+            count = len(bone_weights(obj, vertex, deform_bones))
+            stats["bone weights"] += count
+            stats["most weights"] = max(stats["most weights"], count)
+            stats[f"over {limit} weights"] += count > limit
+        stats["vertices"] += len(mesh.vertices)
+        stats["shape keys"] += len(mesh.shape_keys.key_blocks) if mesh.shape_keys else 0
+        stats["uv maps"] += len(mesh.uv_layers)
+        stats["color layers"] += len(mesh.color_attributes)
+    return stats
+
+def limit_influences(armature, limit):
+    """Keep the limit heaviest bone weights of every vertex, renormalized to sum to one"""
+    deform_bones = {bone.name for bone in armature.data.bones if bone.use_deform}
+    changed = 0
+    for obj in skinned_meshes(armature):
+        groups = obj.vertex_groups
+        for vertex in obj.data.vertices:
+            weights = bone_weights(obj, vertex, deform_bones)
+            kept, dropped = weights[:limit], weights[limit:]
+            total = sum(weight for weight, _group in kept)
+            if not kept or (not dropped and abs(total - 1.0) < 1e-6):
+                continue
+            for _weight, group in dropped:
+                groups[group].remove([vertex.index])
+            for weight, group in kept:
+                groups[group].add([vertex.index], weight / total, 'REPLACE')
+            changed += 1
+    return changed
+
+def prune_bones(armature, args):
+    """Delete the bones no vertex is weighted to and no clip moves (with their subtrees); returns their names"""
+    _plans, moving = analyze_channels(armature, args)
+    used = {bone for bone, _prop in moving}
+    for obj in skinned_meshes(armature):
+        groups = obj.vertex_groups
+        for vertex in obj.data.vertices:
+            used.update(groups[element.group].name for element in vertex.groups if element.weight > 0)
+    used.update(obj.parent_bone for obj in bpy.data.objects
+                if obj.parent == armature and obj.parent_type == 'BONE')
+
+    # A bone stays when it or any bone below it is used
+    needed = set()
+    for bone in armature.data.bones:
+        if bone.name in used or any(fnmatch.fnmatchcase(bone.name, pattern) for pattern in args.keep_bones):
+            while bone and bone.name not in needed:
+                needed.add(bone.name)
+                bone = bone.parent
+    pruned = [bone.name for bone in armature.data.bones if bone.name not in needed]
+    if not pruned:
+        return pruned
+
+    # Their remaining curves only hold the rest pose
+    for action in bpy.data.actions:
+        for fcurve in list(action.fcurves):
+            match = POSE_BONE_PATH.match(fcurve.data_path)
+            if match and match.group(1) not in needed:
+                action.fcurves.remove(fcurve)
+    for obj in skinned_meshes(armature):
+        for name in pruned:
+            group = obj.vertex_groups.get(name)
+            if group:
+                obj.vertex_groups.remove(group)
+
+    bpy.ops.object.select_all(action='DESELECT')
+    bpy.context.view_layer.objects.active = armature
+    bpy.ops.object.mode_set(mode='EDIT')
+    edit_bones = armature.data.edit_bones
+    for name in pruned:
+        edit_bones.remove(edit_bones[name])
+    bpy.ops.object.mode_set(mode='OBJECT')
+    return pruned
+
+def used_uv_maps(obj):
+    """UV maps the object's materials read, the render UV map standing in for the default one"""
+    mesh = obj.data
+    used = {layer.name for layer in mesh.uv_layers if layer.active_render}
+    for material in mesh.materials:
+        if not material or not material.node_tree:
+            continue
+        for node in material.node_tree.nodes:
+            if node.type in ('UVMAP', 'NORMAL_MAP', 'TANGENT') and getattr(node, "uv_map", ""):
+                used.add(node.uv_map)
+    return used
+
+def strip_unused_data(armature):
+    """Remove shape keys no clip animates or mixes in and UV maps no material reads"""
+    animated = {fcurve.data_path for action in bpy.data.actions for fcurve in action.fcurves}
+    for obj in skinned_meshes(armature):
+        mesh = obj.data
+        key = mesh.shape_keys
+        if key:
+            if key.animation_data:
+                animated.update(driver.data_path for driver in key.animation_data.drivers)
+            for block in list(key.key_blocks):
+                if block != key.reference_key and abs(block.value) < 1e-6 \
+                        and f'key_blocks["{block.name}"].value' not in animated:
+                    obj.shape_key_remove(block)
+            if len(key.key_blocks) == 1:
+                obj.shape_key_clear()
+
+        used = used_uv_maps(obj)
+        for layer in [layer for layer in mesh.uv_layers if layer.name not in used]:
+            mesh.uv_layers.remove(layer)
+
+        # Vertex colors are removed on import; this catches layers added since
+        while mesh.color_attributes:
+            mesh.color_attributes.remove(mesh.color_attributes[0])
+
+def optimize_skin(armature, args):
+    """Cap bone influences, prune unused bones, strip unused mesh data and report the skinning cost"""
+    limit = args.max_influences or MAX_INFLUENCES
+    before = skin_stats(armature, limit)
+    if args.max_influences:
+        print(f"  Limited {limit_influences(armature, args.max_influences):,} vertices to "
+              f"{args.max_influences} weights")
+    pruned = prune_bones(armature, args)
+    print(f"  Pruned {len(pruned)} bones" + (f": {', '.join(pruned)}" if pruned else ""))
+    strip_unused_data(armature)
+    after = skin_stats(armature, limit)
+
+    for name, value in before.items():
+        print(f"  {name:<16} {value:>8,} -> {after[name]:>8,}")
+
+def export_glb(output_path, force_sampling=True, all_influences=True):
     """Export the scene as GLB"""
-    print(f"\nExporting to: {OUTPUT_PATH}")
+    print(f"\nExporting to: {output_path}")
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
     bpy.ops.object.select_all(action='SELECT')
 
     bpy.ops.export_scene.gltf(
-        filepath=OUTPUT_PATH,
+        filepath=output_path,
         export_format='GLB',
         export_animations=True,
         export_animation_mode='ACTIONS',
         export_nla_strips=True,
-        export_all_influences=True,
+        # Sampling would put a key back on every frame of reduced curves
+        export_force_sampling=force_sampling,
+        export_all_influences=all_influences,
         export_skins=True,
         export_image_format='AUTO',
         export_materials='EXPORT',
     )
     print("Export complete!")
 
-def main():
-    print("\n" + "="*50)
-    print("JUDAI ANIMATION COMBINER")
-    print("="*50 + "\n")
-
+def load_character(args):
+    """Clear the scene, import the base model and append every animation; returns the armature or None"""
     # Clear scene
     print("Clearing scene...")
     clear_scene()
 
+    # Convert the animations not in the cache yet
+    print("Converting animations...")
+    fbx_paths = []
+    for anim_file in args.animations:
+        filepath = os.path.join(args.source_dir, anim_file)
+        if os.path.exists(filepath):
+            fbx_paths.append(filepath)
+        else:
+            print(f"  Skipping (not found): {anim_file}")
+    libraries = convert_animations(fbx_paths, args)
+
     # Import base model
-    armature = import_base_model()
+    armature = import_base_model(args.base_model)
     if not armature:
         print("\nERROR: Failed to import base model!")
-        print("Make sure Judai/Judai.fbx exists in Downloads")
-        return
+        print(f"Make sure {args.base_model} exists")
+        return None
 
     print(f"Base model loaded: {armature.name}\n")
 
-    # Import animations
-    print("Importing animations...")
-    for anim_file in ANIMATION_FILES:
-        anim_name = Path(anim_file).stem
-        import_animation(armature, anim_file, anim_name)
+    # Append the converted animations
+    print("Appending animations...")
+    for filepath in fbx_paths:
+        if filepath in libraries:
+            append_animation(libraries[filepath], Path(filepath).stem)
+        else:
+            print(f"  Skipping (no actions): {os.path.basename(filepath)}")
+    return armature
+
+def split_libraries(args):
+    """Split the exported GLB into the model and per-category animation libraries (tools/blender)"""
+    path = script_path()
+    if not path:
+        print("ERROR: --split-libraries needs the script run from the repository, not pasted")
+        return False
+    # Imported here so the script still runs pasted into Blender without tools/blender
+    sys.path.insert(0, os.path.join(os.path.dirname(path), "blender"))
+    from animation_libraries import parse_libraries, print_split, split_animation_libraries
+
+    manifest = split_animation_libraries(args.output, parse_libraries(args.library))
+    print_split(args.output, manifest)
+    return True
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.convert:
+        fbx_path, library_path = args.convert
+        sys.exit(0 if convert_animation(fbx_path, library_path) else 1)
+
+    print("\n" + "="*50)
+    print("JUDAI ANIMATION COMBINER")
+    print("="*50 + "\n")
+
+    armature = load_character(args)
+    if not armature:
+        return
 
     # Push to NLA for proper export
     print("\nPreparing animations for export...")
     push_all_actions_to_nla(armature)
 
+    if args.reduce_keyframes:
+        print("\nReducing keyframes...")
+        reduce_animations(armature, args)
+
+    if args.optimize_skin:
+        print("\nOptimizing skin...")
+        optimize_skin(armature, args)
+
     # List all animations
     print("\nAnimations included:")
     for action in bpy.data.actions:
@@ -210,14 +695,25 @@ def main():
             print(f"  - {action.name}")
 
     # Export
-    export_glb()
+    # More than four weights per vertex are only written when they were kept on purpose
+    capped = args.optimize_skin and 0 < args.max_influences <= MAX_INFLUENCES
+    export_glb(args.output, force_sampling=not args.reduce_keyframes, all_influences=not capped)
+
+    split = False
+    if args.split_libraries:
+        print("\nSplitting animation libraries...")
+        split = split_libraries(args)
 
     print("\n" + "="*50)
     print("SUCCESS! Your animated model is at:")
-    print(OUTPUT_PATH)
-    print("\nCopy this file to your Godot project:")
-    print("addons/judai_char/Judai.glb")
+    print(args.output)
+    if split:
+        print("\nCopy it, its animation libraries and its _animations.json manifest to:")
+        print("addons/judai_char/ (and set animation_manifest on JudaiSkin)")
+    else:
+        print("\nCopy this file to your Godot project:")
+        print("addons/judai_char/Judai.glb")
     print("="*50 + "\n")
 
-# Run
-main()
+if __name__ == "__main__":
+    main()